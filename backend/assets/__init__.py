@@ -0,0 +1,6 @@
+"""
+Content-addressed storage for generated and extracted images.
+"""
+from .store import BlobStore, get_blob_store, shorten_image_url
+
+__all__ = ["BlobStore", "get_blob_store", "shorten_image_url"]
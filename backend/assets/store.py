@@ -0,0 +1,184 @@
+"""
+Content-addressed store for generated and extracted images.
+
+Inline data URLs make the generated code megabytes long, and that code is
+sent over the websocket, kept in history and sent back to the model on every
+update. Instead, image bytes are written once under their SHA-256 digest and
+referenced by a short URL served from `/assets/<digest>.<ext>`. Since the
+name is derived from the content, responses can be cached forever. `inline`
+turns short URLs back into data URLs for self-contained exports.
+
+Blobs are referenced from code the client keeps, so the store only forgets
+what has gone unused: blobs not stored or served for `ttl` seconds, and the
+least recently used ones once the directory exceeds `max_bytes`.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+# Only raster formats: SVG served from our origin could run scripts.
+EXTENSIONS: Dict[str, str] = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/webp": "webp",
+    "image/gif": "gif",
+}
+MIME_TYPES = {ext: mime for mime, ext in EXTENSIONS.items()}
+
+NAME_PATTERN = re.compile(r"^[0-9a-f]{32}\.(png|jpg|webp|gif)$")
+
+# Pruning past max_bytes evicts down to this share of it.
+PRUNE_TARGET_RATIO = 0.9
+
+
+class BlobStore:
+    def __init__(
+        self,
+        directory: str,
+        base_url: str,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._url_pattern = re.compile(
+            re.escape(f"{self.base_url}/assets/") + r"([0-9a-f]{32}\.(?:png|jpg|webp|gif))"
+        )
+        # Running estimate of the directory size; every prune recounts it.
+        self._bytes = 0
+        self.prune()
+
+    def put(self, data: bytes, mime_type: str) -> Optional[str]:
+        """Store `data` and return its URL, or None for unsupported types."""
+        ext = EXTENSIONS.get(mime_type)
+        if ext is None:
+            return None
+        name = f"{hashlib.sha256(data).hexdigest()[:32]}.{ext}"
+        path = os.path.join(self.directory, name)
+        if not self._touch(path):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._bytes += len(data)
+            if self.max_bytes is not None and self._bytes > self.max_bytes:
+                self.prune()
+        return f"{self.base_url}/assets/{name}"
+
+    def shorten(self, url: str) -> str:
+        """Replace a data URL with a store URL; other URLs pass through."""
+        if not url.startswith("data:"):
+            return url
+        header, _, payload = url.partition(",")
+        if not header.endswith(";base64"):
+            return url
+        mime_type = header[len("data:") : -len(";base64")]
+        try:
+            data = base64.b64decode(payload)
+        except ValueError:
+            return url
+        return self.put(data, mime_type) or url
+
+    def path(self, name: str) -> Optional[Tuple[str, str]]:
+        """(file path, mime type) for a stored blob name, if it exists."""
+        if not NAME_PATTERN.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        if not self._touch(path):
+            return None
+        return path, MIME_TYPES[name.rsplit(".", 1)[1]]
+
+    def prune(self) -> int:
+        """
+        Remove blobs unused for `ttl`, then the least recently used ones while
+        over `max_bytes`. Returns the number removed.
+        """
+        now = time.time()
+        removed = 0
+        # (last used, path, bytes) of the blobs kept so far
+        blobs: List[Tuple[float, str, int]] = []
+        for name in os.listdir(self.directory):
+            if not NAME_PATTERN.match(name):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+                if self.ttl is not None and now - stat.st_mtime > self.ttl:
+                    os.remove(path)
+                    removed += 1
+                else:
+                    blobs.append((stat.st_mtime, path, stat.st_size))
+            except OSError:
+                continue
+
+        total = sum(size for _, _, size in blobs)
+        if self.max_bytes is not None and total > self.max_bytes:
+            target = self.max_bytes * PRUNE_TARGET_RATIO
+            for _, path, size in sorted(blobs):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+                removed += 1
+        self._bytes = total
+        return removed
+
+    def _touch(self, path: str) -> bool:
+        """Mark a blob as used now; False if it does not exist."""
+        try:
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+
+    def inline(self, code: str) -> str:
+        """Replace store URLs in `code` with data URLs of their contents."""
+
+        def replace(match: re.Match[str]) -> str:
+            found = self.path(match.group(1))
+            if found is None:
+                return match.group(0)
+            path, mime_type = found
+            with open(path, "rb") as f:
+                data = base64.b64encode(f.read()).decode("utf-8")
+            return f"data:{mime_type};base64,{data}"
+
+        return self._url_pattern.sub(replace, code)
+
+
+_store: BlobStore | None = None
+
+
+def get_blob_store() -> BlobStore | None:
+    """Process-wide store, or None when `ASSET_BASE_URL` is not configured."""
+    global _store
+    if not settings.ASSET_BASE_URL:
+        return None
+    if _store is None:
+        _store = BlobStore(
+            settings.ASSET_STORE_DIR,
+            settings.ASSET_BASE_URL,
+            ttl=settings.ASSET_STORE_TTL_SECONDS or None,
+            max_bytes=settings.ASSET_STORE_MAX_BYTES or None,
+        )
+    return _store
+
+
+def shorten_image_url(url: str) -> str:
+    """Store data URLs as blobs when the store is enabled."""
+    store = get_blob_store()
+    return store.shorten(url) if store is not None else url
@@ -0,0 +1,8 @@
+"""
+Small in-process caching primitives shared by the image and analysis paths.
+"""
+from .disk import DiskCache
+from .lru import LRUCache
+from .two_tier import TwoTierCache
+
+__all__ = ["DiskCache", "LRUCache", "TwoTierCache"]
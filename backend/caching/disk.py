@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+CacheEntry = Tuple[bytes, Dict[str, Any]]
+
+# Pruning past max_bytes evicts down to this share of it, so the writes that
+# follow do not each trigger another directory scan.
+PRUNE_TARGET_RATIO = 0.9
+
+
+class DiskCache:
+    """
+    Directory-backed cache of (bytes, metadata) entries with an optional TTL.
+
+    Each entry is a `<digest>.bin` payload plus a `<digest>.json` index record
+    holding the original key, the creation time and caller metadata. Writes go
+    through a temp file and `os.replace`, so readers never see partial files.
+
+    With `max_bytes`, a write that takes the directory past the cap prunes it:
+    expired entries first, then the least recently read ones (a hit touches
+    the index record's mtime). The first write also prunes, to count what a
+    previous process left behind.
+
+    All methods block on file I/O; async callers run them in a worker thread
+    (see `TwoTierCache`). A lock keeps concurrent threads from interleaving.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        # Running estimate of the directory size; every prune recounts it.
+        self._bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, digest)
+        return base + ".bin", base + ".json"
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: str) -> Optional[CacheEntry]:
+        data_path, index_path = self._paths(key)
+        try:
+            with open(index_path, "r") as f:
+                record = json.load(f)
+            if record.get("key") != key:
+                return None
+            if self.ttl is not None and time.time() - record["created"] > self.ttl:
+                self._delete(key)
+                return None
+            with open(data_path, "rb") as f:
+                data = f.read()
+            os.utime(index_path)
+            return data, record["meta"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, key: str, data: bytes, meta: Dict[str, Any]) -> None:
+        data_path, index_path = self._paths(key)
+        record = json.dumps({"key": key, "created": time.time(), "meta": meta})
+        with self._lock:
+            if self._bytes is None:
+                self._prune()
+            self._write(data_path, data)
+            self._write(index_path, record.encode("utf-8"))
+            self._bytes = (self._bytes or 0) + len(data) + len(record)
+            if self.max_bytes is not None and self._bytes > self.max_bytes:
+                self._prune()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._delete(key)
+
+    def _delete(self, key: str) -> None:
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def prune(self) -> int:
+        """
+        Remove expired and unreadable entries, then the least recently read
+        ones while over max_bytes. Returns the number removed.
+        """
+        with self._lock:
+            return self._prune()
+
+    def _prune(self) -> int:
+        removed = 0
+        now = time.time()
+        # (last read, path without extension, bytes) of the entries kept so far
+        entries: List[Tuple[float, str, int]] = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            base = os.path.join(self.directory, name[: -len(".json")])
+            try:
+                index_stat = os.stat(base + ".json")
+                with open(base + ".json", "r") as f:
+                    created = json.load(f)["created"]
+                size = index_stat.st_size + os.path.getsize(base + ".bin")
+                expired = self.ttl is not None and now - created > self.ttl
+            except (OSError, ValueError, KeyError):
+                expired = True
+            if expired:
+                self._remove(base)
+                removed += 1
+            else:
+                entries.append((index_stat.st_mtime, base, size))
+
+        total = sum(size for _, _, size in entries)
+        if self.max_bytes is not None and total > self.max_bytes:
+            target = self.max_bytes * PRUNE_TARGET_RATIO
+            for _, base, size in sorted(entries):
+                if total <= target:
+                    break
+                self._remove(base)
+                total -= size
+                removed += 1
+        self._bytes = total
+        return removed
+
+    def _remove(self, base: str) -> None:
+        for path in (base + ".json", base + ".bin"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _write(self, path: str, data: bytes) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
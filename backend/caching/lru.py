@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Bounded in-memory LRU cache with an optional per-entry TTL (seconds)."""
+
+    def __init__(self, capacity: int = 128, ttl: Optional[float] = None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._get_entry(key) is not None
+
+    def get(self, key: Hashable) -> Optional[V]:
+        entry = self._get_entry(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, value: V) -> None:
+        if self.capacity <= 0:
+            return
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _get_entry(self, key: Hashable) -> Optional[Tuple[float, V]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl is not None and time.time() - entry[0] > self.ttl:
+            del self._entries[key]
+            return None
+        return entry
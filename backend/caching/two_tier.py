@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, Optional
+
+from .disk import CacheEntry, DiskCache
+from .lru import LRUCache
+
+
+class TwoTierCache:
+    """
+    Memory LRU in front of a `DiskCache`; disk hits are promoted to memory.
+    Disk reads and writes run in a worker thread, off the event loop.
+    """
+
+    def __init__(
+        self,
+        directory: str | None,
+        memory_capacity: int = 256,
+        ttl: Optional[float] = None,
+        max_disk_bytes: Optional[int] = None,
+    ):
+        self.memory: LRUCache[CacheEntry] = LRUCache(memory_capacity, ttl)
+        self.disk = DiskCache(directory, ttl, max_disk_bytes) if directory else None
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            entry = await asyncio.to_thread(self.disk.get, key)
+            if entry is not None:
+                self.memory.set(key, entry)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    async def set(self, key: str, data: bytes, meta: Dict[str, Any]) -> None:
+        self.memory.set(key, (data, meta))
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, data, meta)
+
+    async def delete(self, key: str) -> None:
+        self.memory.pop(key)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.delete, key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "memory_size": len(self.memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
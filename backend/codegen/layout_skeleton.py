@@ -0,0 +1,303 @@
+"""
+Deterministic layout skeleton from extracted elements.
+
+In element mode the code-generation model gets exact boxes for every
+element and still writes every positioning wrapper itself: output tokens
+and time spent on boilerplate the backend can produce. `build_layout_skeleton`
+turns the element hierarchy (image_analysis.spatial_index) into a complete
+HTML document the model only has to refine:
+
+  - each element is positioned relative to its container; a container whose
+    children form a single row or column becomes a flex container with the
+    measured offsets as margins, anything else is absolutely positioned;
+  - elements with an extracted asset and no children become the usual
+    `<img src="https://placehold.co/WxH" alt="element_id">` placeholders;
+  - text elements become `<p>` nodes with their text, color and font;
+    everything else is a `<div>` with its background color and radius;
+  - elements without a usable box cannot be positioned and are listed in
+    comments at the end of the page for the model to place.
+
+Only plain HTML stacks are supported: html_tailwind gets Tailwind classes
+(arbitrary values), html_css and bootstrap get inline styles.
+"""
+
+from __future__ import annotations
+
+import html
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+from image_analysis.spatial_index import ROOT, ALIGN_TOLERANCE, ElementIndex
+
+SKELETON_STACKS = frozenset({"html_css", "html_tailwind", "bootstrap"})
+
+_HEAD_TAGS = {
+    # Padding on fixed-size flex containers must not grow them.
+    "html_css": "<style>*,*::before,*::after{box-sizing:border-box}</style>",
+    "html_tailwind": '<script src="https://cdn.tailwindcss.com"></script>',
+    "bootstrap": (
+        '<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css" '
+        'rel="stylesheet">'
+    ),
+}
+
+# CSS declaration -> Tailwind class, for the declarations the skeleton emits.
+_TAILWIND_KEYWORDS = {
+    ("position", "absolute"): "absolute",
+    ("position", "relative"): "relative",
+    ("display", "flex"): "flex",
+    ("flex-direction", "column"): "flex-col",
+    ("align-items", "flex-start"): "items-start",
+    ("flex-shrink", "0"): "shrink-0",
+    ("margin", "0"): "m-0",
+    ("margin", "0 auto"): "mx-auto",
+    ("overflow", "hidden"): "overflow-hidden",
+}
+_TAILWIND_PREFIXES = {
+    "left": "left",
+    "top": "top",
+    "width": "w",
+    "height": "h",
+    "margin-left": "ml",
+    "margin-top": "mt",
+    "padding-left": "pl",
+    "padding-top": "pt",
+    "gap": "gap",
+    "background-color": "bg",
+    "color": "text",
+    "font-size": "text",
+    "border-radius": "rounded",
+    "opacity": "opacity",
+    "font-family": "font",
+}
+
+Style = List[Tuple[str, str]]
+
+
+def _attribute(value: str) -> str:
+    return html.escape(value, quote=False).replace('"', "&quot;")
+
+
+def _px(value: float) -> str:
+    return f"{int(round(value))}px"
+
+
+def _style_attribute(style: Style, stack: str) -> str:
+    if not style:
+        return ""
+    if stack != "html_tailwind":
+        declarations = ";".join(f"{prop}:{value}" for prop, value in style)
+        return f' style="{_attribute(declarations)}"'
+    classes = []
+    for prop, value in style:
+        keyword = _TAILWIND_KEYWORDS.get((prop, value))
+        if keyword is not None:
+            classes.append(keyword)
+        elif prop == "font-family":
+            classes.append(f"font-['{value.replace(' ', '_')}']")
+        else:
+            classes.append(f"{_TAILWIND_PREFIXES[prop]}-[{value.replace(' ', '_')}]")
+    return f' class="{_attribute(" ".join(classes))}"'
+
+
+class _SkeletonBuilder:
+    def __init__(
+        self,
+        elements_data: Dict[str, Any],
+        stack: str,
+        asset_ids: Collection[str],
+    ):
+        self.elements: List[Dict[str, Any]] = [
+            e for e in elements_data.get("elements", []) if isinstance(e, dict)
+        ]
+        self.dimensions = elements_data.get("image_dimensions") or {}
+        self.stack = stack
+        self.asset_ids = asset_ids
+        self.index = ElementIndex(self.elements)
+        self.lines: List[str] = []
+
+    def _layout(self, parent: int) -> Tuple[Style, Dict[int, Style]]:
+        """
+        Container declarations for `parent` and position declarations for
+        each of its children.
+        """
+        children = [i for i in self.index.children[parent] if self.index.boxes[i]]
+        parent_box = self.index.boxes[parent] if parent != ROOT else (0.0, 0.0, 0.0, 0.0)
+        assert parent_box is not None
+        px, py = parent_box[0], parent_box[1]
+
+        groups = self.index.groups(parent) if len(children) > 1 else []
+        for group in groups:
+            if len(group.members) != len(children):
+                continue
+            flow = self._flow_layout(group.axis, group.members, px, py)
+            if flow is not None:
+                return flow
+
+        positions: Dict[int, Style] = {}
+        for i in children:
+            x, y, _, _ = self.index.boxes[i]  # type: ignore[misc]
+            positions[i] = [
+                ("position", "absolute"),
+                ("left", _px(x - px)),
+                ("top", _px(y - py)),
+            ]
+        return [], positions
+
+    def _flow_layout(
+        self, axis: str, members: List[int], px: float, py: float
+    ) -> Optional[Tuple[Style, Dict[int, Style]]]:
+        """Flex row/column whose margins reproduce the measured positions."""
+        boxes = [self.index.boxes[i] for i in members]
+        main, cross = (0, 1) if axis == "row" else (1, 0)
+        origin = (px, py)
+        gaps = [
+            b[main] - (a[main] + a[main + 2])  # type: ignore[index]
+            for a, b in zip(boxes, boxes[1:])
+        ]
+        if min(gaps) < 0:
+            return None
+        offsets = [b[cross] - origin[cross] for b in boxes]  # type: ignore[index]
+        lead = boxes[0][main] - origin[main]  # type: ignore[index]
+        if lead < 0 or min(offsets) < 0:
+            return None
+
+        main_margin, cross_margin = ("margin-left", "margin-top")
+        main_padding, cross_padding = ("padding-left", "padding-top")
+        if axis == "column":
+            main_margin, cross_margin = cross_margin, main_margin
+            main_padding, cross_padding = cross_padding, main_padding
+
+        container: Style = [("display", "flex")]
+        if axis == "column":
+            container.append(("flex-direction", "column"))
+        container.append(("align-items", "flex-start"))
+        uniform_gap = max(gaps) - min(gaps) <= 1
+        if uniform_gap and round(gaps[0]) > 0:
+            container.append(("gap", _px(gaps[0])))
+        if round(lead) > 0:
+            container.append((main_padding, _px(lead)))
+        base = min(offsets)
+        if round(base) > 0:
+            container.append((cross_padding, _px(base)))
+
+        positions: Dict[int, Style] = {}
+        for k, i in enumerate(members):
+            style: Style = [("flex-shrink", "0")]
+            if k > 0 and not uniform_gap and round(gaps[k - 1]) > 0:
+                style.append((main_margin, _px(gaps[k - 1])))
+            if offsets[k] - base > ALIGN_TOLERANCE / 2:
+                style.append((cross_margin, _px(offsets[k] - base)))
+            positions[i] = style
+        return container, positions
+
+    def _emit(self, i: int, position: Style, depth: int) -> None:
+        element = self.elements[i]
+        x, y, w, h = self.index.boxes[i]  # type: ignore[misc]
+        properties = element.get("properties") or {}
+        element_id = str(element.get("id", ""))
+        element_type = str(element.get("type", "")).lower()
+        indent = "  " * depth
+        children = self.index.children[i]
+
+        if not children and element_id in self.asset_ids:
+            style = position + [("width", _px(w)), ("height", _px(h))]
+            self.lines.append(
+                f'{indent}<img src="https://placehold.co/{int(w)}x{int(h)}"'
+                f' alt="{_attribute(element_id)}"{_style_attribute(style, self.stack)}>'
+            )
+            return
+
+        if element_type == "text" and not children:
+            # margin:0 first so the flow margins in `position` win.
+            style = [("margin", "0")] + position + [("width", _px(w)), ("height", _px(h))]
+            if properties.get("text_color"):
+                style.append(("color", str(properties["text_color"])))
+            if properties.get("font_size"):
+                style.append(("font-size", _px(float(properties["font_size"]))))
+            if properties.get("font_family"):
+                style.append(("font-family", str(properties["font_family"])))
+            text = html.escape(str(element.get("text_content") or ""), quote=False)
+            self.lines.append(f"{indent}<p{_style_attribute(style, self.stack)}>{text}</p>")
+            return
+
+        style = position + [("width", _px(w)), ("height", _px(h))]
+        if properties.get("background_color"):
+            style.append(("background-color", str(properties["background_color"])))
+        if properties.get("border_radius"):
+            style.append(("border-radius", _px(float(properties["border_radius"]))))
+        container, positions = self._layout(i)
+        # Absolutely positioned children need a positioned container.
+        positioned = any(prop == "position" for prop, _ in position)
+        if children and not container and not positioned:
+            style.insert(0, ("position", "relative"))
+        style += container
+        self.lines.append(f"{indent}<div{_style_attribute(style, self.stack)}>")
+        self._emit_children(i, positions, depth + 1)
+        self.lines.append(f"{indent}</div>")
+
+    def _emit_children(self, parent: int, positions: Dict[int, Style], depth: int) -> None:
+        for child in self.index.children[parent]:
+            if child in positions:
+                self._emit(child, positions[child], depth)
+
+    def _emit_unplaced(self, depth: int) -> None:
+        # Elements without a box are roots with no position.
+        unplaced = [i for i in self.index.children[ROOT] if self.index.boxes[i] is None]
+        if not unplaced:
+            return
+        print(f"Layout skeleton: {len(unplaced)} elements without a box left to the model")
+        indent = "  " * depth
+        for i in unplaced:
+            element = self.elements[i]
+            description = f"{element.get('id', '')} ({element.get('type', '')})"
+            if element.get("text_content"):
+                description += f": {element['text_content']}"
+            # "--" would end the comment early.
+            description = description.replace("--", "- -")
+            self.lines.append(f"{indent}<!-- Unpositioned element {description} -->")
+
+    def build(self) -> str:
+        dimensions = self._page_size()
+        page: Style = [
+            ("position", "relative"),
+            ("width", _px(dimensions[0])),
+            ("height", _px(dimensions[1])),
+            ("margin", "0 auto"),
+            ("overflow", "hidden"),
+        ]
+        container, positions = self._layout(ROOT)
+        page += container
+        head = _HEAD_TAGS.get(self.stack, "")
+        self.lines = [
+            "<html>",
+            f"<head>{head}</head>",
+            f'<body{_style_attribute([("margin", "0")], self.stack)}>',
+            f"<div{_style_attribute(page, self.stack)}>",
+        ]
+        self._emit_children(ROOT, positions, 1)
+        self._emit_unplaced(1)
+        self.lines += ["</div>", "</body>", "</html>"]
+        return "\n".join(self.lines)
+
+    def _page_size(self) -> Tuple[float, float]:
+        boxes = [b for b in self.index.boxes if b is not None]
+        try:
+            return float(self.dimensions["width"]), float(self.dimensions["height"])
+        except (KeyError, TypeError, ValueError):
+            width = max((b[0] + b[2] for b in boxes), default=0.0)
+            height = max((b[1] + b[3] for b in boxes), default=0.0)
+            return width, height
+
+
+def build_layout_skeleton(
+    elements_data: Dict[str, Any],
+    stack: str,
+    asset_ids: Collection[str],
+) -> Optional[str]:
+    """
+    Skeleton HTML document for `stack`, or None if the stack is not a plain
+    HTML stack. `asset_ids` are the elements with an extracted asset.
+    """
+    if stack not in SKELETON_STACKS:
+        return None
+    return _SkeletonBuilder(elements_data, stack, asset_ids).build()
@@ -0,0 +1,64 @@
+import re
+from typing import List
+
+from codegen.utils import extract_html_content
+
+_HEAD_RE = re.compile(r"<head[^>]*>(.*?)</head>", re.DOTALL | re.IGNORECASE)
+_BODY_RE = re.compile(r"<body([^>]*)>(.*?)</body>", re.DOTALL | re.IGNORECASE)
+_HEAD_TAG_RE = re.compile(
+    r"<(script|style|title)\b[^>]*>.*?</\1>|<(?:link|meta|base)\b[^>]*>",
+    re.DOTALL | re.IGNORECASE,
+)
+
+
+def _head_tags(html: str) -> List[str]:
+    match = _HEAD_RE.search(html)
+    if not match:
+        return []
+    return [m.group(0).strip() for m in _HEAD_TAG_RE.finditer(match.group(1))]
+
+
+def stitch_sections(sections: List[str]) -> str:
+    """
+    Combine HTML documents generated for vertical page sections into one page.
+
+    The head is shared: tags from the first section come first, followed by
+    any tags that later sections introduced (e.g. an extra font or style
+    block). Section bodies are concatenated in order, each in its own wrapper.
+    The body attributes of the first section are kept.
+    """
+    documents = [extract_html_content(section) for section in sections]
+
+    head: List[str] = []
+    seen: set[str] = set()
+    has_title = False
+    for document in documents:
+        for tag in _head_tags(document):
+            is_title = tag.lower().startswith("<title")
+            # Only the first <title> is kept.
+            if tag in seen or (is_title and has_title):
+                continue
+            seen.add(tag)
+            has_title = has_title or is_title
+            head.append(tag)
+
+    body_attrs = ""
+    bodies: List[str] = []
+    for index, document in enumerate(documents):
+        match = _BODY_RE.search(document)
+        if match:
+            if index == 0:
+                body_attrs = match.group(1)
+            inner = match.group(2)
+        else:
+            inner = document
+        bodies.append(
+            f'<div data-section="{index + 1}">\n{inner.strip()}\n</div>'
+        )
+
+    head_html = "\n".join(f"  {tag}" for tag in head)
+    body_html = "\n".join(bodies)
+    return (
+        f"<html>\n<head>\n{head_html}\n</head>\n"
+        f"<body{body_attrs}>\n{body_html}\n</body>\n</html>"
+    )
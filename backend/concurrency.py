@@ -0,0 +1,147 @@
+"""
+Asyncio coordination primitives shared by provider call sites.
+
+`PriorityLimiter` caps how many calls run at once and, when saturated, lets
+the lowest priority value through first. `SingleFlight` collapses concurrent
+calls for the same key into one: later callers await the first caller's
+result instead of starting duplicate work; `credential_fingerprint` keeps
+callers with different API keys in separate flights. `gather_or_cancel` is
+`asyncio.gather` that cancels the remaining awaitables when one fails.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+class PriorityLimiter:
+    """Concurrency cap whose waiters are admitted in priority order (low first)."""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._active = 0
+        self._waiters: List[Tuple[float, int, "asyncio.Future[None]"]] = []
+        self._counter = itertools.count()
+        self.peak_active = 0
+        self.queued = 0
+
+    async def acquire(self, priority: float = 0) -> None:
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            self.peak_active = max(self.peak_active, self._active)
+            return
+
+        self.queued += 1
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._counter), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before cancellation; pass it on.
+                self.release()
+            else:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self) -> None:
+        # Hand the slot straight to the next waiter so nobody can jump the queue.
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: float = 0) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self._active,
+            "waiting": len(self._waiters),
+            "peak_active": self.peak_active,
+            "queued": self.queued,
+        }
+
+
+class SingleFlight(Generic[T]):
+    """Deduplicate concurrent async calls by key."""
+
+    def __init__(self) -> None:
+        self._in_flight: Dict[Hashable, "asyncio.Future[T]"] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.shared += 1
+        else:
+            future = asyncio.ensure_future(fn())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded so one caller giving up does not cancel the others' result.
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._in_flight),
+        }
+
+
+def credential_fingerprint(*api_keys: Optional[str]) -> str:
+    """
+    Short, non-reversible tag of the credentials a call is made with. Part of
+    single-flight keys so one user's auth or quota failure (or a paid call)
+    is never handed to another user.
+    """
+    joined = "\0".join(key or "" for key in api_keys)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:16]
+
+
+async def gather_or_cancel(awaitables: Iterable[Awaitable[T]]) -> List[T]:
+    """
+    Results of `awaitables` in order. If one fails (or the caller is
+    cancelled) the others are cancelled instead of running on unobserved.
+    """
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        # Let the cancelled tasks unwind (and release what they hold).
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -33,6 +33,41 @@ class Settings(BaseSettings):
 
     # Image generation (optional)
     REPLICATE_API_KEY: Optional[str] = None
+    REPLICATE_API_BASE_URL: str = "https://api.replicate.com/v1"
+    REPLICATE_DEADLINE_SECONDS: float = 30.0
+
+    # Generated image cache (memory LRU + on-disk index)
+    IMAGE_CACHE_ENABLED: bool = True
+    IMAGE_CACHE_DIR: str = ".cache/images"  # empty string keeps it memory-only
+    IMAGE_CACHE_MEMORY_ITEMS: int = 256
+    IMAGE_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    # Least recently used entries are evicted past this; 0 means no cap
+    IMAGE_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+    # Provider URLs (e.g. DALL-E) expire; after this, serve the stored bytes.
+    IMAGE_CACHE_URL_TTL_SECONDS: int = 3600
+
+    # Concurrent image generation calls per provider, shared across requests
+    IMAGE_CONCURRENCY_DALLE3: int = 5
+    IMAGE_CONCURRENCY_FLUX: int = 8
+    IMAGE_CONCURRENCY_GEMINI: int = 4
+    # Show prompt-derived gradient previews while images are generating
+    IMAGE_PREVIEWS_ENABLED: bool = True
+    # Downscale generated images to 2x their placeholder size
+    IMAGE_DOWNSCALE_TO_PLACEHOLDER: bool = False
+
+    # Content-addressed image store served at /assets. Set ASSET_BASE_URL to
+    # this backend's public URL (e.g. http://127.0.0.1:7001) to reference
+    # images by short URL; when unset, images stay inline as data URLs.
+    ASSET_BASE_URL: Optional[str] = None
+    ASSET_STORE_DIR: str = ".cache/assets"
+    # Blobs not stored or served for this long are removed; 0 keeps them
+    ASSET_STORE_TTL_SECONDS: int = 30 * 24 * 3600
+    # Least recently used blobs are evicted past this; 0 means no cap
+    ASSET_STORE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    # Pack small extracted element assets into sprite sheets (HTML stacks)
+    ASSET_SPRITES_ENABLED: bool = False
+    # Threads cutting element assets out of screenshots (OpenCV releases the GIL)
+    ASSET_EXTRACTION_WORKERS: int = 4
 
     # Debugging / feature flags
     MOCK: bool = False
@@ -51,5 +86,35 @@ class Settings(BaseSettings):
     # WebSocket hygiene
     WS_MAX_PAYLOAD_BYTES: int = 8_000_000
 
+    # Element analysis results (elements + assets) per screenshot and
+    # analysis model, memory LRU + on-disk index
+    ANALYSIS_CACHE_ENABLED: bool = True
+    ANALYSIS_CACHE_DIR: str = ".cache/analysis"  # empty string keeps it memory-only
+    ANALYSIS_CACHE_MEMORY_ITEMS: int = 64
+    ANALYSIS_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    # Least recently used entries are evicted past this; 0 means no cap
+    ANALYSIS_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+    # How extracted elements are written into element-based prompts:
+    # "json" (indented analysis JSON) or "compact" (one table row per element)
+    ELEMENT_PROMPT_ENCODING: str = "json"
+    # Give the model a generated layout skeleton to refine (plain HTML stacks)
+    LAYOUT_SKELETON_ENABLED: bool = False
+
+    # Tiled element analysis: screenshots larger than one tile are analyzed
+    # as overlapping tiles, concurrently (at most ANALYSIS_CONCURRENCY calls
+    # per provider across all requests)
+    ANALYSIS_TILING_ENABLED: bool = False
+    ANALYSIS_TILE_WIDTH: int = 1600
+    ANALYSIS_TILE_HEIGHT: int = 1400
+    ANALYSIS_TILE_OVERLAP: int = 200
+    ANALYSIS_CONCURRENCY: int = 4
+
+    # Near-duplicate screenshot detection (perceptual hash index). Off by
+    # default: pages that share a layout can hash as near-duplicates and
+    # would get each other's elements. Enable for re-upload heavy workloads.
+    NEAR_DUPLICATE_INDEX_SIZE: int = 0  # 0 disables the index
+    NEAR_DUPLICATE_MAX_DISTANCE: int = 4  # Hamming distance on 64-bit hashes
+
 
 settings = Settings()
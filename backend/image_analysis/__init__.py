@@ -2,7 +2,15 @@
 Image analysis module for extracting design elements from screenshots.
 """
 from .element_extraction import extract_elements
-from .asset_extraction import extract_elements_as_assets
+from .asset_extraction import AssetExtractor, extract_elements_as_assets
 from .svg_extraction import extract_elements_as_svg
+from .local_detector import LOCAL_ANALYSIS_MODEL, detect_elements
 
-__all__ = ["extract_elements", "extract_elements_as_assets", "extract_elements_as_svg"]
+__all__ = [
+    "extract_elements",
+    "extract_elements_as_assets",
+    "AssetExtractor",
+    "extract_elements_as_svg",
+    "LOCAL_ANALYSIS_MODEL",
+    "detect_elements",
+]
@@ -8,18 +8,49 @@ This is the "cheap scissors" implementation:
 
 This avoids relying on Gemini for "SVG extraction", and it guarantees that the
 foreground pixels come from the original screenshot (within the estimated mask).
+
+GrabCut is only used where it is needed. Most UI elements sit on a flat
+background: when the ROI border is uniform the alpha is a color key (border
+color connected to the edge becomes transparent), or fully opaque when the
+element's own fill reaches the box edge. GrabCut runs on a copy downscaled to
+`GRABCUT_MAX_SIDE`, and its mask is upscaled. Elements are processed in a
+bounded thread pool; OpenCV releases the GIL, so they run in parallel.
+
+Repeated elements (the same icon, avatar or logo in every row) are cut and
+encoded once: ROIs are bucketed by size and perceptual hash, confirmed with
+an exact pixel comparison, and every duplicate element ID maps to the same
+asset URL.
 """
 
 from __future__ import annotations
 
+import asyncio
 import base64
-from typing import Any, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 import cv2  # type: ignore
 import numpy as np  # type: ignore
+from PIL import Image
+
+from config.settings import settings
+from image_processing.perceptual_hash import hamming_distance, phash
+
+# Longest ROI side GrabCut runs at; larger ROIs are segmented downscaled.
+GRABCUT_MAX_SIDE = 128
+# Border pixels whose per-channel std stays below this count as uniform.
+UNIFORM_BORDER_STD = 4.0
+# Max per-channel difference from the border color still keyed out.
+COLOR_KEY_TOLERANCE = 12
+# Thickness of the ROI border and of the ring sampled around it.
+BORDER = 2
+# pHash distance under which two same-sized ROIs are compared pixel by pixel.
+DUPLICATE_MAX_DISTANCE = 4
+
+_executor: Optional[ThreadPoolExecutor] = None
 
 
-def _decode_image_data_url(image_data_url: str) -> Tuple[np.ndarray, str]:
+def decode_image_data_url(image_data_url: str) -> Tuple[np.ndarray, str]:
     if not image_data_url.startswith("data:"):
         raise ValueError("Image must be provided as data URL")
     header, b64 = image_data_url.split(",", 1)
@@ -50,7 +81,17 @@ def _clamp_bbox(
     return x, y, w, h
 
 
-def _grabcut_alpha(roi_bgr: np.ndarray) -> np.ndarray:
+def _grabcut_alpha(
+    roi_bgr: np.ndarray, max_side: Optional[int] = GRABCUT_MAX_SIDE
+) -> np.ndarray:
+    full_h, full_w = roi_bgr.shape[:2]
+    if max_side and max(full_h, full_w) > max_side:
+        scale = max_side / max(full_h, full_w)
+        roi_bgr = cv2.resize(
+            roi_bgr,
+            (max(1, round(full_w * scale)), max(1, round(full_h * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
     h, w = roi_bgr.shape[:2]
 
     # Initialize mask with "probably background".
@@ -88,9 +129,232 @@ def _grabcut_alpha(roi_bgr: np.ndarray) -> np.ndarray:
     alpha = cv2.morphologyEx(alpha, cv2.MORPH_OPEN, kernel)
     alpha = cv2.GaussianBlur(alpha, (k, k), 0)
 
+    if (h, w) != (full_h, full_w):
+        alpha = cv2.resize(alpha, (full_w, full_h), interpolation=cv2.INTER_LINEAR)
+    return alpha
+
+
+def _border_pixels(roi_bgr: np.ndarray) -> np.ndarray:
+    return np.concatenate(
+        [
+            roi_bgr[:BORDER].reshape(-1, 3),
+            roi_bgr[-BORDER:].reshape(-1, 3),
+            roi_bgr[:, :BORDER].reshape(-1, 3),
+            roi_bgr[:, -BORDER:].reshape(-1, 3),
+        ]
+    )
+
+
+def _ring_pixels(bgr: np.ndarray, x: int, y: int, w: int, h: int) -> Optional[np.ndarray]:
+    """Pixels just outside the box, or None when it touches the image edge."""
+    img_h, img_w = bgr.shape[:2]
+    if x < BORDER or y < BORDER or x + w + BORDER > img_w or y + h + BORDER > img_h:
+        return None
+    return np.concatenate(
+        [
+            bgr[y - BORDER : y, x : x + w].reshape(-1, 3),
+            bgr[y + h : y + h + BORDER, x : x + w].reshape(-1, 3),
+            bgr[y : y + h, x - BORDER : x].reshape(-1, 3),
+            bgr[y : y + h, x + w : x + w + BORDER].reshape(-1, 3),
+        ]
+    )
+
+
+def _color_key_alpha(roi_bgr: np.ndarray, color: np.ndarray) -> np.ndarray:
+    """Transparent where the border color is connected to the ROI edge."""
+    low = np.clip(color - COLOR_KEY_TOLERANCE, 0, 255).astype(np.uint8)
+    high = np.clip(color + COLOR_KEY_TOLERANCE, 0, 255).astype(np.uint8)
+    keyed = cv2.inRange(roi_bgr, low, high)
+    _, labels = cv2.connectedComponents(keyed, connectivity=4)
+    edge_labels = np.unique(
+        np.concatenate([labels[0], labels[-1], labels[:, 0], labels[:, -1]])
+    )
+    edge_labels = edge_labels[edge_labels != 0]
+    alpha = np.where(np.isin(labels, edge_labels), 0, 255).astype(np.uint8)
+    # Soften the key edge the way GrabCut masks are smoothed.
+    return cv2.GaussianBlur(alpha, (3, 3), 0)
+
+
+def _fast_path_alpha(
+    bgr: np.ndarray, x: int, y: int, w: int, h: int
+) -> Optional[np.ndarray]:
+    """Alpha for a box with a uniform border, or None when GrabCut is needed."""
+    roi_bgr = bgr[y : y + h, x : x + w]
+    border = _border_pixels(roi_bgr).astype(np.float32)
+    if float(border.std(axis=0).max()) > UNIFORM_BORDER_STD:
+        return None
+    color = border.mean(axis=0)
+    ring = _ring_pixels(bgr, x, y, w, h)
+    outside_differs = (
+        ring is not None
+        and np.abs(ring.astype(np.float32).mean(axis=0) - color).max()
+        > COLOR_KEY_TOLERANCE
+    )
+    if outside_differs:
+        # The element's own fill reaches the box edge (a tight box around a
+        # button or card): keep the whole rectangle.
+        return np.full((h, w), 255, dtype=np.uint8)
+    return _color_key_alpha(roi_bgr, color)
+
+
+def _adaptive_alpha(bgr: np.ndarray, x: int, y: int, w: int, h: int) -> np.ndarray:
+    alpha = _fast_path_alpha(bgr, x, y, w, h)
+    if alpha is None:
+        alpha = _grabcut_alpha(bgr[y : y + h, x : x + w])
     return alpha
 
 
+def _extract_asset(bgr: np.ndarray, box: Tuple[int, int, int, int]) -> Optional[str]:
+    x, y, w, h = box
+    try:
+        alpha = _adaptive_alpha(bgr, x, y, w, h)
+        roi_bgra = cv2.cvtColor(bgr[y : y + h, x : x + w], cv2.COLOR_BGR2BGRA)
+        roi_bgra[:, :, 3] = alpha
+        return _encode_png_data_url(roi_bgra)
+    except Exception:
+        # Best effort: skip this asset rather than failing the whole run.
+        return None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.ASSET_EXTRACTION_WORKERS),
+            thread_name_prefix="asset-extraction",
+        )
+    return _executor
+
+
+def _asset_box(
+    element: Dict[str, Any], img_w: int, img_h: int
+) -> Optional[Tuple[str, Tuple[int, int, int, int]]]:
+    """(element_id, clamped box) if the element is worth extracting."""
+    element_id = element.get("id")
+    coords = element.get("coordinates", {}) or {}
+    if not element_id:
+        return None
+
+    try:
+        x = int(coords.get("x", 0))
+        y = int(coords.get("y", 0))
+        w = int(coords.get("width", 0))
+        h = int(coords.get("height", 0))
+    except Exception:
+        return None
+
+    if w <= 0 or h <= 0:
+        return None
+
+    element_type = str(element.get("type", "")).lower()
+
+    # Prefer real DOM text; don't turn it into an image asset by default.
+    # Text found without content (local detector) is rendered as DOM text
+    # too, since the prompt only asks for <img> placeholders for non-text.
+    if element_type == "text":
+        return None
+
+    # Skip likely background layer (a very large element).
+    full_area = float(img_w * img_h) if img_w and img_h else 1.0
+    if element_type == "background" or (w * h) / full_area > 0.80:
+        return None
+
+    return element_id, _clamp_bbox(x, y, w, h, img_w, img_h)
+
+
+def _asset_boxes(
+    elements_data: Dict[str, Any], img_w: int, img_h: int
+) -> List[Tuple[str, Tuple[int, int, int, int]]]:
+    """(element_id, clamped box) for every element worth extracting."""
+    boxes = (_asset_box(e, img_w, img_h) for e in elements_data.get("elements", []))
+    return [box for box in boxes if box is not None]
+
+
+class AssetExtractor:
+    """
+    Extracts assets for elements as they are added, e.g. while the analysis
+    model is still streaming its element list.
+
+    The screenshot is decoded in the background as soon as the extractor is
+    created. Each added element is checked against the ones seen so far
+    (same size, pHash within DUPLICATE_MAX_DISTANCE, identical pixels);
+    new ones are cut out in the thread pool right away, duplicates reuse
+    the first element's asset.
+    """
+
+    def __init__(self, original_image_data_url: str):
+        loop = asyncio.get_running_loop()
+        self._executor = _get_executor()
+        self._decoded = loop.run_in_executor(
+            self._executor, decode_image_data_url, original_image_data_url
+        )
+        self._seen: Dict[Tuple[int, int], List[Tuple[str, int, Tuple[int, int]]]] = {}
+        self._jobs: Dict[str, asyncio.Future[Optional[str]]] = {}
+        # element_id -> the element_id whose asset it uses (itself if unique)
+        self._representatives: Dict[str, str] = {}
+
+    @property
+    def added(self) -> int:
+        return len(self._representatives)
+
+    def __contains__(self, element_id: object) -> bool:
+        return element_id in self._representatives
+
+    async def add(self, element: Dict[str, Any]) -> None:
+        bgr, _ = await self._decoded
+        img_h, img_w = bgr.shape[:2]
+        asset_box = _asset_box(element, img_w, img_h)
+        if asset_box is None or asset_box[0] in self._representatives:
+            return
+        element_id, (x, y, w, h) = asset_box
+
+        roi = bgr[y : y + h, x : x + w]
+        roi_hash = phash(Image.fromarray(cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)))
+        candidates = self._seen.setdefault((w, h), [])
+        for other_id, other_hash, (ox, oy) in candidates:
+            if hamming_distance(roi_hash, other_hash) > DUPLICATE_MAX_DISTANCE:
+                continue
+            if np.array_equal(roi, bgr[oy : oy + h, ox : ox + w]):
+                self._representatives[element_id] = other_id
+                return
+
+        candidates.append((element_id, roi_hash, (x, y)))
+        self._representatives[element_id] = element_id
+        self._jobs[element_id] = asyncio.get_running_loop().run_in_executor(
+            self._executor, _extract_asset, bgr, (x, y, w, h)
+        )
+
+    def discard(self, element_ids: List[str]) -> None:
+        """
+        Leave elements out of the result, e.g. once the full element list
+        shows they are redundant. Cuts no remaining element uses are
+        cancelled if they have not started yet.
+        """
+        for element_id in element_ids:
+            self._representatives.pop(element_id, None)
+        used = set(self._representatives.values())
+        for element_id in list(self._jobs):
+            if element_id not in used and self._jobs[element_id].cancel():
+                del self._jobs[element_id]
+                # Later duplicates of it must get a cut of their own.
+                for candidates in self._seen.values():
+                    candidates[:] = [c for c in candidates if c[0] != element_id]
+
+    async def result(self) -> Dict[str, str]:
+        """
+        Returns:
+            Dict mapping element_id -> data:image/png;base64,... (elements
+            with identical pixels share one URL string)
+        """
+        urls = dict(zip(self._jobs, await asyncio.gather(*self._jobs.values())))
+        assets: Dict[str, str] = {}
+        for element_id, representative in self._representatives.items():
+            url = urls[representative]
+            if url:
+                assets[element_id] = url
+        return assets
+
+
 async def extract_elements_as_assets(
     original_image_data_url: str,
     elements_data: Dict[str, Any],
@@ -99,58 +363,10 @@ async def extract_elements_as_assets(
     Extract each design element as a transparent PNG data URL.
 
     Returns:
-        Dict mapping element_id -> data:image/png;base64,...
+        Dict mapping element_id -> data:image/png;base64,... (elements with
+        identical pixels share one URL string)
     """
-    bgr, _ = _decode_image_data_url(original_image_data_url)
-    img_h, img_w = bgr.shape[:2]
-
-    elements = elements_data.get("elements", [])
-    assets: Dict[str, str] = {}
-
-    # Heuristic: treat a very large element as background and skip.
-    full_area = float(img_w * img_h) if img_w and img_h else 1.0
-
-    for element in elements:
-        element_id = element.get("id")
-        coords = element.get("coordinates", {}) or {}
-        if not element_id:
-            continue
-
-        try:
-            x = int(coords.get("x", 0))
-            y = int(coords.get("y", 0))
-            w = int(coords.get("width", 0))
-            h = int(coords.get("height", 0))
-        except Exception:
-            continue
-
-        if w <= 0 or h <= 0:
-            continue
-
-        element_type = str(element.get("type", "")).lower()
-        text_content = element.get("text_content")
-
-        # Prefer real DOM text; don't turn it into an image asset by default.
-        if element_type == "text" and text_content:
-            continue
-
-        # Skip likely background layer.
-        if element_type == "background" or (w * h) / full_area > 0.80:
-            continue
-
-        x, y, w, h = _clamp_bbox(x, y, w, h, img_w, img_h)
-        roi_bgr = bgr[y : y + h, x : x + w]
-        if roi_bgr.size == 0:
-            continue
-
-        try:
-            alpha = _grabcut_alpha(roi_bgr)
-            roi_bgra = cv2.cvtColor(roi_bgr, cv2.COLOR_BGR2BGRA)
-            roi_bgra[:, :, 3] = alpha
-            assets[element_id] = _encode_png_data_url(roi_bgra)
-        except Exception:
-            # Best effort: skip this asset rather than failing the whole run.
-            continue
-
-    return assets
-
+    extractor = AssetExtractor(original_image_data_url)
+    for element in elements_data.get("elements", []):
+        await extractor.add(element)
+    return await extractor.result()
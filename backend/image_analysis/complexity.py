@@ -0,0 +1,130 @@
+"""
+Fast, vectorized complexity estimate for a screenshot.
+
+Runs on the decoded image before model selection and gives a cheap signal of
+how much code the page will need: edge density, color cardinality, the share
+of text-like regions, an estimated element count and the aspect ratio. The
+combined score picks a model tier and token budget (see `ModelRegistry`).
+Results are cached by image content hash.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from dataclasses import dataclass
+
+import cv2  # type: ignore
+import numpy as np  # type: ignore
+
+from caching import LRUCache
+from image_analysis.asset_extraction import decode_image_data_url
+from models.registry import ComplexityTier
+
+# Analysis runs on a downscaled copy; the signals are all ratios or counts
+# that are stable under resizing.
+ANALYSIS_WIDTH = 800
+
+SIMPLE_THRESHOLD = 0.35
+COMPLEX_THRESHOLD = 0.65
+
+
+@dataclass(frozen=True)
+class ImageComplexity:
+    edge_density: float
+    color_cardinality: int
+    text_region_ratio: float
+    element_count: int
+    aspect_ratio: float
+    score: float
+
+    @property
+    def tier(self) -> ComplexityTier:
+        if self.score < SIMPLE_THRESHOLD:
+            return "simple"
+        if self.score > COMPLEX_THRESHOLD:
+            return "complex"
+        return "standard"
+
+
+_cache: LRUCache[ImageComplexity] = LRUCache(capacity=256)
+
+
+def _score(
+    edge_density: float,
+    color_cardinality: int,
+    text_region_ratio: float,
+    element_count: int,
+    aspect_ratio: float,
+) -> float:
+    # Each signal is normalized to [0, 1] against a "busy page" reference.
+    signals = (
+        (0.25, min(edge_density / 0.12, 1.0)),
+        (0.15, min(math.log2(max(color_cardinality, 1)) / 12, 1.0)),
+        (0.2, min(text_region_ratio / 0.3, 1.0)),
+        (0.25, min(element_count / 120, 1.0)),
+        (0.15, min(max(aspect_ratio - 1.0, 0.0) / 4.0, 1.0)),
+    )
+    return round(sum(weight * value for weight, value in signals), 3)
+
+
+def compute_complexity(bgr: np.ndarray) -> ImageComplexity:
+    height, width = bgr.shape[:2]
+    aspect_ratio = height / width if width else 1.0
+
+    if width > ANALYSIS_WIDTH:
+        scale = ANALYSIS_WIDTH / width
+        bgr = cv2.resize(
+            bgr, (ANALYSIS_WIDTH, max(1, int(height * scale))), interpolation=cv2.INTER_AREA
+        )
+
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    edges = cv2.Canny(gray, 50, 150)
+    edge_density = float(np.count_nonzero(edges)) / edges.size
+
+    # Count distinct colors after quantizing to 4 bits per channel.
+    quantized = (bgr >> 4).astype(np.uint32)
+    packed = (quantized[:, :, 0] << 8) | (quantized[:, :, 1] << 4) | quantized[:, :, 2]
+    color_cardinality = int(np.unique(packed).size)
+
+    # Text lines: a horizontal close merges glyph edges into wide, short blobs.
+    text_mask = cv2.morphologyEx(
+        edges, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1))
+    )
+    _, _, text_stats, _ = cv2.connectedComponentsWithStats(text_mask, connectivity=8)
+    w, h = text_stats[1:, cv2.CC_STAT_WIDTH], text_stats[1:, cv2.CC_STAT_HEIGHT]
+    is_text = (h >= 4) & (h <= 40) & (w >= 2 * h)
+    text_area = float((w[is_text] * h[is_text]).sum())
+    text_region_ratio = min(text_area / gray.size, 1.0)
+
+    # Elements: dilated edges grouped into blocks of a meaningful size.
+    blocks = cv2.dilate(edges, cv2.getStructuringElement(cv2.MORPH_RECT, (7, 7)))
+    _, _, block_stats, _ = cv2.connectedComponentsWithStats(blocks, connectivity=8)
+    element_count = int((block_stats[1:, cv2.CC_STAT_AREA] >= 64).sum())
+
+    return ImageComplexity(
+        edge_density=round(edge_density, 4),
+        color_cardinality=color_cardinality,
+        text_region_ratio=round(text_region_ratio, 4),
+        element_count=element_count,
+        aspect_ratio=round(aspect_ratio, 3),
+        score=_score(
+            edge_density,
+            color_cardinality,
+            text_region_ratio,
+            element_count,
+            aspect_ratio,
+        ),
+    )
+
+
+def analyze_complexity(image_data_url: str) -> ImageComplexity:
+    key = hashlib.sha256(image_data_url.encode("utf-8")).hexdigest()
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    bgr, _ = decode_image_data_url(image_data_url)
+    complexity = compute_complexity(bgr)
+    _cache.set(key, complexity)
+    return complexity
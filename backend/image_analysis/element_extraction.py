@@ -3,8 +3,9 @@ Element extraction from images using AI models.
 Analyzes image and extracts design elements with coordinates.
 """
 import json
-from typing import Dict, List, Any, Optional
+from typing import Awaitable, Callable, Dict, List, Any, Optional
 from openai.types.chat import ChatCompletionMessageParam
+from image_analysis.element_stream import ElementStreamParser
 from llm import Llm, OPENAI_MODELS, ANTHROPIC_MODELS, GEMINI_MODELS
 from models import stream_openai_response, stream_claude_response, stream_gemini_response
 from config import OPENAI_API_KEY, ANTHROPIC_API_KEY, GEMINI_API_KEY
@@ -52,10 +53,14 @@ async def extract_elements(
     openai_api_key: Optional[str] = None,
     anthropic_api_key: Optional[str] = None,
     gemini_api_key: Optional[str] = None,
+    on_element: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
 ) -> Dict[str, Any]:
     """
     Extract design elements from image using specified model.
-    
+
+    If `on_element` is given, it is awaited with each element as soon as the
+    model has streamed it, before the full response is in.
+
     Returns:
         Dictionary with image dimensions and list of elements with coordinates
     """
@@ -82,10 +87,14 @@ async def extract_elements(
     
     # Call appropriate model
     full_response = ""
-    
+    parser = ElementStreamParser()
+
     async def collect_chunk(chunk: str):
         nonlocal full_response
         full_response += chunk
+        if on_element is not None:
+            for element in parser.feed(chunk):
+                await on_element(element)
     
     if analysis_model in OPENAI_MODELS and openai_api_key:
         completion = await stream_openai_response(
@@ -0,0 +1,106 @@
+"""
+Incremental parsing of the element extraction response.
+
+The analysis model streams one JSON document whose `elements` array can take
+tens of seconds to finish. `ElementStreamParser` scans the stream as it
+arrives and returns each element object as soon as its closing brace is in,
+so asset extraction can start on the first elements while the model is
+still writing the rest. It only tracks strings, escapes and bracket depth;
+the full document is still parsed with `json.loads` at the end.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional
+
+ELEMENTS_KEY = "elements"
+
+
+class ElementStreamParser:
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        # Last string closed at the top level of the document (i.e. a key).
+        self._last_key: Optional[str] = None
+        # Depth inside the `elements` array, and where the current element began.
+        self._elements_depth: Optional[int] = None
+        self._element_start: Optional[int] = None
+        self.parsed = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Scan newly streamed text; return the elements completed by it."""
+        self._buffer += chunk
+        completed: List[Dict[str, Any]] = []
+        buffer = self._buffer
+        for pos in range(self._pos, len(buffer)):
+            char = buffer[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = buffer[self._string_start : pos]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos + 1
+            elif char in "{[":
+                if (
+                    char == "["
+                    and self._depth == 1
+                    and self._last_key == ELEMENTS_KEY
+                    and self._elements_depth is None
+                ):
+                    self._elements_depth = self._depth + 1
+                elif char == "{" and self._depth == self._elements_depth:
+                    self._element_start = pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == self._elements_depth and self._element_start is not None:
+                    element = self._parse(buffer[self._element_start : pos + 1])
+                    if element is not None:
+                        completed.append(element)
+                    self._element_start = None
+                elif char == "]" and self._elements_depth is not None and (
+                    self._depth == self._elements_depth - 1
+                ):
+                    # The array closed; ignore any later "elements" keys.
+                    self._elements_depth = -1
+        self._pos = len(buffer)
+        self._trim()
+        return completed
+
+    def _parse(self, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            element = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(element, dict):
+            return None
+        self.parsed += 1
+        return element
+
+    def _trim(self) -> None:
+        # Only the current element's text (or a pending string) is needed
+        # again; drop everything before it so long streams stay cheap.
+        keep = self._pos
+        if self._element_start is not None:
+            keep = self._element_start
+        elif self._in_string:
+            keep = self._string_start
+        if keep > 0:
+            self._buffer = self._buffer[keep:]
+            self._pos -= keep
+            self._string_start -= keep
+            if self._element_start is not None:
+                self._element_start -= keep
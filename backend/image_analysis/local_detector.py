@@ -0,0 +1,242 @@
+"""
+Deterministic element detection without an LLM.
+
+`extract_elements` spends a full model round trip just to get bounding
+boxes. This detector finds them locally with OpenCV instead, in tens of
+milliseconds:
+
+  - The region background is the dominant color along its border.
+  - Pixels that differ from it, plus Canny edges, form a foreground mask that
+    a morphological close groups into blocks (words into lines, lines into
+    paragraphs); connected components give their boxes.
+  - Each block is classified by heuristics on its color histogram, fill and
+    edge density (text, image, icon, button, card, header, footer).
+  - Blocks with their own fill (cards, sections) are searched again with that
+    fill as background, so nested content is found too.
+
+It emits the same `elements_data` schema as the LLM extractor. There is no
+OCR, so text elements carry no `text_content`; the code generation model
+reads the text from the screenshot. Select it with the `local-cv` analysis
+model.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+import cv2  # type: ignore
+import numpy as np  # type: ignore
+
+from image_analysis.asset_extraction import decode_image_data_url
+
+LOCAL_ANALYSIS_MODEL = "local-cv"
+
+# Detection runs on a downscaled copy; boxes are scaled back afterwards.
+ANALYSIS_WIDTH = 1280
+
+# Max per-channel difference still counted as the region background.
+COLOR_TOLERANCE = 10
+# Gaps (analysis pixels) bridged when grouping glyphs and lines into blocks.
+GROUP_GAP = (15, 7)
+# Blocks smaller than this (analysis pixels) are noise.
+MIN_SIDE = 6
+MIN_AREA = 64
+MAX_DEPTH = 3
+# Color statistics use an evenly strided sample of at most this many pixels.
+COLOR_SAMPLE = 16384
+
+RGB = Tuple[int, int, int]
+
+
+def _hex(color: RGB) -> str:
+    return "#{:02x}{:02x}{:02x}".format(*color)
+
+
+def _dominant_colors(pixels: np.ndarray, limit: int = 3) -> List[Tuple[RGB, float]]:
+    """Most common colors of a (N, 3) BGR array, as (RGB, share) pairs.
+
+    Colors are counted in 4-bit-per-channel bins; each reported color is the
+    mean of the real pixels in its bin so hex values stay exact for flat fills.
+    """
+    if pixels.size == 0:
+        return []
+    if len(pixels) > COLOR_SAMPLE:
+        pixels = pixels[:: len(pixels) // COLOR_SAMPLE]
+    quantized = (pixels >> 4).astype(np.int32)
+    packed = (quantized[:, 0] << 8) | (quantized[:, 1] << 4) | quantized[:, 2]
+    counts = np.bincount(packed, minlength=4096)
+    top = np.argsort(counts)[::-1][:limit]
+    result: List[Tuple[RGB, float]] = []
+    for bin_index in top:
+        if counts[bin_index] == 0:
+            break
+        b, g, r = pixels[packed == bin_index].mean(axis=0)
+        result.append(
+            ((int(round(r)), int(round(g)), int(round(b))), float(counts[bin_index] / len(packed)))
+        )
+    return result
+
+
+def _border_color(roi: np.ndarray) -> RGB:
+    border = np.concatenate([roi[0], roi[-1], roi[:, 0], roi[:, -1]])
+    colors = _dominant_colors(border, limit=1)
+    return colors[0][0] if colors else (255, 255, 255)
+
+
+def _differs(color: RGB, other: RGB) -> bool:
+    return max(abs(a - b) for a, b in zip(color, other)) > COLOR_TOLERANCE
+
+
+class _Detector:
+    def __init__(self, bgr: np.ndarray):
+        self.img_h, self.img_w = bgr.shape[:2]
+        self.scale = min(1.0, ANALYSIS_WIDTH / self.img_w) if self.img_w else 1.0
+        if self.scale < 1.0:
+            # Bilinear is several times faster than INTER_AREA here and the
+            # reduction is mild, so aliasing does not move any boxes.
+            bgr = cv2.resize(
+                bgr,
+                (ANALYSIS_WIDTH, max(1, int(self.img_h * self.scale))),
+                interpolation=cv2.INTER_LINEAR,
+            )
+        self.bgr = bgr
+        self.edges = cv2.Canny(cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY), 50, 150)
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_RECT, GROUP_GAP)
+        self.found: List[Dict[str, Any]] = []
+
+    def run(self) -> Dict[str, Any]:
+        h, w = self.bgr.shape[:2]
+        background = _border_color(self.bgr)
+        self.found.append(
+            {
+                "type": "background",
+                "box": (0, 0, w, h),
+                "depth": 0,
+                "colors": [(background, 1.0)],
+            }
+        )
+        self._detect(0, 0, w, h, background, depth=1)
+        return self._elements_data()
+
+    def _detect(self, x0: int, y0: int, w: int, h: int, background: RGB, depth: int) -> None:
+        roi = self.bgr[y0 : y0 + h, x0 : x0 + w]
+        bg = np.array(background[::-1], dtype=np.int16)
+        is_background = cv2.inRange(
+            roi,
+            np.clip(bg - COLOR_TOLERANCE, 0, 255).astype(np.uint8),
+            np.clip(bg + COLOR_TOLERANCE, 0, 255).astype(np.uint8),
+        )
+        mask = cv2.bitwise_or(
+            cv2.bitwise_not(is_background), self.edges[y0 : y0 + h, x0 : x0 + w]
+        )
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self.kernel)
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        for label in range(1, count):
+            bx, by, bw, bh, area = (int(v) for v in stats[label])
+            if bw < MIN_SIDE or bh < MIN_SIDE or area < MIN_AREA:
+                continue
+            # A component spanning the whole region is the region itself.
+            if bw >= w - 2 and bh >= h - 2 and depth > 1:
+                continue
+            box = (x0 + bx, y0 + by, bw, bh)
+            element_type, colors = self._classify(box, background, (w, h))
+            self.found.append(
+                {"type": element_type, "box": box, "depth": depth, "colors": colors}
+            )
+
+            if element_type in ("card", "header", "footer") and depth < MAX_DEPTH:
+                # Search inside, minus a small inset so the block's own
+                # border does not register as content.
+                inset = 2
+                if bw > 4 * inset and bh > 4 * inset:
+                    self._detect(
+                        box[0] + inset,
+                        box[1] + inset,
+                        bw - 2 * inset,
+                        bh - 2 * inset,
+                        colors[0][0],
+                        depth + 1,
+                    )
+
+    def _classify(
+        self, box: Tuple[int, int, int, int], background: RGB, region: Tuple[int, int]
+    ) -> Tuple[str, List[Tuple[RGB, float]]]:
+        x, y, w, h = box
+        pixels = self.bgr[y : y + h, x : x + w].reshape(-1, 3)
+        colors = _dominant_colors(pixels, limit=8)
+        fill, fill_share = colors[0]
+        top_two_share = sum(share for _, share in colors[:2])
+        edge_density = float(np.count_nonzero(self.edges[y : y + h, x : x + w])) / (w * h)
+        has_fill = _differs(fill, background) and fill_share >= 0.4
+
+        # Real-pixel sizes drive the thresholds.
+        real_w, real_h = w / self.scale, h / self.scale
+        is_small = real_w <= 48 and real_h <= 48
+
+        # Text and flat UI are mostly a fill plus one ink color (and its
+        # antialiasing ramp); photos spread over many colors.
+        if top_two_share < 0.5 and not is_small:
+            return "image", colors[:3]
+        if is_small and max(real_w, real_h) <= 1.6 * min(real_w, real_h):
+            return "icon", colors[:3]
+        if has_fill:
+            if 20 <= real_h <= 90 and real_w <= 480 and edge_density > 0.02:
+                return "button", colors[:3]
+            if w >= 0.9 * region[0] and y <= 0.05 * self.bgr.shape[0]:
+                return "header", colors[:3]
+            if w >= 0.9 * region[0] and y + h >= 0.95 * self.bgr.shape[0]:
+                return "footer", colors[:3]
+            return "card", colors[:3]
+        if edge_density >= 0.03:
+            return "text", colors[:3]
+        return "image", colors[:3]
+
+    def _elements_data(self) -> Dict[str, Any]:
+        elements: List[Dict[str, Any]] = []
+        counters: Dict[str, int] = {}
+        # Reading order, with parents before the children they contain.
+        ordered = sorted(
+            self.found, key=lambda f: (f["depth"] > 0, f["box"][1], f["box"][0], f["depth"])
+        )
+        for found in ordered:
+            element_type = found["type"]
+            counters[element_type] = counters.get(element_type, 0) + 1
+            x, y, w, h = found["box"]
+            colors = found["colors"]
+            properties: Dict[str, Any] = {
+                "background_color": _hex(colors[0][0]),
+                "dominant_colors": [_hex(color) for color, _ in colors],
+                "opacity": 1,
+            }
+            if element_type in ("text", "button") and len(colors) > 1:
+                properties["text_color"] = _hex(colors[1][0])
+            elements.append(
+                {
+                    "id": f"{element_type}_{counters[element_type]}",
+                    "type": element_type,
+                    "coordinates": {
+                        "x": int(round(x / self.scale)),
+                        "y": int(round(y / self.scale)),
+                        "width": int(round(w / self.scale)),
+                        "height": int(round(h / self.scale)),
+                    },
+                    "properties": properties,
+                    "z_index": found["depth"],
+                }
+            )
+        return {
+            "image_dimensions": {"width": self.img_w, "height": self.img_h},
+            "elements": elements,
+        }
+
+
+def detect_elements_bgr(bgr: np.ndarray) -> Dict[str, Any]:
+    """Detect design elements in a decoded BGR screenshot."""
+    return _Detector(bgr).run()
+
+
+def detect_elements(image_data_url: str) -> Dict[str, Any]:
+    """Detect design elements in a data URL screenshot (`elements_data` schema)."""
+    bgr, _ = decode_image_data_url(image_data_url)
+    return detect_elements_bgr(bgr)
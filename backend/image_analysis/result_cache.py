@@ -0,0 +1,183 @@
+"""
+Persistent cache of element analysis results.
+
+Trying several code-generation models or stacks on one screenshot reruns the
+same analysis each time: an LLM element extraction call plus asset cutting.
+Results (`elements_data` and the raw element asset data URLs) are cached by
+(screenshot content hash, analysis model, extraction settings version) in a
+memory LRU backed by a disk index, and concurrent identical requests share a
+single computation. Entries and flights are also keyed by a fingerprint of
+the caller's API keys: a result paid for with one user's keys is not handed
+to a caller with other (or no) keys.
+
+The shared computation has no per-caller side effects. It reports progress
+to every caller waiting on it through their own `on_progress` callback; a
+callback that fails (e.g. a closed websocket) is dropped without affecting
+the computation or the other callers.
+
+Assets are cached before they are shortened by the blob store, so cached
+entries stay valid when ASSET_BASE_URL changes. Duplicate assets are stored
+once and keep sharing one URL string when loaded. Entries can be megabytes
+of data URLs, so (de)serialization and disk I/O run in worker threads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from caching import TwoTierCache
+from concurrency import SingleFlight, credential_fingerprint
+from config.settings import settings
+from metrics import register_metrics
+
+# Bump whenever element extraction or asset cutting changes its output, so
+# stale entries are not served.
+EXTRACTION_SETTINGS_VERSION = 3
+
+AnalysisResult = Tuple[Dict[str, Any], Dict[str, str]]
+Progress = Callable[[str], Awaitable[None]]
+
+
+def analysis_cache_key(
+    image_data_url: str, analysis_model: str, api_keys: Sequence[Optional[str]] = ()
+) -> str:
+    image_hash = hashlib.sha256(image_data_url.encode("utf-8")).hexdigest()
+    credentials = credential_fingerprint(*api_keys)
+    return f"{image_hash}|{analysis_model}|{credentials}|v{EXTRACTION_SETTINGS_VERSION}"
+
+
+def _serialize(result: AnalysisResult) -> bytes:
+    elements_data, element_assets = result
+    urls: Dict[str, int] = {}
+    assets = {
+        element_id: urls.setdefault(url, len(urls))
+        for element_id, url in element_assets.items()
+    }
+    return json.dumps(
+        {"elements_data": elements_data, "urls": list(urls), "assets": assets}
+    ).encode("utf-8")
+
+
+def _deserialize(data: bytes) -> AnalysisResult:
+    payload = json.loads(data)
+    urls = payload["urls"]
+    assets = {element_id: urls[index] for element_id, index in payload["assets"].items()}
+    return payload["elements_data"], assets
+
+
+class ElementAnalysisCache:
+    def __init__(
+        self,
+        directory: str | None,
+        ttl: float | None,
+        memory_capacity: int = 64,
+        max_disk_bytes: int | None = None,
+    ):
+        self._cache = TwoTierCache(directory, memory_capacity, ttl, max_disk_bytes)
+        self._flights: SingleFlight[AnalysisResult] = SingleFlight()
+        # Progress callbacks of the callers waiting on each flight.
+        self._listeners: Dict[str, List[Progress]] = {}
+
+    async def get(
+        self,
+        image_data_url: str,
+        analysis_model: str,
+        api_keys: Sequence[Optional[str]] = (),
+    ) -> Optional[AnalysisResult]:
+        entry = await self._cache.get(analysis_cache_key(image_data_url, analysis_model, api_keys))
+        if entry is None:
+            return None
+        try:
+            # Entries hold every asset data URL; parsing them can take a while.
+            return await asyncio.to_thread(_deserialize, entry[0])
+        except (ValueError, KeyError, IndexError):
+            return None
+
+    async def put(
+        self,
+        image_data_url: str,
+        analysis_model: str,
+        result: AnalysisResult,
+        api_keys: Sequence[Optional[str]] = (),
+    ) -> None:
+        key = analysis_cache_key(image_data_url, analysis_model, api_keys)
+        data = await asyncio.to_thread(_serialize, result)
+        await self._cache.set(key, data, {"analysis_model": analysis_model})
+
+    async def get_or_compute(
+        self,
+        image_data_url: str,
+        analysis_model: str,
+        compute: Callable[[Progress], Awaitable[AnalysisResult]],
+        api_keys: Sequence[Optional[str]] = (),
+        on_progress: Optional[Progress] = None,
+    ) -> Tuple[AnalysisResult, bool]:
+        """
+        Cached result, or the result of `compute` (shared with concurrent
+        identical calls). Returns (result, whether it came from the cache).
+        Callers get their own copy of `elements_data`.
+
+        `compute` is called with a progress function that forwards messages
+        to the `on_progress` of every caller currently waiting on the result.
+        """
+        cached = await self.get(image_data_url, analysis_model, api_keys)
+        if cached is not None:
+            return cached, True
+
+        key = analysis_cache_key(image_data_url, analysis_model, api_keys)
+
+        async def broadcast(message: str) -> None:
+            for listener in list(self._listeners.get(key, ())):
+                try:
+                    await listener(message)
+                except Exception as e:
+                    print(f"Dropping analysis progress listener: {e}")
+                    self._remove_listener(key, listener)
+
+        async def compute_and_store() -> AnalysisResult:
+            result = await compute(broadcast)
+            await self.put(image_data_url, analysis_model, result, api_keys)
+            return result
+
+        if on_progress is not None:
+            self._listeners.setdefault(key, []).append(on_progress)
+        try:
+            elements_data, element_assets = await self._flights.do(key, compute_and_store)
+        finally:
+            if on_progress is not None:
+                self._remove_listener(key, on_progress)
+        return (copy.deepcopy(elements_data), dict(element_assets)), False
+
+    def _remove_listener(self, key: str, listener: Progress) -> None:
+        listeners = self._listeners.get(key)
+        if listeners is None or listener not in listeners:
+            return
+        listeners.remove(listener)
+        if not listeners:
+            del self._listeners[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._cache.stats(), "single_flight": self._flights.stats()}
+
+
+_analysis_cache: ElementAnalysisCache | None = None
+
+
+def get_analysis_cache() -> ElementAnalysisCache | None:
+    """Process-wide cache, or None when disabled in settings."""
+    global _analysis_cache
+    if not settings.ANALYSIS_CACHE_ENABLED:
+        return None
+    if _analysis_cache is None:
+        _analysis_cache = ElementAnalysisCache(
+            directory=settings.ANALYSIS_CACHE_DIR or None,
+            ttl=settings.ANALYSIS_CACHE_TTL_SECONDS,
+            memory_capacity=settings.ANALYSIS_CACHE_MEMORY_ITEMS,
+            max_disk_bytes=settings.ANALYSIS_CACHE_MAX_BYTES or None,
+        )
+        register_metrics("image_analysis.cache", _analysis_cache.stats)
+    return _analysis_cache
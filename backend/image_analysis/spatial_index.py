@@ -0,0 +1,329 @@
+"""
+Spatial index and containment hierarchy over extracted elements.
+
+`elements_data` is a flat list of boxes. `ElementIndex` is built once per
+analysis and recovers the structure the prompt and asset extraction need:
+
+  - overlapping pairs, from a sort-and-sweep over y (boxes sorted by top
+    edge, a heap of active boxes ordered by bottom edge; once more than
+    LINEAR_SCAN_LIMIT boxes are active at a time, a segment tree over x
+    finds the ones a new box meets instead of checking each of them),
+    O((n + k) log n) comparisons for k overlapping pairs;
+  - the containment tree, each element parented to the smallest element
+    that contains it (containment implies overlap, so only the k pairs are
+    considered);
+  - rows and columns of aligned siblings, used for reading order.
+
+`prune_redundant_elements` uses it to drop elements that would only cost
+tokens and asset cuts: image-like elements inside another image-like
+element (its asset already carries their pixels) and near-identical
+duplicates of an earlier element of the same type. Text, buttons and other
+elements on top of an image are kept, since the page has to render them.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+Box = Tuple[float, float, float, float]
+
+# A child may overhang its container by this much (analysis boxes are loose).
+CONTAINMENT_TOLERANCE = 4
+# Edges within this distance count as aligned when grouping columns.
+ALIGN_TOLERANCE = 4
+# Same-type elements overlapping at least this much are duplicates.
+DUPLICATE_IOU = 0.9
+# The sweep checks up to this many active boxes directly before indexing x.
+LINEAR_SCAN_LIMIT = 128
+# Types whose asset is a picture of everything inside it.
+PICTORIAL_TYPES = frozenset({"image", "icon", "logo", "photo", "illustration", "avatar"})
+
+ROOT = -1
+
+
+@dataclass
+class ElementGroup:
+    axis: str  # "row" (left to right) or "column" (top to bottom)
+    members: List[int]
+
+
+def _element_box(element: Dict[str, Any]) -> Optional[Box]:
+    coordinates = element.get("coordinates") or {}
+    try:
+        x, y = float(coordinates["x"]), float(coordinates["y"])
+        w, h = float(coordinates["width"]), float(coordinates["height"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if w <= 0 or h <= 0:
+        return None
+    return x, y, w, h
+
+
+def _contains(outer: Box, inner: Box) -> bool:
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    t = CONTAINMENT_TOLERANCE
+    return (
+        ix >= ox - t
+        and iy >= oy - t
+        and ix + iw <= ox + ow + t
+        and iy + ih <= oy + oh + t
+    )
+
+
+def _intersection(a: Box, b: Box) -> float:
+    w = min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0])
+    h = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+    return w * h if w > 0 and h > 0 else 0.0
+
+
+class _ActiveIntervals:
+    """
+    Half-open x-intervals [left, right) of the boxes active in the sweep.
+    A segment tree over the sorted distinct edge coordinates (leaf t is the
+    elementary interval starting at coords[t]) holds each interval in the
+    O(log n) nodes that make it up, so the intervals containing a point are
+    found on one leaf-to-root path; the left edges are kept sorted to find
+    the intervals starting inside a range by bisection.
+    """
+
+    def __init__(self, coords: List[float]):
+        self.position = {c: t for t, c in enumerate(coords)}
+        self.size = 1
+        while self.size < len(coords):
+            self.size *= 2
+        self.cover: List[Set[int]] = [set() for _ in range(2 * self.size)]
+        self.lefts: List[Tuple[float, int]] = []
+
+    def _nodes(self, left: float, right: float) -> List[int]:
+        # Leaves position[left] .. position[right] - 1 make up [left, right).
+        nodes: List[int] = []
+        lo, hi = self.position[left] + self.size, self.position[right] + self.size
+        while lo < hi:
+            if lo & 1:
+                nodes.append(lo)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                nodes.append(hi)
+            lo >>= 1
+            hi >>= 1
+        return nodes
+
+    def add(self, i: int, left: float, right: float) -> None:
+        for node in self._nodes(left, right):
+            self.cover[node].add(i)
+        bisect.insort(self.lefts, (left, i))
+
+    def remove(self, i: int, left: float, right: float) -> None:
+        for node in self._nodes(left, right):
+            self.cover[node].discard(i)
+        del self.lefts[bisect.bisect_left(self.lefts, (left, i))]
+
+    def overlapping(self, left: float, right: float) -> List[int]:
+        """Active intervals that intersect [left, right), both edges known."""
+        # Intervals containing `left`, then those starting inside (left, right).
+        found: List[int] = []
+        node = self.position[left] + self.size
+        while node:
+            found.extend(self.cover[node])
+            node >>= 1
+        start = bisect.bisect_right(self.lefts, (left, math.inf))
+        end = bisect.bisect_left(self.lefts, (right, -math.inf))
+        found.extend(i for _, i in self.lefts[start:end])
+        return found
+
+
+class ElementIndex:
+    """
+    Structure of one element list. Elements are referred to by their index
+    in the list; elements without a usable box are roots with no overlaps.
+    """
+
+    def __init__(self, elements: List[Dict[str, Any]]):
+        self.elements = elements
+        self.boxes: List[Optional[Box]] = [_element_box(e) for e in elements]
+        self.overlaps: List[Tuple[int, int]] = self._sweep()
+        self.parents: List[int] = self._parents()
+        self.children: Dict[int, List[int]] = {i: [] for i in range(ROOT, len(elements))}
+        for i, parent in enumerate(self.parents):
+            self.children[parent].append(i)
+        for parent, siblings in self.children.items():
+            self.children[parent] = [i for row in self._rows(siblings) for i in row]
+
+    def _sweep(self) -> List[Tuple[int, int]]:
+        """Pairs (i, j), i < j, whose boxes intersect with positive area."""
+        boxed = [i for i, box in enumerate(self.boxes) if box is not None]
+        spans: Dict[int, Tuple[float, float]] = {}
+        for i in boxed:
+            x, _, w, _ = self.boxes[i]  # type: ignore[misc]
+            spans[i] = (x, x + w)
+        order = sorted(boxed, key=lambda i: self.boxes[i][1])  # type: ignore[index]
+        active: List[Tuple[float, int]] = []  # (bottom edge, index)
+        # Built once more boxes are active than a linear scan handles cheaply.
+        intervals: Optional[_ActiveIntervals] = None
+        pairs: List[Tuple[int, int]] = []
+        for i in order:
+            _, y, _, h = self.boxes[i]  # type: ignore[misc]
+            while active and active[0][0] <= y:
+                j = heapq.heappop(active)[1]
+                if intervals is not None:
+                    intervals.remove(j, *spans[j])
+            if intervals is None and len(active) > LINEAR_SCAN_LIMIT:
+                intervals = _ActiveIntervals(sorted({e for span in spans.values() for e in span}))
+                for _, j in active:
+                    intervals.add(j, *spans[j])
+            left, right = spans[i]
+            if intervals is None:
+                overlapping = [
+                    j for _, j in active if left < spans[j][1] and spans[j][0] < right
+                ]
+            else:
+                overlapping = intervals.overlapping(left, right)
+                intervals.add(i, left, right)
+            for j in overlapping:
+                pairs.append((min(i, j), max(i, j)))
+            heapq.heappush(active, (y + h, i))
+        pairs.sort()
+        return pairs
+
+    def _rank(self, i: int) -> Tuple[float, int]:
+        box = self.boxes[i]
+        assert box is not None
+        return box[2] * box[3], -i
+
+    def _parents(self) -> List[int]:
+        """
+        Smallest containing element of each element. A parent always ranks
+        above its child by (area, earlier index), so the tolerance can never
+        produce a cycle and identical boxes nest under the first one.
+        """
+        parents = [ROOT] * len(self.boxes)
+        best: Dict[int, Tuple[float, int]] = {}
+        for a, b in self.overlaps:
+            for outer, inner in ((a, b), (b, a)):
+                if self._rank(outer) <= self._rank(inner):
+                    continue
+                if not _contains(self.boxes[outer], self.boxes[inner]):  # type: ignore[arg-type]
+                    continue
+                rank = self._rank(outer)
+                if inner not in best or rank < best[inner]:
+                    parents[inner], best[inner] = outer, rank
+        return parents
+
+    def contains(self, outer: int, inner: int) -> bool:
+        a, b = self.boxes[outer], self.boxes[inner]
+        return a is not None and b is not None and _contains(a, b)
+
+    def intersection(self, i: int, j: int) -> float:
+        a, b = self.boxes[i], self.boxes[j]
+        return _intersection(a, b) if a is not None and b is not None else 0.0
+
+    def iou(self, i: int, j: int) -> float:
+        a, b = self.boxes[i], self.boxes[j]
+        if a is None or b is None:
+            return 0.0
+        intersection = _intersection(a, b)
+        return intersection / (a[2] * a[3] + b[2] * b[3] - intersection)
+
+    def ancestors(self, i: int) -> List[int]:
+        chain: List[int] = []
+        while self.parents[i] != ROOT:
+            i = self.parents[i]
+            chain.append(i)
+        return chain
+
+    def _rows(self, members: List[int]) -> List[List[int]]:
+        """
+        Members split into rows in reading order: a box joins the current
+        row while its vertical centre lies within the row's first box (and
+        vice versa); rows are ordered top to bottom, members left to right.
+        """
+        placed = [i for i in members if self.boxes[i] is not None]
+        unplaced = [[i] for i in members if self.boxes[i] is None]
+        placed.sort(key=lambda i: (self.boxes[i][1], self.boxes[i][0], i))  # type: ignore[index]
+        rows: List[List[int]] = []
+        for i in placed:
+            _, y, _, h = self.boxes[i]  # type: ignore[misc]
+            if rows:
+                _, fy, _, fh = self.boxes[rows[-1][0]]  # type: ignore[misc]
+                if fy <= y + h / 2 <= fy + fh and y <= fy + fh / 2 <= y + h:
+                    rows[-1].append(i)
+                    continue
+            rows.append([i])
+        for row in rows:
+            row.sort(key=lambda i: (self.boxes[i][0], i))  # type: ignore[index]
+        return rows + unplaced
+
+    def groups(self, parent: int = ROOT) -> List[ElementGroup]:
+        """Rows and columns of two or more aligned children of `parent`."""
+        siblings = self.children[parent]
+        groups = [
+            ElementGroup("row", row) for row in self._rows(siblings) if len(row) > 1
+        ]
+
+        # Columns: left edges within ALIGN_TOLERANCE, stacked without overlap.
+        by_left = sorted(
+            (i for i in siblings if self.boxes[i] is not None),
+            key=lambda i: (self.boxes[i][0], self.boxes[i][1]),  # type: ignore[index]
+        )
+        bucket: List[int] = []
+        for i in by_left + [ROOT]:
+            if bucket and (
+                i == ROOT
+                or self.boxes[i][0] - self.boxes[bucket[0]][0] > ALIGN_TOLERANCE  # type: ignore[index]
+            ):
+                column = sorted(bucket, key=lambda j: self.boxes[j][1])  # type: ignore[index]
+                stacked = all(
+                    self.boxes[a][1] + self.boxes[a][3] <= self.boxes[b][1] + ALIGN_TOLERANCE  # type: ignore[index]
+                    for a, b in zip(column, column[1:])
+                )
+                if len(column) > 1 and stacked:
+                    groups.append(ElementGroup("column", column))
+                bucket = []
+            if i != ROOT:
+                bucket.append(i)
+        return groups
+
+
+def _is_pictorial(element: Dict[str, Any]) -> bool:
+    return str(element.get("type", "")).lower() in PICTORIAL_TYPES
+
+
+def find_redundant(index: ElementIndex) -> Dict[int, str]:
+    """Indices of redundant elements, with the reason each one is dropped."""
+    redundant: Dict[int, str] = {}
+    for i, element in enumerate(index.elements):
+        if not _is_pictorial(element):
+            continue
+        for ancestor in index.ancestors(i):
+            ancestor_type = str(index.elements[ancestor].get("type", "")).lower()
+            if ancestor_type in PICTORIAL_TYPES:
+                redundant[i] = f"inside {ancestor_type} {index.elements[ancestor].get('id')}"
+                break
+    for i, j in index.overlaps:
+        if i in redundant or j in redundant:
+            continue
+        same_type = str(index.elements[i].get("type", "")).lower() == str(
+            index.elements[j].get("type", "")
+        ).lower()
+        if same_type and index.iou(i, j) >= DUPLICATE_IOU:
+            redundant[j] = f"duplicate of {index.elements[i].get('id')}"
+    return redundant
+
+
+def prune_redundant_elements(elements_data: Dict[str, Any]) -> List[str]:
+    """
+    Drop redundant elements from `elements_data` in place. Returns the IDs
+    of the dropped elements.
+    """
+    elements = elements_data.get("elements") or []
+    redundant = find_redundant(ElementIndex(elements))
+    if not redundant:
+        return []
+    elements_data["elements"] = [e for i, e in enumerate(elements) if i not in redundant]
+    return [str(elements[i].get("id")) for i in sorted(redundant)]
@@ -0,0 +1,191 @@
+"""
+Sprite sheets for small extracted element assets.
+
+Pages with dozens of icons otherwise carry dozens of PNG data URLs, each with
+its own PNG header and base64 blob, in the final HTML. `pack_sprites`
+shelf-packs the small assets into one or a few PNG sheets, and
+`apply_sprites` points their placeholder `<img>` tags at a transparent pixel
+whose background is the right region of a sheet (CSS background-position).
+The sheets are referenced once, from a `<style>` block.
+
+Only plain HTML stacks are rewritten (JSX and Vue templates need different
+attribute syntax), and only tags whose placeholder size matches the asset
+size exactly, since the sprite region is drawn at its natural size. Anything
+else keeps its individual asset.
+"""
+
+from __future__ import annotations
+
+import base64
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import cv2  # type: ignore
+import numpy as np  # type: ignore
+
+from image_generation.core import PLACEHOLDER_PREFIX, extract_dimensions
+from image_generation.html_rewriter import ImgTag, rewrite_img_tags
+
+# Stacks whose output is plain HTML, where class/style attributes apply as is.
+SPRITE_STACKS = frozenset({"html_css", "html_tailwind", "bootstrap"})
+
+# Assets up to this size (either side, px) are packed.
+SPRITE_MAX_SIDE = 128
+SHEET_WIDTH = 1024
+SHEET_MAX_HEIGHT = 2048
+# Transparent gap between frames so neighbours never bleed in when scaled.
+PADDING = 1
+
+_HEAD_END = re.compile(r"</head\s*>", re.IGNORECASE)
+
+TRANSPARENT_PIXEL = (
+    "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
+)
+
+
+class SpriteFrame(NamedTuple):
+    sheet: int
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+@dataclass
+class SpriteAtlas:
+    sheets: List[str]
+    frames: Dict[str, SpriteFrame] = field(default_factory=dict)
+    # Size of the packed assets' data URLs versus the sheets' data URLs.
+    assets_bytes: int = 0
+    sheets_bytes: int = 0
+
+
+def _decode_png(url: str) -> Optional[np.ndarray]:
+    if not url.startswith("data:image/png;base64,"):
+        return None
+    data = np.frombuffer(base64.b64decode(url.split(",", 1)[1]), dtype=np.uint8)
+    image = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        return None
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+    if image.shape[2] == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+    return image
+
+
+def _shelf_pack(sizes: List[Tuple[int, int]]) -> List[Tuple[int, int, int]]:
+    """(sheet, x, y) for each (width, height), tallest first on shelves."""
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0], i))
+    positions: List[Tuple[int, int, int]] = [(0, 0, 0)] * len(sizes)
+    sheet, x, y, shelf_height = 0, 0, 0, 0
+    for i in order:
+        w, h = sizes[i][0] + PADDING, sizes[i][1] + PADDING
+        if x + w > SHEET_WIDTH:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        if y + h > SHEET_MAX_HEIGHT:
+            sheet, x, y, shelf_height = sheet + 1, 0, 0, 0
+        positions[i] = (sheet, x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+    return positions
+
+
+def _encode_png(image: np.ndarray) -> str:
+    ok, buf = cv2.imencode(".png", image, [cv2.IMWRITE_PNG_COMPRESSION, 9])
+    if not ok:
+        raise ValueError("Failed to encode sprite sheet")
+    return f"data:image/png;base64,{base64.b64encode(buf.tobytes()).decode('utf-8')}"
+
+
+def pack_sprites(element_assets: Dict[str, str]) -> Optional[SpriteAtlas]:
+    """Pack small PNG assets into sheets; None when there is nothing to gain."""
+    images: Dict[str, np.ndarray] = {}
+    for url in dict.fromkeys(element_assets.values()):
+        image = _decode_png(url)
+        if image is not None and max(image.shape[:2]) <= SPRITE_MAX_SIDE:
+            images[url] = image
+    if len(images) < 2:
+        return None
+
+    urls = list(images)
+    sizes = [(images[url].shape[1], images[url].shape[0]) for url in urls]
+    positions = _shelf_pack(sizes)
+
+    sheet_count = max(sheet for sheet, _, _ in positions) + 1
+    sheet_heights = [0] * sheet_count
+    for (sheet, _, y), (_, h) in zip(positions, sizes):
+        sheet_heights[sheet] = max(sheet_heights[sheet], y + h)
+    sheet_widths = [0] * sheet_count
+    for (sheet, x, _), (w, _) in zip(positions, sizes):
+        sheet_widths[sheet] = max(sheet_widths[sheet], x + w)
+
+    canvases = [
+        np.zeros((height, width, 4), dtype=np.uint8)
+        for width, height in zip(sheet_widths, sheet_heights)
+    ]
+    frame_by_url: Dict[str, SpriteFrame] = {}
+    for url, (sheet, x, y), (w, h) in zip(urls, positions, sizes):
+        canvases[sheet][y : y + h, x : x + w] = images[url]
+        frame_by_url[url] = SpriteFrame(sheet, x, y, w, h)
+
+    sheets = [_encode_png(canvas) for canvas in canvases]
+    return SpriteAtlas(
+        sheets=sheets,
+        frames={
+            element_id: frame_by_url[url]
+            for element_id, url in element_assets.items()
+            if url in frame_by_url
+        },
+        assets_bytes=sum(len(url) for url in urls),
+        sheets_bytes=sum(len(sheet) for sheet in sheets),
+    )
+
+
+def _sheet_class(sheet: int) -> str:
+    return f"asset-sprite-{sheet}"
+
+
+def apply_sprites(code: str, atlas: SpriteAtlas) -> str:
+    """Point placeholder tags of packed assets at their sprite sheet region."""
+    used_sheets: Dict[int, None] = {}
+
+    def rewrite(img: ImgTag) -> Optional[Dict[str, str]]:
+        src, alt = img.get("src"), img.get("alt")
+        if not src or not alt or not src.startswith(PLACEHOLDER_PREFIX):
+            return None
+        frame = atlas.frames.get(alt)
+        if frame is None or extract_dimensions(src) != (frame.width, frame.height):
+            return None
+        used_sheets[frame.sheet] = None
+        classes = " ".join(filter(None, [img.get("class"), _sheet_class(frame.sheet)]))
+        # Explicit size: CSS resets such as `img { height: auto }` would
+        # otherwise scale the 1x1 pixel to a square.
+        style = (
+            f"width:{frame.width}px;height:{frame.height}px;"
+            f"background-position:-{frame.x}px -{frame.y}px;"
+        )
+        if img.get("style"):
+            style += img.get("style") or ""
+        return {
+            "src": TRANSPARENT_PIXEL,
+            "width": str(frame.width),
+            "height": str(frame.height),
+            "class": classes,
+            "style": style,
+        }
+
+    code = rewrite_img_tags(code, rewrite)
+    if not used_sheets:
+        return code
+
+    rules = "".join(
+        f'.{_sheet_class(sheet)}{{background:url("{atlas.sheets[sheet]}") no-repeat}}'
+        for sheet in sorted(used_sheets)
+    )
+    style_block = f"<style>{rules}</style>"
+    head_end = _HEAD_END.search(code)
+    if head_end is None:
+        return style_block + code
+    return code[: head_end.start()] + style_block + code[head_end.start() :]
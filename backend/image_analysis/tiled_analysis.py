@@ -0,0 +1,276 @@
+"""
+Tiled element analysis for large screenshots.
+
+One `extract_elements` call over a tall or very wide screenshot is slow (the
+model lists every element of the page in one stream) and imprecise (the
+image is downscaled by the provider, so small elements get loose boxes).
+In tiled mode the screenshot is cut into overlapping tiles, each tile is
+analyzed concurrently, and the results are merged:
+
+  - tile coordinates are shifted back to the page and element IDs are
+    prefixed with the tile number, so IDs stay unique;
+  - elements that lie only in their own tile's interior cannot have a
+    duplicate and are reported (`on_element`) as they stream in;
+  - elements in the overlap bands are deduplicated once all tiles are in:
+    same-type elements from different tiles with IoU >= DEDUPE_IOU, or a
+    copy cut off at a tile edge that the other copy mostly covers, keep
+    the complete copy (or the union, when both were cut off).
+
+Tile calls share a per-provider PriorityLimiter with the tile calls of all
+other requests, so a burst of tiles cannot exceed ANALYSIS_CONCURRENCY
+calls to one provider; upper tiles are admitted first. Whole-screenshot
+calls are not capped.
+If one tile fails, the others are cancelled. With enough slots, wall-clock time tracks
+the slowest tile instead of the whole page.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import copy
+import io
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from PIL import Image
+
+from concurrency import PriorityLimiter, gather_or_cancel
+from config.settings import settings
+from image_analysis.element_extraction import extract_elements
+from image_analysis.spatial_index import ElementIndex
+from llm import MODEL_PROVIDER, Llm
+from metrics import register_metrics
+
+# Same-type elements from different tiles overlapping this much are one element.
+DEDUPE_IOU = 0.5
+# A copy cut off at a tile edge is a duplicate when another copy covers
+# at least this share of it.
+CLIPPED_COVERAGE = 0.8
+# Elements within this distance of an inner tile edge count as cut off.
+EDGE_MARGIN = 4
+
+
+class AnalysisTile(NamedTuple):
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+def _spans(length: int, size: int, overlap: int) -> List[Tuple[int, int]]:
+    """(start, size) of evenly spaced windows covering `length`."""
+    if length <= size:
+        return [(0, length)]
+    count = math.ceil((length - overlap) / (size - overlap))
+    return [(round(k * (length - size) / (count - 1)), size) for k in range(count)]
+
+
+def plan_tiles(
+    width: int,
+    height: int,
+    tile_width: int,
+    tile_height: int,
+    overlap: int,
+) -> List[AnalysisTile]:
+    """Row-major tiles of at most tile_width x tile_height, overlapping by >= overlap."""
+    return [
+        AnalysisTile(x, y, w, h)
+        for y, h in _spans(height, tile_height, overlap)
+        for x, w in _spans(width, tile_width, overlap)
+    ]
+
+
+def plan_analysis_tiles(image_data_url: str) -> List[AnalysisTile]:
+    """Tiles for a screenshot per settings; a single tile means no tiling."""
+    data = base64.b64decode(image_data_url.split(",", 1)[1])
+    # PIL only reads the header here; pixels are decoded when cropping.
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+    return plan_tiles(
+        width,
+        height,
+        settings.ANALYSIS_TILE_WIDTH,
+        settings.ANALYSIS_TILE_HEIGHT,
+        settings.ANALYSIS_TILE_OVERLAP,
+    )
+
+
+def _crop_tiles(image_data_url: str, tiles: List[AnalysisTile]) -> List[str]:
+    image = Image.open(io.BytesIO(base64.b64decode(image_data_url.split(",", 1)[1])))
+    urls: List[str] = []
+    for tile in tiles:
+        output = io.BytesIO()
+        image.crop((tile.x, tile.y, tile.x + tile.width, tile.y + tile.height)).save(
+            output, format="PNG"
+        )
+        urls.append(f"data:image/png;base64,{base64.b64encode(output.getvalue()).decode('utf-8')}")
+    return urls
+
+
+_limiters: Dict[str, PriorityLimiter] = {}
+
+
+def get_analysis_limiter(provider: str) -> PriorityLimiter:
+    """Process-wide cap on concurrent analysis calls to one provider."""
+    if provider not in _limiters:
+        _limiters[provider] = PriorityLimiter(settings.ANALYSIS_CONCURRENCY)
+        register_metrics(f"image_analysis.limiter.{provider}", _limiters[provider].stats)
+    return _limiters[provider]
+
+
+class _TileElements:
+    """Elements of one tile, mapped to page coordinates."""
+
+    def __init__(self, number: int, tile: AnalysisTile, page: Tuple[int, int]):
+        self.number = number
+        self.tile = tile
+        self.page = page
+
+    def to_page(self, element: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        coordinates = element.get("coordinates")
+        if not isinstance(coordinates, dict):
+            return None
+        mapped = copy.deepcopy(element)
+        mapped["id"] = f"t{self.number}_{element.get('id', '')}"
+        try:
+            mapped["coordinates"]["x"] = float(coordinates.get("x", 0)) + self.tile.x
+            mapped["coordinates"]["y"] = float(coordinates.get("y", 0)) + self.tile.y
+        except (TypeError, ValueError):
+            return None
+        return mapped
+
+    def clipped(self, element: Dict[str, Any]) -> bool:
+        """Whether the element touches an edge of the tile inside the page."""
+        c = element["coordinates"]
+        tile, (page_w, page_h) = self.tile, self.page
+        x, y = c["x"] - tile.x, c["y"] - tile.y
+        w, h = float(c.get("width", 0)), float(c.get("height", 0))
+        return (
+            (tile.x > 0 and x <= EDGE_MARGIN)
+            or (tile.y > 0 and y <= EDGE_MARGIN)
+            or (tile.x + tile.width < page_w and x + w >= tile.width - EDGE_MARGIN)
+            or (tile.y + tile.height < page_h and y + h >= tile.height - EDGE_MARGIN)
+        )
+
+
+def _in_overlap(element: Dict[str, Any], own: AnalysisTile, tiles: List[AnalysisTile]) -> bool:
+    c = element["coordinates"]
+    x, y = c["x"], c["y"]
+    w, h = float(c.get("width", 0)), float(c.get("height", 0))
+    return any(
+        tile != own
+        and x < tile.x + tile.width
+        and tile.x < x + w
+        and y < tile.y + tile.height
+        and tile.y < y + h
+        for tile in tiles
+    )
+
+
+def merge_tile_elements(
+    elements: List[Dict[str, Any]],
+    tile_numbers: List[int],
+    clipped: List[bool],
+) -> List[Dict[str, Any]]:
+    """Drop duplicates found by more than one tile (see module docstring)."""
+    index = ElementIndex(elements)
+    dropped: Set[int] = set()
+    for i, j in index.overlaps:
+        if i in dropped or j in dropped or tile_numbers[i] == tile_numbers[j]:
+            continue
+        if str(elements[i].get("type", "")).lower() != str(elements[j].get("type", "")).lower():
+            continue
+        bi, bj = index.boxes[i], index.boxes[j]
+        assert bi is not None and bj is not None
+        area_i, area_j = bi[2] * bi[3], bj[2] * bj[3]
+        covered = index.intersection(i, j) / min(area_i, area_j) >= CLIPPED_COVERAGE
+        if index.iou(i, j) < DEDUPE_IOU and not (covered and (clipped[i] or clipped[j])):
+            continue
+
+        # Keep the complete copy (else the larger); when both were cut off,
+        # keep their union.
+        if (not clipped[i], area_i) >= (not clipped[j], area_j):
+            keep, drop = i, j
+        else:
+            keep, drop = j, i
+        if clipped[i] and clipped[j]:
+            x0, y0 = min(bi[0], bj[0]), min(bi[1], bj[1])
+            x1 = max(bi[0] + bi[2], bj[0] + bj[2])
+            y1 = max(bi[1] + bi[3], bj[1] + bj[3])
+            elements[keep]["coordinates"].update(
+                {"x": x0, "y": y0, "width": x1 - x0, "height": y1 - y0}
+            )
+        dropped.add(drop)
+    return [e for k, e in enumerate(elements) if k not in dropped]
+
+
+async def extract_elements_tiled(
+    image_data_url: str,
+    tiles: List[AnalysisTile],
+    analysis_model: Llm,
+    openai_api_key: Optional[str] = None,
+    anthropic_api_key: Optional[str] = None,
+    gemini_api_key: Optional[str] = None,
+    on_element: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """
+    `extract_elements` over `tiles` of the screenshot, merged into one
+    elements_data in page coordinates. `on_element` gets the elements that
+    cannot be duplicated by another tile as they stream in.
+    """
+    page = (
+        max(tile.x + tile.width for tile in tiles),
+        max(tile.y + tile.height for tile in tiles),
+    )
+    tile_urls = await asyncio.to_thread(_crop_tiles, image_data_url, tiles)
+    limiter = get_analysis_limiter(MODEL_PROVIDER.get(analysis_model, "unknown"))
+    durations: List[float] = [0.0] * len(tiles)
+
+    async def analyze(number: int) -> List[Dict[str, Any]]:
+        tile = tiles[number]
+        mapper = _TileElements(number + 1, tile, page)
+
+        async def forward(element: Dict[str, Any]) -> None:
+            mapped = mapper.to_page(element)
+            if on_element is not None and mapped and not _in_overlap(mapped, tile, tiles):
+                await on_element(mapped)
+
+        async with limiter.slot(priority=number):
+            start = time.perf_counter()
+            data = await extract_elements(
+                image_data_url=tile_urls[number],
+                analysis_model=analysis_model,
+                openai_api_key=openai_api_key,
+                anthropic_api_key=anthropic_api_key,
+                gemini_api_key=gemini_api_key,
+                on_element=forward,
+            )
+            durations[number] = time.perf_counter() - start
+        mapped = (mapper.to_page(e) for e in data.get("elements", []) if isinstance(e, dict))
+        return [e for e in mapped if e is not None]
+
+    start = time.perf_counter()
+    per_tile = await gather_or_cancel(analyze(number) for number in range(len(tiles)))
+    elapsed = time.perf_counter() - start
+
+    elements: List[Dict[str, Any]] = []
+    tile_numbers: List[int] = []
+    clipped: List[bool] = []
+    for number, tile_elements in enumerate(per_tile):
+        mapper = _TileElements(number + 1, tiles[number], page)
+        for element in tile_elements:
+            elements.append(element)
+            tile_numbers.append(number)
+            clipped.append(mapper.clipped(element))
+    merged = merge_tile_elements(elements, tile_numbers, clipped)
+    print(
+        f"Tiled analysis: {len(tiles)} tiles in {elapsed:.1f}s "
+        f"(slowest tile {max(durations):.1f}s), "
+        f"{len(elements)} elements merged into {len(merged)}"
+    )
+    return {
+        "image_dimensions": {"width": page[0], "height": page[1]},
+        "elements": merged,
+    }
@@ -0,0 +1,116 @@
+"""
+Persistent cache of generated images keyed by (model, normalized prompt, size).
+
+The same alt / data-prompt strings ("Company logo", "Hero background") come up
+across many generations, and each provider call takes seconds. Generated images
+are stored as bytes (provider URLs expire) in a memory LRU backed by a disk
+index. A hit returns the provider URL while it is still fresh, and a data URL
+of the stored bytes afterwards.
+"""
+
+from __future__ import annotations
+
+import base64
+import re
+import time
+from typing import Any, Dict, Optional
+
+from caching import TwoTierCache
+from config.settings import settings
+from image_generation.replicate import get_client
+from metrics import register_metrics
+
+PLACEHOLDER_PREFIX = "https://placehold.co"
+
+
+def normalize_prompt(prompt: str) -> str:
+    return re.sub(r"\s+", " ", prompt).strip().lower()
+
+
+def cache_key(model: str, prompt: str, size: str) -> str:
+    return f"{model}|{size}|{normalize_prompt(prompt)}"
+
+
+def _decode_data_url(url: str) -> tuple[bytes, str]:
+    header, b64 = url.split(",", 1)
+    return base64.b64decode(b64), header.split(";")[0].split(":")[1]
+
+
+class ImageGenerationCache:
+    def __init__(
+        self,
+        directory: str | None,
+        ttl: float | None,
+        url_ttl: float,
+        memory_capacity: int = 256,
+        max_disk_bytes: int | None = None,
+    ):
+        self._cache = TwoTierCache(directory, memory_capacity, ttl, max_disk_bytes)
+        self.url_ttl = url_ttl
+        self.time_saved_seconds = 0.0
+
+    async def get(self, model: str, prompt: str, size: str) -> Optional[str]:
+        entry = await self._cache.get(cache_key(model, prompt, size))
+        if entry is None:
+            return None
+        data, meta = entry
+        self.time_saved_seconds += meta.get("seconds", 0.0)
+
+        url = meta.get("url")
+        if url and time.time() - meta.get("created", 0.0) < self.url_ttl:
+            return url
+        return f"data:{meta['mime_type']};base64,{base64.b64encode(data).decode('utf-8')}"
+
+    async def put(
+        self, model: str, prompt: str, size: str, url: str, seconds: float
+    ) -> None:
+        """Store a generated image. Fetches remote URLs so expiry does not matter."""
+        if not url or url.startswith(PLACEHOLDER_PREFIX):
+            return
+        try:
+            if url.startswith("data:"):
+                data, mime_type = _decode_data_url(url)
+                remote_url = None
+            else:
+                response = await get_client().get(url, timeout=30)
+                response.raise_for_status()
+                data = response.content
+                mime_type = response.headers.get("content-type", "image/png")
+                remote_url = url
+        except Exception as e:
+            print(f"[IMAGE CACHE] failed to store image for '{prompt[:40]}': {e}")
+            return
+
+        meta: Dict[str, Any] = {
+            "url": remote_url,
+            "mime_type": mime_type,
+            "created": time.time(),
+            "seconds": seconds,
+        }
+        await self._cache.set(cache_key(model, prompt, size), data, meta)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._cache.stats(),
+            "time_saved_seconds": round(self.time_saved_seconds, 2),
+        }
+
+
+_image_cache: ImageGenerationCache | None = None
+
+
+def get_image_generation_cache() -> ImageGenerationCache | None:
+    """Process-wide cache, or None when disabled in settings."""
+    global _image_cache
+    if not settings.IMAGE_CACHE_ENABLED:
+        return None
+    if _image_cache is None:
+        _image_cache = ImageGenerationCache(
+            directory=settings.IMAGE_CACHE_DIR or None,
+            ttl=settings.IMAGE_CACHE_TTL_SECONDS,
+            url_ttl=settings.IMAGE_CACHE_URL_TTL_SECONDS,
+            memory_capacity=settings.IMAGE_CACHE_MEMORY_ITEMS,
+            max_disk_bytes=settings.IMAGE_CACHE_MAX_BYTES or None,
+        )
+        register_metrics("image_generation.cache", _image_cache.stats)
+    return _image_cache
@@ -0,0 +1,111 @@
+"""
+Process-wide coordination of image generation calls.
+
+Variants of one request, and concurrent requests, tend to ask for the same
+images ("Company logo", "User avatar"). Every generation goes through one
+coordinator that:
+
+- serves cache hits without touching the provider,
+- collapses identical in-flight (model, prompt, size) requests made with the
+  same credentials into one call,
+- caps concurrent calls per provider, admitting earlier-in-document
+  (above-the-fold) images first when the cap is reached.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from concurrency import PriorityLimiter, SingleFlight, credential_fingerprint
+from config.settings import settings
+from image_generation.cache import cache_key, get_image_generation_cache
+from metrics import register_metrics
+
+
+class ImageGenerationCoordinator:
+    def __init__(self, concurrency: Dict[str, int]):
+        self.concurrency = concurrency
+        self._limiters: Dict[str, PriorityLimiter] = {}
+        self._flights: SingleFlight[Optional[str]] = SingleFlight()
+        # Keep references to fire-and-forget cache writes so they are not collected.
+        self._background_tasks: Set["asyncio.Task[None]"] = set()
+
+    def limiter(self, model: str) -> PriorityLimiter:
+        if model not in self._limiters:
+            self._limiters[model] = PriorityLimiter(self.concurrency.get(model, 4))
+        return self._limiters[model]
+
+    async def generate(
+        self,
+        model: str,
+        prompt: str,
+        size: str,
+        generate: Callable[[], Awaitable[Optional[str]]],
+        priority: float = 0,
+        api_key: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Return an image URL for `prompt`, calling `generate` at most once
+        across all concurrent callers using the same `api_key`. Lower
+        `priority` values run first.
+        """
+        cache = get_image_generation_cache()
+        if cache is not None:
+            cached = await cache.get(model, prompt, size)
+            if cached is not None:
+                return cached
+
+        # Successful images are shared through the cache; a flight (and its
+        # error, e.g. a rejected key or exhausted quota) only with the same key.
+        return await self._flights.do(
+            f"{credential_fingerprint(api_key)}|{cache_key(model, prompt, size)}",
+            lambda: self._generate(model, prompt, size, generate, priority),
+        )
+
+    async def _generate(
+        self,
+        model: str,
+        prompt: str,
+        size: str,
+        generate: Callable[[], Awaitable[Optional[str]]],
+        priority: float,
+    ) -> Optional[str]:
+        async with self.limiter(model).slot(priority):
+            start_time = time.time()
+            url = await generate()
+            seconds = time.time() - start_time
+
+        cache = get_image_generation_cache()
+        if cache is not None and url:
+            task = asyncio.create_task(cache.put(model, prompt, size, url, seconds))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        return url
+
+    async def wait_for_cache_writes(self) -> None:
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "single_flight": self._flights.stats(),
+            "limiters": {model: l.stats() for model, l in self._limiters.items()},
+        }
+
+
+_coordinator: ImageGenerationCoordinator | None = None
+
+
+def get_image_coordinator() -> ImageGenerationCoordinator:
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = ImageGenerationCoordinator(
+            {
+                "dalle3": settings.IMAGE_CONCURRENCY_DALLE3,
+                "flux": settings.IMAGE_CONCURRENCY_FLUX,
+                "gemini-3-pro-nano": settings.IMAGE_CONCURRENCY_GEMINI,
+            }
+        )
+        register_metrics("image_generation.coordinator", _coordinator.stats)
+    return _coordinator
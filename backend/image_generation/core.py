@@ -1,31 +1,74 @@
 import asyncio
 import re
-from typing import Dict, List, Literal, Union
+import time
+from typing import Dict, List, Literal, Mapping, Optional, Sequence, Tuple, Union
 from openai import AsyncOpenAI
-from bs4 import BeautifulSoup
 
+from assets import shorten_image_url
+from config.settings import settings
+from image_generation.coordinator import get_image_coordinator
+from image_generation.html_rewriter import ImgTag, iter_img_tags, rewrite_img_tags
+from image_generation.sizing import downscale_to_placeholder, flux_options, provider_size
 from image_generation.replicate import call_replicate
 
+ImageModel = Literal["dalle3", "flux", "gemini-3-pro-nano"]
+
+PLACEHOLDER_PREFIX = "https://placehold.co"
+
 
 async def process_tasks(
     prompts: List[str],
     api_key: str,
     base_url: str | None,
-    model: Literal["dalle3", "flux", "gemini-3-pro-nano"],
+    model: ImageModel,
     gemini_api_key: str | None = None,
+    priorities: Optional[Sequence[float]] = None,
+    dimensions: Optional[Sequence[Tuple[int, int]]] = None,
 ):
-    import time
+    """
+    Generate one image per prompt through the shared coordinator.
 
+    `priorities` (lower first) default to the prompts' order, which is their
+    order in the document. `dimensions` are the placeholder (width, height)
+    of each prompt; they pick the provider size closest in aspect ratio.
+    """
     start_time = time.time()
-    if model == "dalle3":
-        tasks = [generate_image_dalle(prompt, api_key, base_url) for prompt in prompts]
-    elif model == "gemini-3-pro-nano":
-        if not gemini_api_key:
-            raise ValueError("Gemini API key required for Gemini 3 Pro Nano image generation")
-        tasks = [generate_image_gemini(prompt, gemini_api_key) for prompt in prompts]
-    else:
-        tasks = [generate_image_replicate(prompt, api_key) for prompt in prompts]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    if model == "gemini-3-pro-nano" and not gemini_api_key:
+        raise ValueError("Gemini API key required for Gemini 3 Pro Nano image generation")
+
+    provider_key = gemini_api_key if model == "gemini-3-pro-nano" else api_key
+
+    def generator(prompt: str, size: str):
+        if model == "dalle3":
+            return lambda: generate_image_dalle(prompt, api_key, base_url, size)
+        elif model == "gemini-3-pro-nano":
+            gemini_key = gemini_api_key
+            assert gemini_key is not None
+            return lambda: generate_image_gemini(prompt, gemini_key)
+        aspect_ratio, megapixels = flux_options(size)
+        return lambda: generate_image_replicate(prompt, api_key, aspect_ratio, megapixels)
+
+    async def generate_one(i: int, prompt: str) -> Optional[str]:
+        width, height = dimensions[i] if dimensions is not None else (1024, 1024)
+        size = provider_size(model, width, height)
+        url = await coordinator.generate(
+            model,
+            prompt,
+            size,
+            generator(prompt, size),
+            priority=priorities[i] if priorities is not None else i,
+            api_key=provider_key,
+        )
+        if url and dimensions is not None and settings.IMAGE_DOWNSCALE_TO_PLACEHOLDER:
+            url = await downscale_to_placeholder(url, width, height)
+        # Cached, downscaled and inline provider results come back as data URLs.
+        return shorten_image_url(url) if url else url
+
+    coordinator = get_image_coordinator()
+    results = await asyncio.gather(
+        *(generate_one(i, prompt) for i, prompt in enumerate(prompts)),
+        return_exceptions=True,
+    )
     end_time = time.time()
     generation_time = end_time - start_time
     print(f"Image generation time: {generation_time:.2f} seconds")
@@ -42,7 +85,10 @@ async def process_tasks(
 
 
 async def generate_image_dalle(
-    prompt: str, api_key: str, base_url: str | None
+    prompt: str,
+    api_key: str,
+    base_url: str | None,
+    size: str = "1024x1024",
 ) -> Union[str, None]:
     client = AsyncOpenAI(api_key=api_key, base_url=base_url)
     res = await client.images.generate(
@@ -50,21 +96,24 @@ async def generate_image_dalle(
         quality="standard",
         style="natural",
         n=1,
-        size="1024x1024",
+        size=size,  # type: ignore
         prompt=prompt,
     )
     await client.close()
     return res.data[0].url
 
 
-async def generate_image_replicate(prompt: str, api_key: str) -> str:
+async def generate_image_replicate(
+    prompt: str, api_key: str, aspect_ratio: str = "1:1", megapixels: str = "1"
+) -> str:
 
     # We use Flux Schnell
     return await call_replicate(
         {
             "prompt": prompt,
             "num_outputs": 1,
-            "aspect_ratio": "1:1",
+            "aspect_ratio": aspect_ratio,
+            "megapixels": megapixels,
             "output_format": "png",
             "output_quality": 100,
         },
@@ -135,48 +184,44 @@ def extract_dimensions(url: str):
 
 
 def create_alt_url_mapping(code: str) -> Dict[str, str]:
-    soup = BeautifulSoup(code, "html.parser")
-    images = soup.find_all("img")
-
     mapping: Dict[str, str] = {}
 
-    for image in images:
-        if not image["src"].startswith("https://placehold.co"):
-            mapping[image["alt"]] = image["src"]
+    for image in iter_img_tags(code):
+        src, alt = image.get("src"), image.get("alt")
+        if src and alt is not None and not src.startswith(PLACEHOLDER_PREFIX):
+            mapping[alt] = src
 
     return mapping
 
 
+def _replace_placeholders(code: str, urls: Mapping[str, Optional[str]]) -> str:
+    """Point placeholder <img> tags at `urls[alt]`, keeping the placeholder size."""
+
+    def rewrite(img: ImgTag) -> Optional[Dict[str, str]]:
+        src, alt = img.get("src"), img.get("alt")
+        if not src or not alt or not src.startswith(PLACEHOLDER_PREFIX):
+            return None
+        new_url = urls.get(alt)
+        if not new_url:
+            if alt in urls:
+                print("Image generation failed for alt text:" + alt)
+            return None
+        width, height = extract_dimensions(src)
+        return {"src": new_url, "width": str(width), "height": str(height)}
+
+    return rewrite_img_tags(code, rewrite)
+
+
 def apply_image_cache(code: str, image_cache: Dict[str, str]) -> str:
     """
     Replace placeholder images (placehold.co) with cached URLs/data URLs by matching `alt`.
 
     This is used for "asset injection" workflows (e.g. element extraction), where
     we already have the correct image content and do not want to generate it.
+    Only the affected `<img>` tags are rewritten; the rest of the code is kept
+    byte for byte.
     """
-    soup = BeautifulSoup(code, "html.parser")
-    images = soup.find_all("img")
-
-    did_replace = False
-    for img in images:
-        src = img.get("src")
-        alt = img.get("alt")
-        if not src or not alt:
-            continue
-        if not src.startswith("https://placehold.co"):
-            continue
-
-        new_url = image_cache.get(alt)
-        if not new_url:
-            continue
-
-        width, height = extract_dimensions(src)
-        img["width"] = width
-        img["height"] = height
-        img["src"] = new_url
-        did_replace = True
-
-    return soup.prettify() if did_replace else code
+    return _replace_placeholders(code, image_cache)
 
 
 async def generate_images(
@@ -184,26 +229,24 @@ async def generate_images(
     api_key: str,
     base_url: Union[str, None],
     image_cache: Dict[str, str],
-    model: Literal["dalle3", "flux", "gemini-3-pro-nano"] = "dalle3",
+    model: ImageModel = "dalle3",
     gemini_api_key: str | None = None,
 ) -> str:
-    # Find all images
-    soup = BeautifulSoup(code, "html.parser")
-    images = soup.find_all("img")
-
     alt_to_prompt: Dict[str, str] = {}
-    for img in images:
+    alt_to_dimensions: Dict[str, Tuple[int, int]] = {}
+    for img in iter_img_tags(code):
         src = img.get("src")
         alt = img.get("alt")
         if not src or not alt:
             continue
-        if not src.startswith("https://placehold.co"):
+        if not src.startswith(PLACEHOLDER_PREFIX):
             continue
         if image_cache.get(alt) is not None:
             continue
 
         prompt = img.get("data-prompt") or alt
         alt_to_prompt.setdefault(alt, prompt)
+        alt_to_dimensions.setdefault(alt, extract_dimensions(src))
 
     alts_to_generate = list(alt_to_prompt.keys())
     prompts = [alt_to_prompt[alt] for alt in alts_to_generate]
@@ -211,32 +254,17 @@ async def generate_images(
     mapped_image_urls: Dict[str, Union[str, None]] = {}
 
     if len(prompts) > 0:
-        results = await process_tasks(prompts, api_key, base_url, model, gemini_api_key)
+        results = await process_tasks(
+            prompts,
+            api_key,
+            base_url,
+            model,
+            gemini_api_key,
+            dimensions=[alt_to_dimensions[alt] for alt in alts_to_generate],
+        )
         mapped_image_urls = dict(zip(alts_to_generate, results))
 
     # Merge with image_cache
     mapped_image_urls = {**mapped_image_urls, **image_cache}
 
-    # Replace old image URLs with the generated URLs
-    did_replace = False
-    for img in images:
-        # Skip images that don't start with https://placehold.co (leave them alone)
-        if not img["src"].startswith("https://placehold.co"):
-            continue
-
-        new_url = mapped_image_urls.get(img.get("alt"))
-
-        if new_url:
-            # Set width and height attributes
-            width, height = extract_dimensions(img["src"])
-            img["width"] = width
-            img["height"] = height
-            # Replace img['src'] with the mapped image URL
-            img["src"] = new_url
-            did_replace = True
-        else:
-            print("Image generation failed for alt text:" + img.get("alt"))
-
-    # Return the modified HTML
-    # (need to prettify it because BeautifulSoup messes up the formatting)
-    return soup.prettify() if did_replace else code
+    return _replace_placeholders(code, mapped_image_urls)
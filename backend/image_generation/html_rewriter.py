@@ -0,0 +1,125 @@
+"""
+Single-pass `<img>` tag scanner and rewriter that preserves formatting.
+
+Image replacement only ever touches `<img>` attributes, so there is no need to
+build a full DOM. `iter_img_tags` finds tags with one regex pass and parses
+their attributes; `rewrite_img_tags` splices updated tags back in by offset,
+leaving every other byte of the document exactly as the model wrote it
+(BeautifulSoup's `prettify` re-indented the whole page). Attribute values
+are unescaped on read and escaped on write, matching what an HTML parser
+would see. Like a parser, the scanner skips comments and the raw text of
+`<script>` and `<style>`, so `<img>` markup inside JS strings or commented-out
+HTML is neither reported nor rewritten.
+"""
+
+from __future__ import annotations
+
+import html
+import re
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Quoted attribute values may contain ">", so they are matched as a unit.
+_TAG_BODY = r"""(?:[^>"']|"[^"]*"|'[^']*')*>"""
+# One pass finds <img> tags and the spans a parser does not read as markup.
+# Unterminated spans run to the end of the input, as in a browser.
+_SCAN = re.compile(
+    r"(?P<skip><!--.*?(?:-->|\Z)"
+    r"|<(?P<raw>script|style)\b" + _TAG_BODY + r".*?(?:</(?P=raw)\s*>|\Z))"
+    r"|<img\b" + _TAG_BODY,
+    re.IGNORECASE | re.DOTALL,
+)
+_SKIP_CLOSED = re.compile(r"(?:-->|</(?:script|style)\s*>)\Z", re.IGNORECASE)
+_ATTRIBUTE = re.compile(
+    r"""([^\s"'<>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?"""
+)
+_TAG_END = re.compile(r"\s*/?>$")
+
+
+class ImgTag(NamedTuple):
+    start: int
+    end: int
+    raw: str
+    attributes: Dict[str, str]
+
+    def get(self, name: str) -> Optional[str]:
+        return self.attributes.get(name)
+
+
+def parse_attributes(tag: str) -> Dict[str, str]:
+    attributes: Dict[str, str] = {}
+    # Skip the tag name so "<img" is not read as an attribute.
+    for name, double, single, bare in _ATTRIBUTE.findall(tag, 4):
+        value = double or single or bare
+        if "&" in value:
+            value = html.unescape(value)
+        # Like browsers, the first occurrence of a duplicate attribute wins.
+        attributes.setdefault(name.lower(), value)
+    return attributes
+
+
+def iter_img_tags(code: str) -> Iterator[ImgTag]:
+    for match in _SCAN.finditer(code):
+        if match.group("skip") is None:
+            raw = match.group(0)
+            yield ImgTag(match.start(), match.end(), raw, parse_attributes(raw))
+
+
+def scan_streamed_img_tags(code: str) -> Tuple[List[ImgTag], int]:
+    """
+    Complete `<img>` tags in a prefix of a document that is still streaming,
+    and the offset the next scan has to resume from: the start of a trailing
+    tag, comment or script that may not be complete yet.
+    """
+    tags: List[ImgTag] = []
+    resume = 0
+    for match in _SCAN.finditer(code):
+        if match.group("skip") is not None:
+            if match.end() == len(code) and not _SKIP_CLOSED.search(match.group(0)):
+                # Still open: nothing after it can be markup yet.
+                return tags, match.start()
+        else:
+            raw = match.group(0)
+            tags.append(ImgTag(match.start(), match.end(), raw, parse_attributes(raw)))
+        resume = match.end()
+    last_open = code.rfind("<", resume)
+    return tags, last_open if last_open != -1 else len(code)
+
+
+def set_attributes(tag: str, updates: Dict[str, str]) -> str:
+    """Return `tag` with `updates` applied; existing attributes keep their place."""
+    remaining = dict(updates)
+
+    def replace(match: re.Match[str]) -> str:
+        name = match.group(1).lower()
+        if name not in remaining:
+            return match.group(0)
+        return f'{match.group(1)}="{html.escape(remaining.pop(name))}"'
+
+    end = _TAG_END.search(tag)
+    assert end is not None
+    body = _ATTRIBUTE.sub(replace, tag[4 : end.start()])
+    added = "".join(f' {name}="{html.escape(value)}"' for name, value in remaining.items())
+    return tag[:4] + body + added + tag[end.start() :]
+
+
+def rewrite_img_tags(
+    code: str, rewrite: Callable[[ImgTag], Optional[Dict[str, str]]]
+) -> str:
+    """
+    Apply `rewrite` to every `<img>` tag. It returns attribute updates, or
+    None to leave the tag untouched. Returns `code` itself when nothing changed.
+    """
+    parts: List[str] = []
+    position = 0
+    for tag in iter_img_tags(code):
+        updates = rewrite(tag)
+        if not updates:
+            continue
+        parts.append(code[position : tag.start])
+        parts.append(set_attributes(tag.raw, updates))
+        position = tag.end
+
+    if not parts:
+        return code
+    parts.append(code[position:])
+    return "".join(parts)
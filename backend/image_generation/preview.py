@@ -0,0 +1,101 @@
+"""
+Instant local previews for images that are still generating.
+
+When a variant's code is sent before all of its images are ready, the
+pending ones would show as grey placehold.co boxes. Instead each gets a tiny
+gradient derived from its prompt: color words ("ocean", "sunset", "forest")
+pick the palette, anything else a stable hue from the prompt hash. The
+preview is a few hundred bytes, matches the placeholder's aspect ratio and is
+replaced by the real image through an `imagePatch` message. Preview tags are
+marked with `data-preview` so the client knows they are still patchable.
+"""
+
+from __future__ import annotations
+
+import base64
+import colorsys
+import hashlib
+import io
+import re
+from functools import lru_cache
+from typing import Collection, Dict, Optional, Tuple
+
+import numpy as np  # type: ignore
+from PIL import Image
+
+from image_generation.core import PLACEHOLDER_PREFIX, extract_dimensions
+from image_generation.html_rewriter import ImgTag, rewrite_img_tags
+
+# Long edge of the preview bitmap; browsers scale it up smoothly.
+PREVIEW_SIZE = 32
+
+RGB = Tuple[int, int, int]
+
+# (top, bottom) gradient colors for common visual words.
+KEYWORD_PALETTES: Dict[str, Tuple[RGB, RGB]] = {
+    "sky": ((135, 190, 235), (220, 235, 250)),
+    "ocean": ((40, 110, 170), (120, 190, 220)),
+    "sea": ((40, 110, 170), (120, 190, 220)),
+    "beach": ((120, 190, 230), (235, 215, 170)),
+    "sunset": ((250, 150, 80), (120, 70, 140)),
+    "forest": ((40, 90, 50), (120, 160, 90)),
+    "mountain": ((110, 130, 160), (200, 210, 220)),
+    "night": ((15, 20, 50), (60, 50, 110)),
+    "city": ((90, 100, 120), (170, 175, 190)),
+    "food": ((200, 120, 60), (240, 200, 140)),
+    "coffee": ((90, 60, 40), (190, 150, 110)),
+    "snow": ((225, 235, 245), (250, 250, 255)),
+    "desert": ((225, 180, 120), (245, 220, 170)),
+    "portrait": ((170, 140, 125), (225, 205, 190)),
+    "logo": ((235, 235, 240), (205, 210, 220)),
+}
+
+_WORD = re.compile(r"[a-z]+")
+
+
+def _palette(prompt: str) -> Tuple[RGB, RGB]:
+    for word in _WORD.findall(prompt.lower()):
+        palette = KEYWORD_PALETTES.get(word) or KEYWORD_PALETTES.get(word.rstrip("s"))
+        if palette:
+            return palette
+    # Stable muted hue from the prompt text.
+    hue = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:2], "big") / 65535
+    top = colorsys.hls_to_rgb(hue, 0.55, 0.35)
+    bottom = colorsys.hls_to_rgb((hue + 0.08) % 1.0, 0.75, 0.3)
+    return (
+        tuple(int(c * 255) for c in top),  # type: ignore
+        tuple(int(c * 255) for c in bottom),  # type: ignore
+    )
+
+
+@lru_cache(maxsize=512)
+def preview_image_url(prompt: str, width: int, height: int) -> str:
+    """A small vertical-gradient PNG data URL with the placeholder's aspect ratio."""
+    scale = PREVIEW_SIZE / max(width, height, 1)
+    w, h = max(1, round(width * scale)), max(1, round(height * scale))
+    top, bottom = (np.array(c, dtype=np.float32) for c in _palette(prompt))
+    t = np.linspace(0.0, 1.0, h, dtype=np.float32)[:, None, None]
+    pixels = np.broadcast_to(top + (bottom - top) * t, (h, w, 3)).astype(np.uint8)
+
+    output = io.BytesIO()
+    Image.fromarray(pixels, "RGB").save(output, format="PNG", optimize=True)
+    return f"data:image/png;base64,{base64.b64encode(output.getvalue()).decode('utf-8')}"
+
+
+def apply_previews(code: str, alts: Collection[str]) -> str:
+    """Point the placeholder tags for `alts` at local previews."""
+
+    def rewrite(img: ImgTag) -> Optional[Dict[str, str]]:
+        src, alt = img.get("src"), img.get("alt")
+        if not src or not alt or alt not in alts or not src.startswith(PLACEHOLDER_PREFIX):
+            return None
+        width, height = extract_dimensions(src)
+        prompt = img.get("data-prompt") or alt
+        return {
+            "src": preview_image_url(prompt, width, height),
+            "width": str(width),
+            "height": str(height),
+            "data-preview": "true",
+        }
+
+    return rewrite_img_tags(code, rewrite)
@@ -1,65 +1,166 @@
+"""
+Replicate predictions client (Flux Schnell).
+
+Predictions are created with `Prefer: wait`, so Replicate holds the request
+open until the output is ready and most calls finish in a single round trip.
+If the prediction is still running when the wait ends, the client polls with
+exponential backoff until an overall deadline. One pooled HTTP client is
+shared by all calls to reuse connections, and call/poll counts and latency
+are exposed as metrics.
+"""
+
 import asyncio
+import time
+from typing import Any, Dict
+
 import httpx
 
+from config.settings import settings
+from metrics import register_metrics
+
+FLUX_SCHNELL_PREDICTIONS = "/models/black-forest-labs/flux-schnell/predictions"
+
+# Replicate accepts waits of 1-60 seconds.
+MAX_PREFER_WAIT_SECONDS = 60
+INITIAL_POLL_INTERVAL = 0.1
+MAX_POLL_INTERVAL = 2.0
+
+TERMINAL_STATUSES = ("succeeded", "failed", "canceled")
+
+
+class ReplicateStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.completed_without_polling = 0
+        self.polls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.total_seconds = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "completed_without_polling": self.completed_without_polling,
+            "polls": self.polls,
+            "avg_polls_per_call": self.polls / self.calls if self.calls else 0.0,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "avg_latency_seconds": (
+                self.total_seconds / self.calls if self.calls else 0.0
+            ),
+        }
+
+
+stats = ReplicateStats()
+register_metrics("image_generation.replicate", stats.snapshot)
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
 
-async def call_replicate(input: dict[str, str | int], api_token: str) -> str:
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Shared client; pooled connections belong to one event loop. Requests for
+    absolute URLs (e.g. downloading a generated image) can reuse it too.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=settings.REPLICATE_API_BASE_URL,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            timeout=httpx.Timeout(MAX_PREFER_WAIT_SECONDS + 10, connect=10),
+        )
+        _client_loop = loop
+    return _client
+
+
+def _output_url(prediction: Dict[str, Any]) -> str:
+    output = prediction.get("output")
+    if isinstance(output, list) and output:
+        return output[0]
+    if isinstance(output, str):
+        return output
+    raise ValueError("Prediction succeeded without output.")
+
+
+async def call_replicate(
+    input: dict[str, str | int],
+    api_token: str,
+    deadline: float | None = None,
+) -> str:
+    """Run a Flux Schnell prediction and return the first output URL."""
+    deadline = deadline if deadline is not None else settings.REPLICATE_DEADLINE_SECONDS
+    wait = max(1, min(MAX_PREFER_WAIT_SECONDS, int(deadline)))
     headers = {
         "Authorization": f"Bearer {api_token}",
         "Content-Type": "application/json",
+        "Prefer": f"wait={wait}",
     }
 
-    data = {"input": input}
+    client = get_client()
+    start_time = time.perf_counter()
+    stats.calls += 1
+    polls = 0
+    cancel_url: str | None = None
+
+    async def run() -> Dict[str, Any]:
+        nonlocal polls, cancel_url
+        response = await client.post(
+            FLUX_SCHNELL_PREDICTIONS, headers=headers, json={"input": input}
+        )
+        response.raise_for_status()
+        prediction = response.json()
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                "https://api.replicate.com/v1/models/black-forest-labs/flux-schnell/predictions",
-                headers=headers,
-                json=data,
+        prediction_id = prediction.get("id")
+        if not prediction_id:
+            raise ValueError("Prediction ID not found in initial response.")
+        urls: Dict[str, str] = prediction.get("urls") or {}
+        cancel_url = urls.get("cancel", f"/predictions/{prediction_id}/cancel")
+
+        interval = INITIAL_POLL_INTERVAL
+        while prediction.get("status") not in TERMINAL_STATUSES:
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, MAX_POLL_INTERVAL)
+            polls += 1
+
+            status_response = await client.get(
+                f"/predictions/{prediction_id}", headers=headers
             )
-            response.raise_for_status()
-            response_json = response.json()
-
-            # Extract the id from the response
-            prediction_id = response_json.get("id")
-            if not prediction_id:
-                raise ValueError("Prediction ID not found in initial response.")
-
-            # Polling every 0.1 seconds until the status is succeeded or error (upto 10s)
-            num_polls = 0
-            max_polls = 100
-            while num_polls < max_polls:
-                num_polls += 1
-
-                await asyncio.sleep(0.1)
-
-                # Check the status
-                status_check_url = (
-                    f"https://api.replicate.com/v1/predictions/{prediction_id}"
-                )
-                status_response = await client.get(status_check_url, headers=headers)
-                status_response.raise_for_status()
-                status_response_json = status_response.json()
-                status = status_response_json.get("status")
-
-                # If status is succeeded or if there's an error, break out of the loop
-                if status == "succeeded":
-                    return status_response_json["output"][0]
-                elif status == "error":
-                    raise ValueError(
-                        f"Inference errored out: {status_response_json.get('error', 'Unknown error')}"
-                    )
-                elif status == "failed":
-                    raise ValueError("Inference failed")
-
-            # If we've reached here, it means we've exceeded the max number of polls
-            raise TimeoutError("Inference timed out")
-
-        except httpx.HTTPStatusError as e:
-            raise ValueError(f"HTTP error occurred: {e}")
-        except httpx.RequestError as e:
-            raise ValueError(f"An error occurred while requesting: {e}")
-        except asyncio.TimeoutError:
-            raise TimeoutError("Request timed out")
-        except Exception as e:
-            raise ValueError(f"An unexpected error occurred: {e}")
+            status_response.raise_for_status()
+            prediction = status_response.json()
+        return prediction
+
+    try:
+        # asyncio.wait_for rather than asyncio.timeout, which needs 3.11.
+        prediction = await asyncio.wait_for(run(), deadline)
+
+        status = prediction.get("status")
+        if status == "succeeded":
+            if polls == 0:
+                stats.completed_without_polling += 1
+            return _output_url(prediction)
+        stats.failures += 1
+        raise ValueError(
+            f"Inference {status}: {prediction.get('error') or 'Unknown error'}"
+        )
+
+    except asyncio.TimeoutError:
+        stats.timeouts += 1
+        if cancel_url is not None:
+            # The prediction keeps running (and billing) on Replicate unless
+            # cancelled; this is best effort, the timeout is raised regardless.
+            try:
+                await client.post(cancel_url, headers=headers)
+            except httpx.HTTPError:
+                pass
+        raise TimeoutError(f"Inference timed out after {deadline:.0f}s")
+    except httpx.HTTPStatusError as e:
+        stats.failures += 1
+        raise ValueError(f"HTTP error occurred: {e}")
+    except httpx.RequestError as e:
+        stats.failures += 1
+        raise ValueError(f"An error occurred while requesting: {e}")
+    finally:
+        stats.polls += polls
+        stats.total_seconds += time.perf_counter() - start_time
@@ -0,0 +1,121 @@
+"""
+Map placeholder dimensions to what each image provider can generate.
+
+A 1200x300 banner generated as a 1024x1024 square gets cropped or stretched
+by the page. DALL-E 3 supports three fixed sizes and Flux Schnell a set of
+aspect ratios, so each placeholder is mapped to the closest one by aspect
+ratio. Flux also renders at 0.25 megapixels instead of 1 for placeholders
+small enough to be served from that (icons, avatars, thumbnails), which is
+a fraction of the generation time. That size bucket ("1:1", "1:1@0.25") is
+also part of the image cache key.
+
+Optionally (`IMAGE_DOWNSCALE_TO_PLACEHOLDER`), generated images are
+downscaled to twice the placeholder size so a 48x48 icon does not ship a
+1024px image.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import io
+import math
+from typing import Dict, Tuple
+
+import httpx
+from PIL import Image
+
+DALLE_SIZES = {"1024x1024": (1024, 1024), "1792x1024": (1792, 1024), "1024x1792": (1024, 1792)}
+
+FLUX_ASPECT_RATIOS = {
+    ratio: tuple(int(part) for part in ratio.split(":"))
+    for ratio in (
+        "1:1",
+        "16:9",
+        "21:9",
+        "3:2",
+        "2:3",
+        "4:5",
+        "5:4",
+        "3:4",
+        "4:3",
+        "9:16",
+        "9:21",
+    )
+}
+
+# Serve at most this multiple of the placeholder size (retina displays).
+DOWNSCALE_FACTOR = 2
+
+# Flux Schnell's `megapixels` options.
+FLUX_MEGAPIXELS = "1"
+FLUX_SMALL_MEGAPIXELS = "0.25"
+
+
+def _nearest(width: int, height: int, options: Dict[str, Tuple[int, ...]]) -> str:
+    # Compare in log space so 2:1 and 1:2 are equally far from 1:1.
+    target = math.log(max(width, 1) / max(height, 1))
+    return min(options, key=lambda key: abs(math.log(options[key][0] / options[key][1]) - target))
+
+
+def _fits_small_flux(width: int, height: int, ratio: str) -> bool:
+    """Whether a 0.25 MP image at `ratio` covers the placeholder at retina size."""
+    ratio_w, ratio_h = FLUX_ASPECT_RATIOS[ratio]
+    pixels = float(FLUX_SMALL_MEGAPIXELS) * 1024 * 1024
+    small_w = math.sqrt(pixels * ratio_w / ratio_h)
+    small_h = pixels / small_w
+    return width * DOWNSCALE_FACTOR <= small_w and height * DOWNSCALE_FACTOR <= small_h
+
+
+def provider_size(model: str, width: int, height: int) -> str:
+    """
+    The size (DALL-E) or aspect ratio (Flux) closest to `width`x`height`.
+    Small Flux placeholders get "<ratio>@0.25" (see `flux_options`).
+    """
+    if model == "dalle3":
+        return _nearest(width, height, DALLE_SIZES)
+    if model == "flux":
+        ratio = _nearest(width, height, FLUX_ASPECT_RATIOS)
+        if _fits_small_flux(width, height, ratio):
+            return f"{ratio}@{FLUX_SMALL_MEGAPIXELS}"
+        return ratio
+    return "1024x1024"
+
+
+def flux_options(size: str) -> Tuple[str, str]:
+    """(aspect_ratio, megapixels) of a Flux size bucket from `provider_size`."""
+    ratio, _, megapixels = size.partition("@")
+    return ratio, megapixels or FLUX_MEGAPIXELS
+
+
+def _downscale_bytes(data: bytes, width: int, height: int) -> str | None:
+    img = Image.open(io.BytesIO(data))
+    target = (width * DOWNSCALE_FACTOR, height * DOWNSCALE_FACTOR)
+    if img.width <= target[0] and img.height <= target[1]:
+        return None
+
+    img.thumbnail(target, Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    if img.mode in ("RGBA", "LA", "P"):
+        img.save(output, format="PNG", optimize=True)
+        mime_type = "image/png"
+    else:
+        img.convert("RGB").save(output, format="JPEG", quality=85)
+        mime_type = "image/jpeg"
+    return f"data:{mime_type};base64,{base64.b64encode(output.getvalue()).decode('utf-8')}"
+
+
+async def downscale_to_placeholder(url: str, width: int, height: int) -> str:
+    """Return `url` downscaled to fit the placeholder, or unchanged on failure."""
+    try:
+        if url.startswith("data:"):
+            data = base64.b64decode(url.split(",", 1)[1])
+        else:
+            async with httpx.AsyncClient(timeout=30) as client:
+                response = await client.get(url)
+                response.raise_for_status()
+            data = response.content
+        return await asyncio.to_thread(_downscale_bytes, data, width, height) or url
+    except Exception as e:
+        print(f"[IMAGE SIZING] downscale failed, keeping original: {e}")
+        return url
@@ -0,0 +1,161 @@
+"""
+Start image generation while the code is still streaming.
+
+`ImagePrefetcher` is fed completion chunks as they arrive. Every time a
+complete placeholder `<img>` tag (src on placehold.co) shows up, generation
+for its prompt starts right away instead of after the whole completion is
+in. `finish` is called with the final code: it picks up any placeholders the
+stream did not produce verbatim (e.g. stitched tiled output), waits only for
+the generations that are still running and returns the alt -> URL mapping,
+optionally reporting each late image as it lands so it can be patched into
+code the client already has.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import (
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from image_generation.core import (
+    PLACEHOLDER_PREFIX,
+    ImageModel,
+    extract_dimensions,
+    process_tasks,
+)
+from image_generation.html_rewriter import ImgTag, iter_img_tags, scan_streamed_img_tags
+
+
+def iter_placeholder_prompts(code: str) -> Iterator[Tuple[str, str, str]]:
+    """Yield (alt, prompt, placeholder src) for each placeholder image tag."""
+    return _placeholder_prompts(iter_img_tags(code))
+
+
+def _placeholder_prompts(tags: Iterable[ImgTag]) -> Iterator[Tuple[str, str, str]]:
+    for img in tags:
+        src, alt = img.get("src"), img.get("alt")
+        if not src or not alt or not src.startswith(PLACEHOLDER_PREFIX):
+            continue
+        yield alt, img.get("data-prompt") or alt, src
+
+
+# Called with (alt, generated url, placeholder src) for each late image.
+OnImage = Callable[[str, str, str], Awaitable[None]]
+
+
+class ImagePrefetcher:
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str],
+        model: ImageModel,
+        gemini_api_key: Optional[str] = None,
+        image_cache: Optional[Dict[str, str]] = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model: ImageModel = model
+        self.gemini_api_key = gemini_api_key
+        self.image_cache = image_cache or {}
+        self._buffer = ""
+        self._tasks: Dict[str, asyncio.Task[List[Optional[str]]]] = {}
+        self._placeholders: Dict[str, str] = {}
+        self.started_while_streaming = 0
+
+    def feed(self, chunk: str) -> None:
+        """Scan newly streamed text and start generation for complete tags."""
+        self._buffer += chunk
+        tags, resume = scan_streamed_img_tags(self._buffer)
+        self._start(_placeholder_prompts(tags))
+        self.started_while_streaming = len(self._tasks)
+        # Keep only a trailing, possibly incomplete, tag (or an open script or
+        # comment, whose images are not real) for the next chunk.
+        self._buffer = self._buffer[resume:]
+
+    def start(self, code: str) -> None:
+        """Start generation for placeholders in `code` not seen while streaming."""
+        self._start(iter_placeholder_prompts(code))
+
+    @property
+    def pending(self) -> int:
+        return sum(not task.done() for task in self._tasks.values())
+
+    def pending_alts(self) -> List[str]:
+        return [alt for alt, task in self._tasks.items() if not task.done()]
+
+    def completed(self) -> Dict[str, str]:
+        """Alt -> URL for generations that have already succeeded."""
+        results: Dict[str, str] = {}
+        for alt, task in self._tasks.items():
+            if task.done() and not task.cancelled() and task.exception() is None:
+                url = task.result()[0]
+                if url:
+                    results[alt] = url
+        return results
+
+    async def finish(
+        self,
+        code: str,
+        on_image: Optional[OnImage] = None,
+        delivered: Collection[str] = (),
+    ) -> Dict[str, str]:
+        """
+        Start anything missed while streaming and collect all results.
+
+        `on_image` is awaited, in completion order, for every generated image
+        whose alt is not in `delivered` (already shown to the client).
+        """
+        self.start(code)
+        if self._tasks:
+            print(
+                f"[IMAGE PREFETCH] {self.started_while_streaming} of {len(self._tasks)} "
+                f"images started while streaming, {self.pending} still running"
+            )
+
+        results: Dict[str, str] = {}
+        for next_done in asyncio.as_completed([self._wait(alt) for alt in self._tasks]):
+            alt, url = await next_done
+            if not url:
+                continue
+            results[alt] = url
+            if on_image is not None and alt not in delivered:
+                await on_image(alt, url, self._placeholders[alt])
+        return results
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+
+    async def _wait(self, alt: str) -> Tuple[str, Optional[str]]:
+        try:
+            return alt, (await self._tasks[alt])[0]
+        except Exception as e:
+            print(f"[IMAGE PREFETCH] generation failed for '{alt}': {e}")
+            return alt, None
+
+    def _start(self, placeholders: Iterator[Tuple[str, str, str]]) -> None:
+        for alt, prompt, src in placeholders:
+            if alt in self._tasks or self.image_cache.get(alt) is not None:
+                continue
+            self._placeholders[alt] = src
+            # Document order doubles as priority: above-the-fold images first.
+            self._tasks[alt] = asyncio.create_task(
+                process_tasks(
+                    [prompt],
+                    self.api_key,
+                    self.base_url,
+                    self.model,
+                    self.gemini_api_key,
+                    priorities=[len(self._tasks)],
+                    dimensions=[extract_dimensions(src)],
+                )
+            )
@@ -0,0 +1,153 @@
+"""
+In-memory near-duplicate lookup over perceptual hashes of recent inputs.
+
+`BKTree` answers "all hashes within Hamming distance d" without scanning every
+entry. `NearDuplicateIndex` wraps it with a bounded capacity (oldest entries are
+evicted first) and hit/latency counters so it can be exposed as metrics.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+from image_processing.perceptual_hash import ImageHashes, hamming_distance
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Node:
+    hash: int
+    keys: List[Hashable] = field(default_factory=list)
+    children: Dict[int, "_Node"] = field(default_factory=dict)
+
+
+class BKTree:
+    """Burkhard-Keller tree keyed by 64-bit hashes under Hamming distance."""
+
+    def __init__(self) -> None:
+        self._root: Optional[_Node] = None
+
+    def add(self, hash_value: int, key: Hashable) -> None:
+        if self._root is None:
+            self._root = _Node(hash_value, [key])
+            return
+        node = self._root
+        while True:
+            distance = hamming_distance(hash_value, node.hash)
+            if distance == 0:
+                node.keys.append(key)
+                return
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = _Node(hash_value, [key])
+                return
+            node = child
+
+    def search(self, hash_value: int, max_distance: int) -> List[Tuple[int, Hashable]]:
+        """Return (distance, key) pairs within `max_distance`, nearest first."""
+        if self._root is None:
+            return []
+        results: List[Tuple[int, Hashable]] = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(hash_value, node.hash)
+            if distance <= max_distance:
+                results.extend((distance, key) for key in node.keys)
+            # Triangle inequality: only children in this band can match.
+            for edge, child in node.children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        results.sort(key=lambda r: r[0])
+        return results
+
+
+class NearDuplicateIndex(Generic[T]):
+    """
+    Bounded index of recent images, looked up by perceptual similarity.
+
+    Entries are indexed by pHash in a BK-tree; a candidate is a match only if
+    its dHash is also within `max_distance` and it has the same dimensions
+    when `same_size` is requested. BK-trees do not support deletion, so
+    evicted entries are dropped from the value table and the tree is rebuilt
+    once stale keys outnumber live ones.
+    """
+
+    def __init__(self, capacity: int = 256, max_distance: int = 4):
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self._tree = BKTree()
+        self._entries: "OrderedDict[int, Tuple[ImageHashes, T]]" = OrderedDict()
+        self._next_key = 0
+        self._stale = 0
+        self._lookups = 0
+        self._hits = 0
+        self._lookup_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, hashes: ImageHashes, value: T) -> None:
+        if self.capacity <= 0:
+            return
+        key = self._next_key
+        self._next_key += 1
+        self._entries[key] = (hashes, value)
+        self._tree.add(hashes.phash, key)
+
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self._stale += 1
+        if self._stale > len(self._entries):
+            self._rebuild()
+
+    def lookup(
+        self, hashes: ImageHashes, same_size: bool = False
+    ) -> Optional[Tuple[int, T]]:
+        """Return (distance, value) of the nearest matching entry, if any."""
+        start_time = time.perf_counter()
+        self._lookups += 1
+        match: Optional[Tuple[int, T]] = None
+
+        for distance, key in self._tree.search(hashes.phash, self.max_distance):
+            entry = self._entries.get(key)  # type: ignore
+            if entry is None:
+                continue
+            candidate, value = entry
+            if hamming_distance(candidate.dhash, hashes.dhash) > self.max_distance:
+                continue
+            if same_size and (candidate.width, candidate.height) != (
+                hashes.width,
+                hashes.height,
+            ):
+                continue
+            match = (distance, value)
+            break
+
+        if match is not None:
+            self._hits += 1
+        self._lookup_seconds += time.perf_counter() - start_time
+        return match
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "max_distance": self.max_distance,
+            "lookups": self._lookups,
+            "hits": self._hits,
+            "hit_rate": self._hits / self._lookups if self._lookups else 0.0,
+            "avg_lookup_ms": (
+                1000 * self._lookup_seconds / self._lookups if self._lookups else 0.0
+            ),
+        }
+
+    def _rebuild(self) -> None:
+        self._tree = BKTree()
+        for key, (hashes, _) in self._entries.items():
+            self._tree.add(hashes.phash, key)
+        self._stale = 0
@@ -0,0 +1,80 @@
+"""
+Perceptual image hashes (dHash / pHash) computed with NumPy.
+
+Unlike a content hash, these change only slightly when an image is
+re-screenshotted, re-encoded or cropped by a few pixels, so the Hamming
+distance between two hashes measures how visually similar the images are.
+"""
+
+from __future__ import annotations
+
+import base64
+import io
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np  # type: ignore
+from PIL import Image
+
+HASH_SIZE = 8
+# pHash runs the DCT on a larger thumbnail and keeps the low frequencies.
+PHASH_IMAGE_SIZE = 32
+
+
+@dataclass(frozen=True)
+class ImageHashes:
+    dhash: int
+    phash: int
+    width: int
+    height: int
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8).ravel()).tobytes(), "big")
+
+
+def _grayscale(img: Image.Image, width: int, height: int) -> np.ndarray:
+    return np.asarray(
+        img.convert("L").resize((width, height), Image.Resampling.LANCZOS),
+        dtype=np.float32,
+    )
+
+
+@lru_cache(maxsize=4)
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0, :] = np.sqrt(1 / n)
+    return matrix
+
+
+def dhash(img: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """Difference hash: sign of horizontal gradients on a tiny thumbnail."""
+    pixels = _grayscale(img, hash_size + 1, hash_size)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(img: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """DCT hash: low-frequency coefficients compared against their median."""
+    pixels = _grayscale(img, PHASH_IMAGE_SIZE, PHASH_IMAGE_SIZE)
+    dct = _dct_matrix(PHASH_IMAGE_SIZE)
+    coefficients = (dct @ pixels @ dct.T)[:hash_size, :hash_size]
+    # Skip the DC term when picking the threshold; it dominates the median.
+    median = np.median(coefficients.ravel()[1:])
+    return _bits_to_int(coefficients > median)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def compute_hashes(img: Image.Image) -> ImageHashes:
+    return ImageHashes(
+        dhash=dhash(img), phash=phash(img), width=img.width, height=img.height
+    )
+
+
+def hash_data_url(image_data_url: str) -> ImageHashes:
+    base64_data = image_data_url.split(",", 1)[1]
+    return compute_hashes(Image.open(io.BytesIO(base64.b64decode(base64_data))))
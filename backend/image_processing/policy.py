@@ -0,0 +1,152 @@
+"""
+Provider-aware image pre-sizing for prompt images.
+
+Providers downscale large images on their side (see `ModelRegistry` image
+policies), so uploading a full-resolution full-page screenshot only costs bytes
+and latency. `apply_image_policy` resizes every data URL image in a prompt to
+the provider's limits once, before the prompt is sent, and reports how many
+bytes were saved and roughly how many input tokens the images will cost.
+"""
+
+from __future__ import annotations
+
+import base64
+import copy
+import io
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from openai.types.chat import ChatCompletionMessageParam
+from PIL import Image
+
+from models.registry import ImagePolicy, Provider
+
+_PIL_FORMATS = {"png": "PNG", "jpeg": "JPEG", "webp": "WEBP"}
+
+
+@dataclass
+class ImagePolicyReport:
+    images: int = 0
+    resized: int = 0
+    original_bytes: int = 0
+    final_bytes: int = 0
+    estimated_tokens: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.final_bytes
+
+    def summary(self) -> str:
+        return (
+            f"{self.images} images, {self.resized} resized, "
+            f"{self.bytes_saved} bytes saved "
+            f"({self.original_bytes} -> {self.final_bytes}), "
+            f"~{self.estimated_tokens} image tokens"
+        )
+
+
+def fit_to_policy(width: int, height: int, policy: ImagePolicy) -> Tuple[int, int]:
+    """Return the largest size <= (width, height) that satisfies the policy."""
+    scale = min(
+        1.0,
+        policy.max_long_edge / max(width, height),
+        math.sqrt(policy.max_pixels / (width * height)),
+    )
+    if scale >= 1.0:
+        return width, height
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def estimate_image_tokens(provider: Provider, width: int, height: int) -> int:
+    """Approximate input tokens an image of this (already fitted) size costs."""
+    if provider == "openai":
+        # High detail: fit in 2048x2048, short side to 768, then 512px tiles.
+        scale = min(1.0, 2048 / max(width, height))
+        w, h = width * scale, height * scale
+        scale = min(1.0, 768 / min(w, h))
+        w, h = w * scale, h * scale
+        return 85 + 170 * math.ceil(w / 512) * math.ceil(h / 512)
+    if provider == "anthropic":
+        return math.ceil(width * height / 750)
+    # Gemini: small images are a single tile, otherwise 768px tiles.
+    if width <= 384 and height <= 384:
+        return 258
+    return 258 * math.ceil(width / 768) * math.ceil(height / 768)
+
+
+def _resize_data_url(
+    image_data_url: str, policy: ImagePolicy, provider: Provider
+) -> Tuple[str, int, int, int]:
+    """Returns (data_url, original_bytes, final_bytes, estimated_tokens)."""
+    base64_data = image_data_url.split(",", 1)[1]
+    image_bytes = base64.b64decode(base64_data)
+    img = Image.open(io.BytesIO(image_bytes))
+
+    new_width, new_height = fit_to_policy(img.width, img.height, policy)
+    tokens = estimate_image_tokens(provider, new_width, new_height)
+    if (new_width, new_height) == (img.width, img.height):
+        return image_data_url, len(image_bytes), len(image_bytes), tokens
+
+    img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    if policy.preferred_format == "jpeg" and img.mode != "RGB":
+        img = img.convert("RGB")
+
+    output = io.BytesIO()
+    img.save(output, format=_PIL_FORMATS[policy.preferred_format])
+    new_b64 = base64.b64encode(output.getvalue()).decode("utf-8")
+    return (
+        f"data:image/{policy.preferred_format};base64,{new_b64}",
+        len(image_bytes),
+        len(output.getvalue()),
+        tokens,
+    )
+
+
+def apply_image_policy(
+    messages: List[ChatCompletionMessageParam],
+    policy: ImagePolicy,
+    provider: Provider,
+) -> Tuple[List[ChatCompletionMessageParam], ImagePolicyReport]:
+    """
+    Resize every data URL image in `messages` to fit `policy`.
+
+    The input messages are not modified. Identical images are processed once.
+    Non-data URLs are left untouched and not counted.
+    """
+    start_time = time.time()
+    report = ImagePolicyReport()
+    processed: Dict[str, Tuple[str, int, int, int]] = {}
+    result = copy.deepcopy(messages)
+
+    for message in result:
+        content = message.get("content")
+        if not isinstance(content, list):
+            continue
+        for part in content:
+            if part.get("type") != "image_url":  # type: ignore
+                continue
+            image_url = part["image_url"]  # type: ignore
+            url = image_url["url"]
+            if not url.startswith("data:"):
+                continue
+
+            if url not in processed:
+                processed[url] = _resize_data_url(url, policy, provider)
+            new_url, original_bytes, final_bytes, tokens = processed[url]
+
+            report.images += 1
+            report.original_bytes += original_bytes
+            report.final_bytes += final_bytes
+            report.estimated_tokens += tokens
+            if new_url != url:
+                report.resized += 1
+                image_url["url"] = new_url
+
+    if report.images:
+        print(
+            f"[IMAGE POLICY] {provider}: {report.summary()} "
+            f"in {time.time() - start_time:.2f} seconds"
+        )
+    return result, report
@@ -0,0 +1,110 @@
+"""
+Split tall screenshots into vertical sections at whitespace bands.
+
+Long full-page screenshots are the slowest to generate because one stream has
+to emit the whole page. Cutting the page into sections lets each section be
+generated concurrently. Cuts are placed in low-content rows (rows whose pixel
+variance is near zero) so that no visible element is sliced in half.
+"""
+
+from __future__ import annotations
+
+import base64
+import io
+from typing import List
+
+import numpy as np  # type: ignore
+from PIL import Image
+
+# Sections taller than this are split further.
+MAX_SECTION_HEIGHT = 1600
+# Never produce a section shorter than this (except for the page remainder).
+MIN_SECTION_HEIGHT = 400
+# A row counts as "empty" when its grayscale variance is below this.
+EMPTY_ROW_VARIANCE = 4.0
+# Minimum height of a run of empty rows to be considered a whitespace band.
+MIN_BAND_HEIGHT = 6
+
+
+def _row_variance(gray: np.ndarray) -> np.ndarray:
+    return gray.astype(np.float32).var(axis=1)
+
+
+def _whitespace_bands(row_var: np.ndarray) -> List[tuple[int, int]]:
+    """Return (start, end) row ranges of consecutive low-variance rows."""
+    empty = (row_var < EMPTY_ROW_VARIANCE).astype(np.int8)
+    # Rising/falling edges of the boolean mask mark band boundaries.
+    edges = np.diff(np.concatenate(([0], empty, [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return [
+        (int(s), int(e))
+        for s, e in zip(starts, ends)
+        if e - s >= MIN_BAND_HEIGHT
+    ]
+
+
+def find_section_breaks(
+    gray: np.ndarray,
+    max_section_height: int = MAX_SECTION_HEIGHT,
+    min_section_height: int = MIN_SECTION_HEIGHT,
+) -> List[int]:
+    """
+    Return the row indices at which a grayscale image should be cut.
+
+    Within each window of allowed cut positions the widest whitespace band
+    wins; when a window has no band, the cut falls on the lowest-variance row.
+    """
+    height = gray.shape[0]
+    if height <= max_section_height:
+        return []
+
+    row_var = _row_variance(gray)
+    bands = _whitespace_bands(row_var)
+    breaks: List[int] = []
+    start = 0
+
+    while height - start > max_section_height:
+        lo = start + min_section_height
+        hi = start + max_section_height
+        candidates = [
+            (e - s, (s + e) // 2) for s, e in bands if lo <= (s + e) // 2 <= hi
+        ]
+        if candidates:
+            cut = max(candidates)[1]
+        else:
+            cut = lo + int(np.argmin(row_var[lo:hi]))
+        breaks.append(cut)
+        start = cut
+
+    return breaks
+
+
+def split_screenshot(
+    image_data_url: str,
+    max_section_height: int = MAX_SECTION_HEIGHT,
+    min_section_height: int = MIN_SECTION_HEIGHT,
+) -> List[str]:
+    """
+    Split a screenshot data URL into PNG data URLs of vertical sections.
+
+    Returns a single-element list with the original URL if no split is needed.
+    """
+    base64_data = image_data_url.split(",", 1)[1]
+    img = Image.open(io.BytesIO(base64.b64decode(base64_data)))
+    gray = np.asarray(img.convert("L"))
+
+    breaks = find_section_breaks(gray, max_section_height, min_section_height)
+    if not breaks:
+        return [image_data_url]
+
+    sections: List[str] = []
+    bounds = [0, *breaks, img.height]
+    for top, bottom in zip(bounds, bounds[1:]):
+        output = io.BytesIO()
+        img.crop((0, top, img.width, bottom)).save(output, format="PNG")
+        b64 = base64.b64encode(output.getvalue()).decode("utf-8")
+        sections.append(f"data:image/png;base64,{b64}")
+
+    print(f"[TILING] split {img.width}x{img.height} screenshot at rows {breaks}")
+    return sections
@@ -14,7 +14,7 @@ load_dotenv()
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config import CORS_ALLOW_ORIGINS, IS_PROD
-from routes import screenshot, generate_code, home, evals, models
+from routes import screenshot, generate_code, home, evals, models, metrics, assets
 
 app = FastAPI(openapi_url=None, docs_url=None, redoc_url=None)
 
@@ -48,3 +48,5 @@ app.include_router(screenshot.router)
 app.include_router(home.router)
 app.include_router(evals.router)
 app.include_router(models.router)
+app.include_router(metrics.router)
+app.include_router(assets.router)
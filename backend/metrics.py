@@ -0,0 +1,20 @@
+"""
+Process-wide metrics registry.
+
+Components that keep their own counters (caches, indexes, provider adapters)
+register a snapshot function here; `/api/metrics` returns all snapshots.
+"""
+
+from typing import Any, Callable, Dict
+
+MetricsSource = Callable[[], Dict[str, Any]]
+
+_sources: Dict[str, MetricsSource] = {}
+
+
+def register_metrics(name: str, source: MetricsSource) -> None:
+    _sources[name] = source
+
+
+def metrics_snapshot() -> Dict[str, Dict[str, Any]]:
+    return {name: source() for name, source in _sources.items()}
@@ -8,7 +8,7 @@ from debug.DebugFileWriter import DebugFileWriter
 from image_processing.utils import process_image
 from utils import pprint_prompt
 from llm import Completion, Llm
-from models.registry import ModelRegistry
+from models.registry import ComplexityTier, ModelRegistry
 
 
 def convert_openai_messages_to_claude(
@@ -62,12 +62,13 @@ async def stream_claude_response(
     api_key: str,
     callback: Callable[[str], Awaitable[None]],
     model_name: str,
+    complexity_tier: ComplexityTier | None = None,
 ) -> Completion:
     start_time = time.time()
     client = AsyncAnthropic(api_key=api_key)
 
     llm = ModelRegistry.from_name(model_name)
-    cfg = ModelRegistry.anthropic_params(llm)
+    cfg = ModelRegistry.anthropic_params(llm, complexity_tier)
 
     # Translate OpenAI messages to Claude messages
 
@@ -5,7 +5,7 @@ from openai.types.chat import ChatCompletionMessageParam
 from google import genai
 from google.genai import types
 from llm import Completion, Llm
-from models.registry import ModelRegistry
+from models.registry import ComplexityTier, ModelRegistry
 
 
 def extract_image_from_messages(
@@ -42,6 +42,7 @@ async def stream_gemini_response(
     api_key: str,
     callback: Callable[[str], Awaitable[None]],
     model_name: str,
+    complexity_tier: ComplexityTier | None = None,
 ) -> Completion:
     start_time = time.time()
 
@@ -52,7 +53,7 @@ async def stream_gemini_response(
     full_response = ""
 
     llm = ModelRegistry.from_name(model_name)
-    cfg = ModelRegistry.gemini_params(llm)
+    cfg = ModelRegistry.gemini_params(llm, complexity_tier)
 
     thinking_config = None
     if cfg.thinking_budget is not None:
@@ -3,7 +3,7 @@ from typing import Awaitable, Callable, List
 from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletionMessageParam, ChatCompletionChunk
 from llm import Completion
-from models.registry import ModelRegistry
+from models.registry import ComplexityTier, ModelRegistry
 
 
 async def stream_openai_response(
@@ -12,6 +12,7 @@ async def stream_openai_response(
     base_url: str | None,
     callback: Callable[[str], Awaitable[None]],
     model_name: str,
+    complexity_tier: ComplexityTier | None = None,
 ) -> Completion:
     start_time = time.time()
     client = AsyncOpenAI(api_key=api_key, base_url=base_url)
@@ -20,7 +21,7 @@ async def stream_openai_response(
     params = {"model": model_name, "messages": messages, "timeout": 600}
 
     llm = ModelRegistry.from_name(model_name)
-    cfg = ModelRegistry.openai_params(llm)
+    cfg = ModelRegistry.openai_params(llm, complexity_tier)
 
     if cfg.supports_streaming:
         params["stream"] = True
@@ -11,7 +11,7 @@ This module centralizes:
 Streaming clients read their model-specific parameters from here.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Dict, Literal, Optional, Sequence, Set
 
 from custom_types import InputMode
@@ -19,6 +19,34 @@ from llm import Llm, MODEL_PROVIDER
 
 Provider = Literal["openai", "anthropic", "gemini"]
 GenerationType = Literal["create", "update"]
+ImageFormat = Literal["png", "jpeg", "webp"]
+# Coarse difficulty of the input screenshot (see `image_analysis.complexity`).
+ComplexityTier = Literal["simple", "standard", "complex"]
+
+# Output budgets for "simple" inputs are scaled by this factor, but never
+# below the floor (or the model's own limit, if that is lower).
+SIMPLE_TIER_BUDGET_SCALE = 0.5
+SIMPLE_TIER_MIN_OUTPUT_TOKENS = 8192
+SIMPLE_TIER_MIN_THINKING_TOKENS = 2048
+_LOWER_REASONING_EFFORT = {"high": "medium", "medium": "low", "low": "low"}
+
+
+def _scaled(value: int, floor: int) -> int:
+    return max(min(value, floor), int(value * SIMPLE_TIER_BUDGET_SCALE))
+
+
+@dataclass(frozen=True)
+class ImagePolicy:
+    """
+    Upper bounds past which a provider downscales input images on its side.
+
+    Pixels beyond these limits are discarded upstream, so prompt images are
+    resized to fit before upload (see `image_processing.policy`).
+    """
+
+    max_long_edge: int
+    max_pixels: int
+    preferred_format: ImageFormat = "png"
 
 
 @dataclass(frozen=True)
@@ -57,6 +85,7 @@ class ModelInfo:
     openai: Optional[OpenAIParams] = None
     anthropic: Optional[AnthropicParams] = None
     gemini: Optional[GeminiParams] = None
+    image_policy: Optional[ImagePolicy] = None
 
 
 class ModelRegistry:
@@ -64,12 +93,26 @@ class ModelRegistry:
     _DEFAULT_ANTHROPIC = AnthropicParams()
     _DEFAULT_GEMINI = GeminiParams()
 
+    # OpenAI fits "high" detail images into 2048x2048, then scales the short
+    # side down to 768px.
+    _OPENAI_IMAGE_POLICY = ImagePolicy(max_long_edge=2048, max_pixels=2048 * 768)
+    # Claude resizes anything over ~1568px on the long edge / ~1.15 megapixels.
+    _ANTHROPIC_IMAGE_POLICY = ImagePolicy(max_long_edge=1568, max_pixels=1_150_000)
+    # Gemini tiles at 768px; very large inputs are scaled down to 3072px.
+    _GEMINI_IMAGE_POLICY = ImagePolicy(max_long_edge=3072, max_pixels=3072 * 3072)
+
     # Latest models per provider used for fallback selection.
     LATEST_BY_PROVIDER: Dict[Provider, Llm] = {
         "openai": Llm.GPT_5,
         "anthropic": Llm.CLAUDE_4_5_OPUS_2025_11_01,
         "gemini": Llm.GEMINI_3_PRO,
     }
+    # Faster models per provider used for fallback selection on simple inputs.
+    FAST_BY_PROVIDER: Dict[Provider, Llm] = {
+        "openai": Llm.GPT_4_1_MINI_2025_04_14,
+        "anthropic": Llm.CLAUDE_4_5_SONNET_2025_11_01,
+        "gemini": Llm.GEMINI_2_5_FLASH_PREVIEW_05_20,
+    }
 
     _MODELS: Dict[Llm, ModelInfo] = {}
 
@@ -83,6 +126,7 @@ class ModelRegistry:
                 supports_input_modes={"text", "image"},
                 supports_generation_types={"create", "update"},
                 openai=_DEFAULT_OPENAI,
+                image_policy=_OPENAI_IMAGE_POLICY,
             )
         elif provider == "anthropic":
             _MODELS[llm] = ModelInfo(
@@ -91,6 +135,7 @@ class ModelRegistry:
                 supports_input_modes={"text", "image", "video"},
                 supports_generation_types={"create", "update"},
                 anthropic=_DEFAULT_ANTHROPIC,
+                image_policy=_ANTHROPIC_IMAGE_POLICY,
             )
         elif provider == "gemini":
             _MODELS[llm] = ModelInfo(
@@ -99,6 +144,7 @@ class ModelRegistry:
                 supports_input_modes={"image"},
                 supports_generation_types={"create"},
                 gemini=_DEFAULT_GEMINI,
+                image_policy=_GEMINI_IMAGE_POLICY,
             )
 
     # OpenAI overrides
@@ -241,6 +287,14 @@ class ModelRegistry:
     def latest_for_provider(cls, provider: Provider) -> Llm:
         return cls.LATEST_BY_PROVIDER[provider]
 
+    @classmethod
+    def fallback_for_provider(
+        cls, provider: Provider, tier: Optional[ComplexityTier] = None
+    ) -> Llm:
+        if tier == "simple":
+            return cls.FAST_BY_PROVIDER[provider]
+        return cls.LATEST_BY_PROVIDER[provider]
+
     @classmethod
     def is_compatible(
         cls, llm: Llm, generation_type: GenerationType, input_mode: InputMode
@@ -251,24 +305,83 @@ class ModelRegistry:
             and input_mode in info.supports_input_modes
         )
 
+    # Token budgets are only reduced for "simple" inputs; "standard" and
+    # "complex" inputs use the model's configured limits.
+
     @classmethod
-    def openai_params(cls, llm: Llm) -> OpenAIParams:
+    def openai_params(
+        cls, llm: Llm, tier: Optional[ComplexityTier] = None
+    ) -> OpenAIParams:
         info = cls.get(llm)
         if info.openai is None:
             raise ValueError(f"{llm.value} is not an OpenAI model")
-        return info.openai
+        cfg = info.openai
+        if tier != "simple":
+            return cfg
+        return replace(
+            cfg,
+            max_tokens=(
+                _scaled(cfg.max_tokens, SIMPLE_TIER_MIN_OUTPUT_TOKENS)
+                if cfg.max_tokens is not None
+                else None
+            ),
+            max_completion_tokens=(
+                _scaled(cfg.max_completion_tokens, SIMPLE_TIER_MIN_OUTPUT_TOKENS)
+                if cfg.max_completion_tokens is not None
+                else None
+            ),
+            reasoning_effort=(
+                _LOWER_REASONING_EFFORT[cfg.reasoning_effort]  # type: ignore
+                if cfg.reasoning_effort is not None
+                else None
+            ),
+        )
 
     @classmethod
-    def anthropic_params(cls, llm: Llm) -> AnthropicParams:
+    def anthropic_params(
+        cls, llm: Llm, tier: Optional[ComplexityTier] = None
+    ) -> AnthropicParams:
         info = cls.get(llm)
         if info.anthropic is None:
             raise ValueError(f"{llm.value} is not an Anthropic model")
-        return info.anthropic
+        cfg = info.anthropic
+        if tier != "simple":
+            return cfg
+        return replace(
+            cfg,
+            max_tokens=_scaled(cfg.max_tokens, SIMPLE_TIER_MIN_OUTPUT_TOKENS),
+            thinking_budget_tokens=(
+                _scaled(cfg.thinking_budget_tokens, SIMPLE_TIER_MIN_THINKING_TOKENS)
+                if cfg.thinking_budget_tokens is not None
+                else None
+            ),
+        )
 
     @classmethod
-    def gemini_params(cls, llm: Llm) -> GeminiParams:
+    def gemini_params(
+        cls, llm: Llm, tier: Optional[ComplexityTier] = None
+    ) -> GeminiParams:
         info = cls.get(llm)
         if info.gemini is None:
             raise ValueError(f"{llm.value} is not a Gemini model")
-        return info.gemini
+        cfg = info.gemini
+        if tier != "simple":
+            return cfg
+        return replace(
+            cfg,
+            max_output_tokens=_scaled(
+                cfg.max_output_tokens, SIMPLE_TIER_MIN_OUTPUT_TOKENS
+            ),
+            thinking_budget=(
+                _scaled(cfg.thinking_budget, SIMPLE_TIER_MIN_THINKING_TOKENS)
+                if cfg.thinking_budget is not None
+                else None
+            ),
+        )
 
+    @classmethod
+    def image_policy(cls, llm: Llm) -> ImagePolicy:
+        info = cls.get(llm)
+        if info.image_policy is None:
+            raise ValueError(f"{llm.value} has no image policy")
+        return info.image_policy
@@ -7,6 +7,8 @@ from fastapi import WebSocket
 from openai.types.chat import ChatCompletionMessageParam
 
 from custom_types import InputMode
+from image_analysis.complexity import ImageComplexity
+from image_analysis.sprite_atlas import SpriteAtlas
 from llm import Llm
 from pipeline.ws import WebSocketCommunicator
 from prompts.types import PromptContent, Stack
@@ -36,6 +38,12 @@ class PipelineContext:
     metadata: Dict[str, Any] = field(default_factory=dict)
     extracted_elements: Dict[str, Any] | None = None
     element_assets: Dict[str, str] = field(default_factory=dict)
+    layout_skeleton: str | None = None
+    sprite_atlas: SpriteAtlas | None = None
+    section_prompts: List[List[ChatCompletionMessageParam]] = field(
+        default_factory=list
+    )
+    image_complexity: ImageComplexity | None = None
 
     @property
     def send_message(self):
@@ -64,3 +72,4 @@ class ExtractedParams:
     code_generation_model: str | None = None
     analysis_model: str | None = None
     use_element_extraction: bool = False
+    use_tiled_generation: bool = False
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+import asyncio
 import traceback
 from typing import Awaitable, Callable
 
 from pipeline.core import Middleware
 from pipeline.ws import WebSocketCommunicator
 from config import NUM_VARIANTS, SHOULD_MOCK_AI_RESPONSE
+from config.settings import settings
+from image_analysis.complexity import analyze_complexity
+from image_analysis.sprite_atlas import SPRITE_STACKS
 
 from pipeline.codegen.context import PipelineContext
 from pipeline.codegen.stages.image_analysis import ImageAnalysisStage
+from pipeline.codegen.stages.layout_skeleton import LayoutSkeletonStage
 from pipeline.codegen.stages.mock_response import MockResponseStage
 from pipeline.codegen.stages.model_selection import ModelSelectionStage
 from pipeline.codegen.stages.parallel_generation import ParallelGenerationStage
@@ -86,10 +91,19 @@ class PromptCreationMiddleware(Middleware[PipelineContext]):
                 openai_api_key=context.extracted_params.openai_api_key,
                 anthropic_api_key=context.extracted_params.anthropic_api_key,
                 gemini_api_key=context.extracted_params.gemini_api_key,
+                sprite_sheets=(
+                    settings.ASSET_SPRITES_ENABLED
+                    and context.extracted_params.stack in SPRITE_STACKS
+                ),
             )
 
             context.extracted_elements = elements_data
             context.element_assets = element_assets
+            context.sprite_atlas = image_analysis_stage.sprite_atlas
+            if settings.LAYOUT_SKELETON_ENABLED:
+                context.layout_skeleton = LayoutSkeletonStage().build(
+                    elements_data, context.extracted_params.stack, element_assets
+                )
 
             prompt_creator = PromptCreationStage(context.throw_error)
             context.prompt_messages, context.image_cache = (
@@ -97,6 +111,7 @@ class PromptCreationMiddleware(Middleware[PipelineContext]):
                     context.extracted_params,
                     elements_data=elements_data,
                     element_assets=element_assets,
+                    layout_skeleton=context.layout_skeleton,
                 )
             )
         else:
@@ -104,6 +119,10 @@ class PromptCreationMiddleware(Middleware[PipelineContext]):
             context.prompt_messages, context.image_cache = (
                 await prompt_creator.create_prompt(context.extracted_params)
             )
+            if context.extracted_params.use_tiled_generation:
+                context.section_prompts = await prompt_creator.create_section_prompts(
+                    context.extracted_params
+                )
 
         await next_func()
 
@@ -132,6 +151,13 @@ class CodeGenerationMiddleware(Middleware[PipelineContext]):
                         context.extracted_params.anthropic_api_key,
                     )
                 else:
+                    await self._analyze_complexity(context)
+                    complexity_tier = (
+                        context.image_complexity.tier
+                        if context.image_complexity
+                        else None
+                    )
+
                     model_selector = ModelSelectionStage(context.throw_error)
                     context.variant_models = await model_selector.select_models(
                         generation_type=context.extracted_params.generation_type,
@@ -140,6 +166,7 @@ class CodeGenerationMiddleware(Middleware[PipelineContext]):
                         anthropic_api_key=context.extracted_params.anthropic_api_key,
                         gemini_api_key=context.extracted_params.gemini_api_key,
                         preferred_model=context.extracted_params.code_generation_model,
+                        complexity_tier=complexity_tier,
                     )
 
                     generation_stage = ParallelGenerationStage(
@@ -149,6 +176,8 @@ class CodeGenerationMiddleware(Middleware[PipelineContext]):
                         anthropic_api_key=context.extracted_params.anthropic_api_key,
                         gemini_api_key=context.extracted_params.gemini_api_key,
                         should_generate_images=context.extracted_params.should_generate_images,
+                        complexity_tier=complexity_tier,
+                        sprite_atlas=context.sprite_atlas,
                     )
 
                     context.variant_completions = (
@@ -157,6 +186,7 @@ class CodeGenerationMiddleware(Middleware[PipelineContext]):
                             prompt_messages=context.prompt_messages,
                             image_cache=context.image_cache,
                             params=context.params,
+                            section_prompts=context.section_prompts,
                         )
                     )
 
@@ -179,6 +209,20 @@ class CodeGenerationMiddleware(Middleware[PipelineContext]):
 
         await next_func()
 
+    async def _analyze_complexity(self, context: PipelineContext) -> None:
+        assert context.extracted_params is not None
+        images = context.extracted_params.prompt["images"]
+        if context.extracted_params.input_mode != "image" or not images:
+            return
+        try:
+            context.image_complexity = await asyncio.to_thread(
+                analyze_complexity, images[0]
+            )
+            print(f"Image complexity: {context.image_complexity}")
+        except Exception as e:
+            # Only a routing hint; never fail the generation over it.
+            print(f"Image complexity analysis failed: {e}")
+
 
 class PostProcessingMiddleware(Middleware[PipelineContext]):
     """Handles post-processing and logging."""
@@ -1,4 +1,5 @@
 from pipeline.codegen.stages.image_analysis import ImageAnalysisStage
+from pipeline.codegen.stages.layout_skeleton import LayoutSkeletonStage
 from pipeline.codegen.stages.mock_response import MockResponseStage
 from pipeline.codegen.stages.model_selection import ModelSelectionStage
 from pipeline.codegen.stages.parallel_generation import ParallelGenerationStage
@@ -11,6 +12,7 @@ __all__ = [
     "ParameterExtractionStage",
     "ModelSelectionStage",
     "ImageAnalysisStage",
+    "LayoutSkeletonStage",
     "PromptCreationStage",
     "MockResponseStage",
     "VideoGenerationStage",
@@ -1,10 +1,49 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Coroutine, Dict, List, Tuple
+import asyncio
+import copy
+import time
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
 
+from assets import shorten_image_url
+from config.settings import settings
 from llm import Llm
+from metrics import register_metrics
 from pipeline.types import MessageType
-from image_analysis import extract_elements, extract_elements_as_assets
+from image_analysis import (
+    LOCAL_ANALYSIS_MODEL,
+    AssetExtractor,
+    detect_elements,
+    extract_elements,
+)
+from image_analysis.result_cache import AnalysisResult, Progress, get_analysis_cache
+from image_analysis.spatial_index import prune_redundant_elements
+from image_analysis.sprite_atlas import SpriteAtlas, pack_sprites
+from image_analysis.tiled_analysis import (
+    AnalysisTile,
+    extract_elements_tiled,
+    plan_analysis_tiles,
+)
+from image_processing.near_duplicates import NearDuplicateIndex
+from image_processing.perceptual_hash import hash_data_url
+
+# Recent element extractions per analysis model. A re-uploaded screenshot
+# with trivial differences (re-capture, re-encode) reuses the elements found
+# for its near-duplicate instead of paying for another LLM analysis call.
+# Opt-in (NEAR_DUPLICATE_INDEX_SIZE): the hashes see a 32x32 thumbnail, so two
+# different pages sharing a layout can match and swap text and boxes.
+_recent_analyses: Dict[str, NearDuplicateIndex[Dict[str, Any]]] = {}
+
+
+def _analysis_index(analysis_model: str) -> NearDuplicateIndex[Dict[str, Any]]:
+    if analysis_model not in _recent_analyses:
+        index: NearDuplicateIndex[Dict[str, Any]] = NearDuplicateIndex(
+            capacity=settings.NEAR_DUPLICATE_INDEX_SIZE,
+            max_distance=settings.NEAR_DUPLICATE_MAX_DISTANCE,
+        )
+        _recent_analyses[analysis_model] = index
+        register_metrics(f"near_duplicates.elements.{analysis_model}", index.stats)
+    return _recent_analyses[analysis_model]
 
 
 class ImageAnalysisStage:
@@ -17,6 +56,8 @@ class ImageAnalysisStage:
     ):
         self.send_message = send_message
         self.throw_error = throw_error
+        # Set by analyze_image when sprite packing is requested and pays off.
+        self.sprite_atlas: SpriteAtlas | None = None
 
     async def analyze_image(
         self,
@@ -25,6 +66,7 @@ class ImageAnalysisStage:
         openai_api_key: str | None,
         anthropic_api_key: str | None,
         gemini_api_key: str | None,
+        sprite_sheets: bool = False,
     ) -> Tuple[Dict[str, Any], Dict[str, str]]:
         try:
             await self.send_message(
@@ -36,28 +78,213 @@ class ImageAnalysisStage:
                 if llm.value == analysis_model:
                     analysis_llm = llm
                     break
-            if analysis_llm is None:
+            if analysis_llm is None and analysis_model != LOCAL_ANALYSIS_MODEL:
                 raise ValueError(f"Invalid analysis model: {analysis_model}")
 
-            await self.send_message("status", "Extracting design elements...", 0)
+            # Tiled results differ from whole-image ones (IDs, box precision),
+            # so they are cached and matched under their own key.
+            tiles: List[AnalysisTile] = []
+            analysis_key = analysis_model
+            if analysis_llm is not None and settings.ANALYSIS_TILING_ENABLED:
+                tiles = await asyncio.to_thread(plan_analysis_tiles, image_data_url)
+                if len(tiles) > 1:
+                    analysis_key = f"{analysis_model}:tiled"
+                else:
+                    tiles = []
+
+            # May be shared with concurrent identical requests, so it only
+            # reports progress through `progress`, never to this client.
+            async def run(progress: Progress) -> AnalysisResult:
+                if analysis_llm is None:
+                    return await self._detect_locally(image_data_url, progress)
+                return await self._extract_with_llm(
+                    image_data_url,
+                    analysis_key,
+                    analysis_llm,
+                    openai_api_key,
+                    anthropic_api_key,
+                    gemini_api_key,
+                    tiles,
+                    progress,
+                )
+
+            async def status(message: str) -> None:
+                await self.send_message("status", message, 0)
+
+            cache = get_analysis_cache()
+            if cache is None:
+                elements_data, element_assets = await run(status)
+            else:
+                # Local detection needs no credentials; LLM results are only
+                # shared between callers with the same keys.
+                api_keys = (
+                    (openai_api_key, anthropic_api_key, gemini_api_key)
+                    if analysis_llm is not None
+                    else ()
+                )
+                (elements_data, element_assets), cached = await cache.get_or_compute(
+                    image_data_url, analysis_key, run, api_keys, on_progress=status
+                )
+                if cached:
+                    print(f"Reusing cached {analysis_model} analysis of this screenshot")
+                    await self.send_message(
+                        "status", "Reusing the cached analysis of this screenshot...", 0
+                    )
+
+            if sprite_sheets:
+                await self._pack_sprites(element_assets)
+            return elements_data, await self._publish_assets(element_assets)
+        except Exception as e:
+            await self.throw_error(f"Error during image analysis: {str(e)}")
+            raise
+
+    async def _detect_locally(
+        self, image_data_url: str, progress: Progress
+    ) -> AnalysisResult:
+        # Deterministic and fast, so neither an LLM nor the near-duplicate
+        # index is involved.
+        await progress("Detecting design elements locally...")
+        start = time.perf_counter()
+        elements_data = await asyncio.to_thread(detect_elements, image_data_url)
+        print(
+            f"Local element detection: {len(elements_data['elements'])} elements "
+            f"in {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+        return elements_data, await self._extract_assets(
+            image_data_url, elements_data, progress
+        )
+
+    async def _extract_with_llm(
+        self,
+        image_data_url: str,
+        analysis_model: str,
+        analysis_llm: Llm,
+        openai_api_key: str | None,
+        anthropic_api_key: str | None,
+        gemini_api_key: str | None,
+        tiles: List[AnalysisTile],
+        progress: Progress,
+    ) -> AnalysisResult:
+        index = (
+            _analysis_index(analysis_model)
+            if settings.NEAR_DUPLICATE_INDEX_SIZE > 0
+            else None
+        )
+        hashes = (
+            await asyncio.to_thread(hash_data_url, image_data_url)
+            if index is not None
+            else None
+        )
+        # Coordinates only carry over when the dimensions match exactly.
+        match = (
+            index.lookup(hashes, same_size=True)
+            if index is not None and hashes is not None
+            else None
+        )
+        if match is not None:
+            distance, cached = match
+            print(f"Reusing elements of a near-duplicate image (distance {distance})")
+            await progress("Reusing elements from a near-identical image...")
+            elements_data = copy.deepcopy(cached)
+            return elements_data, await self._extract_assets(
+                image_data_url, elements_data, progress
+            )
+
+        await progress(
+            f"Extracting design elements from {len(tiles)} tiles..."
+            if tiles
+            else "Extracting design elements..."
+        )
+        # Cut assets out while the model is still listing elements.
+        extractor = AssetExtractor(image_data_url)
+        streamed = 0
+
+        async def on_element(element: Dict[str, Any]) -> None:
+            nonlocal streamed
+            streamed += 1
+            await extractor.add(element)
+            await progress(f"Found {streamed} elements, extracting assets as they arrive...")
+
+        if tiles:
+            elements_data = await extract_elements_tiled(
+                image_data_url,
+                tiles,
+                analysis_llm,
+                openai_api_key=openai_api_key,
+                anthropic_api_key=anthropic_api_key,
+                gemini_api_key=gemini_api_key,
+                on_element=on_element,
+            )
+        else:
+            # Not capped: the per-provider limiter only bounds tile bursts.
             elements_data = await extract_elements(
                 image_data_url=image_data_url,
                 analysis_model=analysis_llm,
                 openai_api_key=openai_api_key,
                 anthropic_api_key=anthropic_api_key,
                 gemini_api_key=gemini_api_key,
+                on_element=on_element,
             )
+        if index is not None and hashes is not None:
+            index.add(hashes, copy.deepcopy(elements_data))
+        return elements_data, await self._extract_assets(
+            image_data_url, elements_data, progress, extractor
+        )
 
-            await self.send_message("status", "Extracting elements as assets...", 0)
-            element_assets = await extract_elements_as_assets(
-                original_image_data_url=image_data_url,
-                elements_data=elements_data,
-            )
+    async def _extract_assets(
+        self,
+        image_data_url: str,
+        elements_data: Dict[str, Any],
+        progress: Progress,
+        extractor: Optional[AssetExtractor] = None,
+    ) -> Dict[str, str]:
+        if extractor is None:
+            await progress("Extracting elements as assets...")
+            extractor = AssetExtractor(image_data_url)
+        # Pictures inside a picture, and duplicates, would only cost prompt
+        # tokens and cuts; streamed ones may already be in the extractor.
+        dropped = prune_redundant_elements(elements_data)
+        if dropped:
+            print(f"Dropped {len(dropped)} redundant elements: {', '.join(dropped)}")
+            extractor.discard(dropped)
+        # Adds whatever the stream did not deliver; already added IDs are skipped.
+        for element in elements_data.get("elements", []):
+            await extractor.add(element)
+        return await extractor.result()
 
-            await self.send_message(
-                "status", f"Extracted {len(element_assets)} assets", 0
-            )
-            return elements_data, element_assets
-        except Exception as e:
-            await self.throw_error(f"Error during image analysis: {str(e)}")
-            raise
+    async def _pack_sprites(self, element_assets: Dict[str, str]) -> None:
+        atlas = await asyncio.to_thread(pack_sprites, element_assets)
+        if atlas is None:
+            return
+        atlas.sheets = [shorten_image_url(sheet) for sheet in atlas.sheets]
+        self.sprite_atlas = atlas
+        packed = len(set(atlas.frames.values()))
+        await self.send_message(
+            "status",
+            f"Packed {packed} small assets into {len(atlas.sheets)} sprite sheet(s)"
+            f" ({atlas.assets_bytes / 1024:.0f} KB -> {atlas.sheets_bytes / 1024:.0f} KB)",
+            0,
+        )
+
+    async def _publish_assets(self, element_assets: Dict[str, str]) -> Dict[str, str]:
+        # Duplicates share one URL; shorten each distinct asset once.
+        short_urls: Dict[str, str] = {}
+        for url in element_assets.values():
+            if url not in short_urls:
+                short_urls[url] = shorten_image_url(url)
+        # Every <img> still carries its URL, so bytes are only saved where
+        # shortening actually replaced a data URL.
+        saved_bytes = sum(
+            len(url) - len(short_urls[url]) for url in element_assets.values()
+        )
+        element_assets = {
+            element_id: short_urls[url] for element_id, url in element_assets.items()
+        }
+
+        message = f"Extracted {len(element_assets)} assets"
+        if len(short_urls) < len(element_assets):
+            message += f" ({len(short_urls)} unique)"
+        if saved_bytes > 0:
+            message += f", {saved_bytes / 1024:.0f} KB of data URLs shortened"
+        await self.send_message("status", message, 0)
+        return element_assets
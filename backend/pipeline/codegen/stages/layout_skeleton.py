@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict
+
+from codegen.layout_skeleton import build_layout_skeleton
+
+
+class LayoutSkeletonStage:
+    """Builds the layout skeleton the model refines in element mode."""
+
+    def build(
+        self,
+        elements_data: Dict[str, Any],
+        stack: str,
+        element_assets: Dict[str, str],
+    ) -> str | None:
+        start = time.perf_counter()
+        try:
+            skeleton = build_layout_skeleton(elements_data, stack, element_assets.keys())
+        except Exception as e:
+            # The skeleton is an optimization; the plain element prompt works without it.
+            print(f"[SKELETON] failed to build layout skeleton: {e}")
+            return None
+        if skeleton is not None:
+            print(
+                f"Layout skeleton: {len(skeleton)} chars for "
+                f"{len(elements_data.get('elements', []))} elements in "
+                f"{(time.perf_counter() - start) * 1000:.0f}ms"
+            )
+        return skeleton
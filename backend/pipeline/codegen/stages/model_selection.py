@@ -5,7 +5,7 @@ from typing import Callable, Coroutine, List, Literal
 from config import NUM_VARIANTS
 from custom_types import InputMode
 from llm import Llm
-from models.registry import ModelRegistry
+from models.registry import ComplexityTier, ModelRegistry
 
 
 class ModelSelectionStage:
@@ -22,6 +22,7 @@ class ModelSelectionStage:
         anthropic_api_key: str | None,
         gemini_api_key: str | None = None,
         preferred_model: str | None = None,
+        complexity_tier: ComplexityTier | None = None,
     ) -> List[Llm]:
         try:
             models = self._get_variant_models(
@@ -32,6 +33,7 @@ class ModelSelectionStage:
                 anthropic_api_key,
                 gemini_api_key,
                 preferred_model,
+                complexity_tier,
             )
             print("Variant models:")
             for index, model in enumerate(models):
@@ -54,6 +56,7 @@ class ModelSelectionStage:
         anthropic_api_key: str | None,
         gemini_api_key: str | None,
         preferred_model: str | None,
+        complexity_tier: ComplexityTier | None = None,
     ) -> List[Llm]:
         preferred_llm: Llm | None = None
         if preferred_model:
@@ -79,17 +82,21 @@ class ModelSelectionStage:
         ):
             return [preferred_llm for _ in range(num_variants)]
 
+        # An explicit preference always wins; the complexity tier only picks
+        # between the fast and the latest model of the fallback provider.
         chosen: Llm | None = None
         if openai_api_key:
-            candidate = ModelRegistry.latest_for_provider("openai")
+            candidate = ModelRegistry.fallback_for_provider("openai", complexity_tier)
             if ModelRegistry.is_compatible(candidate, generation_type, input_mode):
                 chosen = candidate
         if chosen is None and anthropic_api_key:
-            candidate = ModelRegistry.latest_for_provider("anthropic")
+            candidate = ModelRegistry.fallback_for_provider(
+                "anthropic", complexity_tier
+            )
             if ModelRegistry.is_compatible(candidate, generation_type, input_mode):
                 chosen = candidate
         if chosen is None and gemini_api_key:
-            candidate = ModelRegistry.latest_for_provider("gemini")
+            candidate = ModelRegistry.fallback_for_provider("gemini", complexity_tier)
             if ModelRegistry.is_compatible(candidate, generation_type, input_mode):
                 chosen = candidate
 
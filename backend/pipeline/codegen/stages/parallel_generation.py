@@ -1,17 +1,27 @@
 from __future__ import annotations
 
 import asyncio
+import json
+import time
 import traceback
-from typing import Any, Callable, Coroutine, Dict, List
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Tuple
 
 import openai
 from openai.types.chat import ChatCompletionMessageParam
 
+from codegen.stitching import stitch_sections
 from codegen.utils import extract_html_content
 from config import IS_PROD, REPLICATE_API_KEY
-from image_generation.core import apply_image_cache, generate_images
+from concurrency import gather_or_cancel
+from config.settings import settings
+from image_analysis.sprite_atlas import SpriteAtlas, apply_sprites
+from image_generation.core import ImageModel, apply_image_cache, extract_dimensions
+from image_generation.preview import apply_previews
+from image_generation.streaming import ImagePrefetcher
+from image_processing.policy import apply_image_policy
 from llm import Completion, Llm, OPENAI_MODELS, ANTHROPIC_MODELS, GEMINI_MODELS
 from models import stream_claude_response, stream_gemini_response, stream_openai_response
+from models.registry import ComplexityTier, ImagePolicy, ModelRegistry, Provider
 from pipeline.codegen.context import VariantErrorAlreadySent
 from pipeline.types import MessageType
 
@@ -27,6 +37,8 @@ class ParallelGenerationStage:
         anthropic_api_key: str | None,
         gemini_api_key: str | None,
         should_generate_images: bool,
+        complexity_tier: ComplexityTier | None = None,
+        sprite_atlas: SpriteAtlas | None = None,
     ):
         self.send_message = send_message
         self.openai_api_key = openai_api_key
@@ -34,6 +46,9 @@ class ParallelGenerationStage:
         self.anthropic_api_key = anthropic_api_key
         self.gemini_api_key = gemini_api_key
         self.should_generate_images = should_generate_images
+        self.complexity_tier: ComplexityTier | None = complexity_tier
+        self.sprite_atlas = sprite_atlas
+        self._prefetchers: Dict[int, ImagePrefetcher] = {}
 
     async def process_variants(
         self,
@@ -41,8 +56,22 @@ class ParallelGenerationStage:
         prompt_messages: List[ChatCompletionMessageParam],
         image_cache: Dict[str, str],
         params: Dict[str, Any],
+        section_prompts: List[List[ChatCompletionMessageParam]] | None = None,
     ) -> Dict[int, str]:
-        tasks = self._create_generation_tasks(variant_models, prompt_messages, params)
+        image_config = self._image_generation_config()
+        if image_config is not None:
+            model, api_key, gemini_key = image_config
+            print("Generating images with model: ", model)
+            self._prefetchers = {
+                index: ImagePrefetcher(
+                    api_key, self.openai_base_url, model, gemini_key, image_cache
+                )
+                for index in range(len(variant_models))
+            }
+
+        tasks = await self._create_generation_tasks(
+            variant_models, prompt_messages, params, section_prompts
+        )
 
         variant_tasks: Dict[int, asyncio.Task[Completion]] = {}
         variant_completions: Dict[int, str] = {}
@@ -64,47 +93,148 @@ class ParallelGenerationStage:
         await asyncio.gather(*variant_processors, return_exceptions=True)
         return variant_completions
 
-    def _create_generation_tasks(
+    async def _create_generation_tasks(
         self,
         variant_models: List[Llm],
         prompt_messages: List[ChatCompletionMessageParam],
         params: Dict[str, Any],
+        section_prompts: List[List[ChatCompletionMessageParam]] | None = None,
     ) -> List[Coroutine[Any, Any, Completion]]:
         tasks: List[Coroutine[Any, Any, Completion]] = []
 
-        for index, model in enumerate(variant_models):
-            if model in OPENAI_MODELS:
-                if self.openai_api_key is None:
-                    raise Exception("OpenAI API key is missing.")
-                tasks.append(
-                    self._stream_openai_with_error_handling(
-                        prompt_messages, model_name=model.value, index=index
-                    )
-                )
-            elif self.gemini_api_key and model in GEMINI_MODELS:
-                tasks.append(
-                    stream_gemini_response(
-                        prompt_messages,
-                        api_key=self.gemini_api_key,
-                        callback=lambda x, i=index: self._process_chunk(x, i),
-                        model_name=model.value,
-                    )
-                )
-            elif model in ANTHROPIC_MODELS:
-                if self.anthropic_api_key is None:
-                    raise Exception("Anthropic API key is missing.")
+        if section_prompts:
+            sections_by_model = [
+                await self._prepare_prompts(variant_models, section)
+                for section in section_prompts
+            ]
+            for index, model in enumerate(variant_models):
                 tasks.append(
-                    stream_claude_response(
-                        prompt_messages,
-                        api_key=self.anthropic_api_key,
-                        callback=lambda x, i=index: self._process_chunk(x, i),
-                        model_name=model.value,
+                    self._generate_tiled(
+                        model, [s[model] for s in sections_by_model], index
                     )
                 )
+            return tasks
+
+        prompts_by_model = await self._prepare_prompts(variant_models, prompt_messages)
+        for index, model in enumerate(variant_models):
+            task = self._stream_model(
+                model,
+                prompts_by_model[model],
+                index,
+                callback=lambda x, i=index: self._process_chunk(x, i),
+            )
+            if task is not None:
+                tasks.append(task)
 
         return tasks
 
+    def _stream_model(
+        self,
+        model: Llm,
+        prompt_messages: List[ChatCompletionMessageParam],
+        index: int,
+        callback: Callable[[str], Awaitable[None]],
+    ) -> Coroutine[Any, Any, Completion] | None:
+        if model in OPENAI_MODELS:
+            if self.openai_api_key is None:
+                raise Exception("OpenAI API key is missing.")
+            return self._stream_openai_with_error_handling(
+                prompt_messages, model_name=model.value, index=index, callback=callback
+            )
+        elif self.gemini_api_key and model in GEMINI_MODELS:
+            return stream_gemini_response(
+                prompt_messages,
+                api_key=self.gemini_api_key,
+                callback=callback,
+                model_name=model.value,
+                complexity_tier=self.complexity_tier,
+            )
+        elif model in ANTHROPIC_MODELS:
+            if self.anthropic_api_key is None:
+                raise Exception("Anthropic API key is missing.")
+            return stream_claude_response(
+                prompt_messages,
+                api_key=self.anthropic_api_key,
+                callback=callback,
+                model_name=model.value,
+                complexity_tier=self.complexity_tier,
+            )
+        return None
+
+    async def _generate_tiled(
+        self,
+        model: Llm,
+        section_prompts: List[List[ChatCompletionMessageParam]],
+        index: int,
+    ) -> Completion:
+        """
+        Generate all sections of a tiled screenshot concurrently and stitch them.
+
+        Only the first section streams chunks to the frontend (interleaving
+        several streams would garble the live preview); the rest report
+        progress through status messages.
+        """
+        start_time = time.time()
+        total = len(section_prompts)
+        completed = 0
+
+        async def ignore_chunk(_: str) -> None:
+            return
+
+        async def generate_section(
+            section_index: int, messages: List[ChatCompletionMessageParam]
+        ) -> str:
+            nonlocal completed
+            callback = (
+                (lambda x: self._process_chunk(x, index))
+                if section_index == 0
+                else ignore_chunk
+            )
+            task = self._stream_model(model, messages, index, callback)
+            if task is None:
+                raise Exception(f"API key is missing for {model.value}.")
+            completion = await task
+            completed += 1
+            await self.send_message(
+                "status", f"Generated section {completed} of {total}", index
+            )
+            return completion["code"]
+
+        # One failed section fails the variant; stop paying for the others.
+        sections = await gather_or_cancel(
+            generate_section(i, m) for i, m in enumerate(section_prompts)
+        )
+        return {
+            "duration": time.time() - start_time,
+            "code": stitch_sections(sections),
+        }
+
+    async def _prepare_prompts(
+        self,
+        variant_models: List[Llm],
+        prompt_messages: List[ChatCompletionMessageParam],
+    ) -> Dict[Llm, List[ChatCompletionMessageParam]]:
+        """Apply each provider's image policy once, shared across variants."""
+        by_policy: Dict[
+            tuple[ImagePolicy, Provider], List[ChatCompletionMessageParam]
+        ] = {}
+        prompts_by_model: Dict[Llm, List[ChatCompletionMessageParam]] = {}
+
+        for model in variant_models:
+            key = (ModelRegistry.image_policy(model), ModelRegistry.provider(model))
+            if key not in by_policy:
+                # Resizing and re-encoding is CPU-bound; keep it off the event loop.
+                by_policy[key], _ = await asyncio.to_thread(
+                    apply_image_policy, prompt_messages, *key
+                )
+            prompts_by_model[model] = by_policy[key]
+
+        return prompts_by_model
+
     async def _process_chunk(self, content: str, variant_index: int):
+        prefetcher = self._prefetchers.get(variant_index)
+        if prefetcher is not None:
+            prefetcher.feed(content)
         await self.send_message("chunk", content, variant_index)
 
     async def _stream_openai_with_error_handling(
@@ -112,6 +242,7 @@ class ParallelGenerationStage:
         prompt_messages: List[ChatCompletionMessageParam],
         model_name: str,
         index: int,
+        callback: Callable[[str], Awaitable[None]],
     ) -> Completion:
         try:
             assert self.openai_api_key is not None
@@ -119,8 +250,9 @@ class ParallelGenerationStage:
                 prompt_messages,
                 api_key=self.openai_api_key,
                 base_url=self.openai_base_url,
-                callback=lambda x: self._process_chunk(x, index),
+                callback=callback,
                 model_name=model_name,
+                complexity_tier=self.complexity_tier,
             )
         except openai.AuthenticationError as e:
             print(f"[VARIANT {index + 1}] OpenAI Authentication failed", e)
@@ -163,45 +295,64 @@ class ParallelGenerationStage:
             await self.send_message("variantError", error_message, index)
             raise VariantErrorAlreadySent(e)
 
-    async def _perform_image_generation(
+    def _image_generation_config(
         self,
-        completion: str,
-        image_cache: dict[str, str],
-    ):
-        completion = apply_image_cache(completion, image_cache)
+    ) -> Optional[Tuple[ImageModel, str, Optional[str]]]:
+        """Pick the image model and keys: (model, api_key, gemini_api_key)."""
         if not self.should_generate_images:
-            return completion
+            return None
 
         replicate_api_key = REPLICATE_API_KEY
 
         if self.gemini_api_key:
-            image_generation_model = "gemini-3-pro-nano"
-            api_key = self.gemini_api_key
-            gemini_key = self.gemini_api_key
+            return "gemini-3-pro-nano", self.gemini_api_key, self.gemini_api_key
         elif replicate_api_key:
-            image_generation_model = "flux"
-            api_key = replicate_api_key
-            gemini_key = None
-        else:
-            if not self.openai_api_key:
-                print(
-                    "No Gemini, OpenAI, or Replicate API key found. Skipping image generation."
-                )
-                return completion
-            image_generation_model = "dalle3"
-            api_key = self.openai_api_key
-            gemini_key = None
-
-        print("Generating images with model: ", image_generation_model)
-
-        return await generate_images(
-            completion,
-            api_key=api_key,
-            base_url=self.openai_base_url,
-            image_cache=image_cache,
-            model=image_generation_model,
-            gemini_api_key=gemini_key,
-        )
+            return "flux", replicate_api_key, None
+        elif self.openai_api_key:
+            return "dalle3", self.openai_api_key, None
+
+        print("No Gemini, OpenAI, or Replicate API key found. Skipping image generation.")
+        return None
+
+    async def _perform_image_generation(
+        self,
+        completion: str,
+        image_cache: dict[str, str],
+        index: int,
+    ):
+        if self.sprite_atlas is not None:
+            # Packed assets come from the sheets; the rest of the cache still
+            # fills the remaining placeholders below.
+            completion = apply_sprites(completion, self.sprite_atlas)
+        prefetcher = self._prefetchers.get(index)
+        if prefetcher is None:
+            return apply_image_cache(completion, image_cache)
+
+        async def send_patch(alt: str, url: str, placeholder_src: str) -> None:
+            width, height = extract_dimensions(placeholder_src)
+            patch = {"alt": alt, "src": url, "width": width, "height": height}
+            await self.send_message("imagePatch", json.dumps(patch), index)
+
+        try:
+            # Generation for most images started while the code was streaming;
+            # this only waits for the ones that are still running.
+            prefetcher.start(completion)
+            delivered = prefetcher.completed()
+            if prefetcher.pending:
+                # Show the page right away, with instant local previews for the
+                # pending images; the real ones follow as imagePatch messages as
+                # each generation completes.
+                early_html = apply_image_cache(completion, {**delivered, **image_cache})
+                if settings.IMAGE_PREVIEWS_ENABLED:
+                    early_html = apply_previews(early_html, prefetcher.pending_alts())
+                await self.send_message("setCode", extract_html_content(early_html), index)
+
+            generated = await prefetcher.finish(completion, send_patch, delivered)
+            return apply_image_cache(completion, {**generated, **image_cache})
+        finally:
+            # The prefetch tasks are detached: stop whatever is still running
+            # when sending fails or the pipeline is cancelled.
+            prefetcher.cancel()
 
     async def _process_variant_completion(
         self,
@@ -218,7 +369,7 @@ class ParallelGenerationStage:
 
             try:
                 processed_html = await self._perform_image_generation(
-                    completion["code"], image_cache
+                    completion["code"], image_cache, index
                 )
                 processed_html = extract_html_content(processed_html)
                 await self.send_message("setCode", processed_html, index)
@@ -228,6 +379,9 @@ class ParallelGenerationStage:
             except Exception as inner_e:
                 print(f"Post-processing error for variant {index + 1}: {inner_e}")
         except Exception as e:
+            prefetcher = self._prefetchers.get(index)
+            if prefetcher is not None:
+                prefetcher.cancel()
             print(f"Error in variant {index + 1}: {e}")
             traceback.print_exception(type(e), e, e.__traceback__)
             if not isinstance(e, VariantErrorAlreadySent):
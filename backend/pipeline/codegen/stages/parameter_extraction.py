@@ -13,6 +13,7 @@ from config import (
 )
 from custom_types import InputMode
 from pipeline.codegen.context import ExtractedParams
+from prompts import TILEABLE_STACKS
 from prompts.types import PromptContent
 from ws.payload import GenerateCodeWsPayload
 
@@ -65,6 +66,15 @@ class ParameterExtractionStage:
             and generation_type == "create"
         )
 
+        use_tiled_generation = (
+            payload.isTiledGenerationEnabled
+            and validated_input_mode == "image"
+            and generation_type == "create"
+            and validated_stack in TILEABLE_STACKS
+            and not use_element_extraction
+            and not is_imported_from_code
+        )
+
         return ExtractedParams(
             stack=validated_stack,
             input_mode=validated_input_mode,
@@ -80,6 +90,7 @@ class ParameterExtractionStage:
             code_generation_model=code_generation_model,
             analysis_model=analysis_model,
             use_element_extraction=use_element_extraction,
+            use_tiled_generation=use_tiled_generation,
         )
 
     def _get_from_settings_dialog_or_env(
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-import json
+import asyncio
 from typing import Any, Callable, Coroutine, Dict, List
 
 from openai.types.chat import ChatCompletionMessageParam
 
+from config.settings import settings
+from image_processing.tiling import split_screenshot
 from pipeline.codegen.context import ExtractedParams
-from prompts import create_prompt
+from prompts import assemble_section_prompt, create_prompt
+from prompts.element_encoding import encode_elements
 from prompts.registry import ELEMENT_BASED_SYSTEM_PROMPTS
 from utils import print_prompt_summary
 
@@ -22,6 +25,7 @@ class PromptCreationStage:
         extracted_params: ExtractedParams,
         elements_data: Dict[str, Any] | None = None,
         element_assets: Dict[str, str] | None = None,
+        layout_skeleton: str | None = None,
     ) -> tuple[List[ChatCompletionMessageParam], Dict[str, str]]:
         try:
             if (
@@ -30,7 +34,7 @@ class PromptCreationStage:
                 and element_assets
             ):
                 return await self.create_prompt_with_elements(
-                    extracted_params, elements_data, element_assets
+                    extracted_params, elements_data, element_assets, layout_skeleton
                 )
 
             prompt_messages, image_cache = await create_prompt(
@@ -50,32 +54,67 @@ class PromptCreationStage:
             )
             raise
 
+    async def create_section_prompts(
+        self, extracted_params: ExtractedParams
+    ) -> List[List[ChatCompletionMessageParam]]:
+        """
+        Split the screenshot into vertical sections and build one prompt per
+        section. Returns an empty list when the screenshot is short enough to be
+        generated in one pass.
+        """
+        try:
+            sections = await asyncio.to_thread(
+                split_screenshot, extracted_params.prompt["images"][0]
+            )
+        except Exception as e:
+            # Tiling is an optimization; fall back to a single pass.
+            print(f"[TILING] failed to split screenshot: {e}")
+            return []
+
+        if len(sections) < 2:
+            return []
+
+        return [
+            assemble_section_prompt(
+                section, extracted_params.stack, index + 1, len(sections)
+            )
+            for index, section in enumerate(sections)
+        ]
+
     async def create_prompt_with_elements(
         self,
         extracted_params: ExtractedParams,
         elements_data: Dict[str, Any],
         element_assets: Dict[str, str],
+        layout_skeleton: str | None = None,
     ) -> tuple[List[ChatCompletionMessageParam], Dict[str, str]]:
         stack = extracted_params.stack
         system_content = ELEMENT_BASED_SYSTEM_PROMPTS[stack]
 
-        elements_info = json.dumps(
-            {
-                "elements": elements_data.get("elements", []),
-                "image_dimensions": elements_data.get("image_dimensions", {}),
-            },
-            indent=2,
-        )
-
         image_url = extracted_params.prompt["images"][0]
+        if layout_skeleton is not None:
+            text = self._skeleton_instructions(layout_skeleton)
+        else:
+            text = self._element_instructions(elements_data)
         user_content: List[Any] = [
             {
                 "type": "image_url",
                 "image_url": {"url": image_url, "detail": "high"},
             },
-            {
-                "type": "text",
-                "text": f"""Generate code using the extracted design elements.
+            {"type": "text", "text": text},
+        ]
+
+        prompt_messages = [
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": user_content},
+        ]
+
+        print_prompt_summary(prompt_messages, truncate=False)
+        return prompt_messages, element_assets
+
+    def _element_instructions(self, elements_data: Dict[str, Any]) -> str:
+        elements_info = encode_elements(elements_data, settings.ELEMENT_PROMPT_ENCODING)
+        return f"""Generate code using the extracted design elements.
 
 Extracted elements data:
 {elements_info}
@@ -88,14 +127,16 @@ For each NON-TEXT element in the extracted elements list:
 - You may add data-prompt="short description" for optional image generation fallback.
 Place elements at their exact coordinates from the extracted elements data.
 Match colors, fonts, sizes, spacing EXACTLY as shown in the screenshot.
-""",
-            },
-        ]
+"""
 
-        prompt_messages = [
-            {"role": "system", "content": system_content},
-            {"role": "user", "content": user_content},
-        ]
+    def _skeleton_instructions(self, layout_skeleton: str) -> str:
+        return f"""Generate code by refining this layout skeleton. It was generated from the extracted design elements and already places every element at its measured position:
 
-        print_prompt_summary(prompt_messages, truncate=False)
-        return prompt_messages, element_assets
+{layout_skeleton}
+
+Return the complete page built from the skeleton:
+- Keep every <img> placeholder exactly as it is, including its src and alt, so the backend can inject the real asset pixels.
+- Fill in missing text and correct text, colors, fonts, borders and shadows to match the screenshot EXACTLY.
+- Keep element sizes and positions; you may replace absolute positioning with flex or grid where it reproduces the same layout.
+- Add anything visible in the screenshot that the skeleton is missing.
+"""
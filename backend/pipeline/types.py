@@ -8,5 +8,6 @@ MessageType = Literal[
     "variantComplete",
     "variantError",
     "variantCount",
+    "imagePatch",
 ]
 
@@ -1,3 +1,4 @@
+import hashlib
 from typing import Union, Any, cast
 from openai.types.chat import ChatCompletionMessageParam, ChatCompletionContentPartParam
 
@@ -8,7 +9,7 @@ from prompts.registry import (
     SCREENSHOT_SYSTEM_PROMPTS,
     TEXT_SYSTEM_PROMPTS,
 )
-from prompts.types import Stack, PromptContent
+from prompts.types import DuplicateImagePolicy, Stack, PromptContent
 from video.utils import assemble_claude_prompt_video
 
 # Backward-compatible names used throughout the codebase and in tests.
@@ -23,6 +24,18 @@ SVG_USER_PROMPT = """
 Generate code for a SVG that looks exactly like this.
 """
 
+SECTION_PROMPT = """
+This screenshot is section {index} of {total} of a taller web page that was cut horizontally.
+Generate a complete HTML document for this section only. It will be stacked with the other sections, so:
+- Do not add headers, footers or navigation that are not visible in this section.
+- Let the section span the full page width and size its height to its content.
+- If you write custom CSS classes, prefix them with "s{index}-" so they do not clash with other sections.
+"""
+
+# Stacks whose output is a plain HTML document, so generated sections can be
+# stitched by concatenating their <body> contents.
+TILEABLE_STACKS: tuple[Stack, ...] = ("html_css", "html_tailwind", "bootstrap")
+
 
 async def create_prompt(
     stack: Stack,
@@ -31,6 +44,7 @@ async def create_prompt(
     prompt: PromptContent,
     history: list[dict[str, Any]],
     is_imported_from_code: bool,
+    duplicate_image_policy: DuplicateImagePolicy = "reference",
 ) -> tuple[list[ChatCompletionMessageParam], dict[str, str]]:
 
     image_cache: dict[str, str] = {}
@@ -64,6 +78,8 @@ async def create_prompt(
 
             image_cache = create_alt_url_mapping(history[-2]["text"])
 
+    dedupe_prompt_images(prompt_messages, duplicate_image_policy)
+
     if input_mode == "video":
         video_data_url = prompt["images"][0]
         prompt_messages = await assemble_claude_prompt_video(video_data_url)
@@ -71,6 +87,70 @@ async def create_prompt(
     return prompt_messages, image_cache
 
 
+def _image_content_hash(url: str) -> str:
+    # For data URLs, hash only the payload so identical bytes match even if the
+    # declared media type differs.
+    payload = url.split(",", 1)[1] if url.startswith("data:") else url
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def dedupe_prompt_images(
+    prompt_messages: list[ChatCompletionMessageParam],
+    policy: DuplicateImagePolicy = "reference",
+) -> int:
+    """
+    Send each distinct image only once per prompt.
+
+    Update-mode history often repeats the same reference screenshot. With the
+    "reference" policy a repeated image is replaced by a short text part
+    pointing at its first occurrence; with "omit" it is dropped. Messages are
+    modified in place. Returns the number of URL characters removed.
+    """
+    if policy == "keep":
+        return 0
+
+    seen: dict[str, int] = {}
+    removed_chars = 0
+    removed_images = 0
+
+    for message in prompt_messages:
+        content = message.get("content")
+        if not isinstance(content, list):
+            continue
+
+        new_content: list[Any] = []
+        for part in content:
+            if part.get("type") != "image_url":  # type: ignore
+                new_content.append(part)
+                continue
+
+            url = part["image_url"]["url"]  # type: ignore
+            content_hash = _image_content_hash(url)
+            if content_hash not in seen:
+                seen[content_hash] = len(seen) + 1
+                new_content.append(part)
+                continue
+
+            removed_images += 1
+            removed_chars += len(url)
+            if policy == "reference":
+                new_content.append(
+                    {
+                        "type": "text",
+                        "text": f"[Same image as image #{seen[content_hash]} above]",
+                    }
+                )
+
+        message["content"] = new_content  # type: ignore
+
+    if removed_images:
+        print(
+            f"[PROMPT] deduplicated {removed_images} repeated images "
+            f"({removed_chars} chars removed)"
+        )
+    return removed_chars
+
+
 def create_message_from_history_item(
     item: dict[str, Any], role: str
 ) -> ChatCompletionMessageParam:
@@ -166,6 +246,24 @@ def assemble_prompt(
     ]
 
 
+def assemble_section_prompt(
+    section_data_url: str,
+    stack: Stack,
+    index: int,
+    total: int,
+) -> list[ChatCompletionMessageParam]:
+    """Prompt for one vertical section of a tiled screenshot (1-based index)."""
+    prompt_messages = assemble_prompt(section_data_url, stack)
+    # The section instructions go in the system prompt since not every
+    # provider adapter forwards the user text (Gemini only sends the image).
+    prompt_messages[0]["content"] = (
+        cast(str, prompt_messages[0].get("content", ""))
+        + "\n"
+        + SECTION_PROMPT.format(index=index, total=total)
+    )
+    return prompt_messages
+
+
 def assemble_text_prompt(
     text_prompt: str,
     stack: Stack,
@@ -0,0 +1,163 @@
+"""
+Encodings of extracted elements for element-based code generation prompts.
+
+The original encoding is the analysis JSON pretty-printed with indent=2:
+every element repeats its key names and spends most of its lines on
+whitespace and braces, which inflates input tokens and time to first token
+on pages with hundreds of elements. The compact encoding is a table instead:
+
+    Columns: id|type|x|y|w|h|z|bg|color|size|font|radius|opacity|text
+    hero|card|0|64|1440|560||#f8fafc
+      hero_title|text|120|160|640|56|||#0f172a|48|Inter|||Build faster
+
+A header row names the fields, each element is one `|`-separated line, empty
+or default values are left blank (trailing blanks dropped) and an element is
+indented under the smallest element that contains it (see
+image_analysis.spatial_index), siblings in reading order. x and y are rounded to
+COORDINATE_QUANTUM px; widths and heights stay exact because they become
+placeholder sizes that must match the cut assets.
+
+`settings.ELEMENT_PROMPT_ENCODING` picks the encoding so the two can be
+compared in evals; run_element_encoding_benchmark.py measures the token
+difference.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from typing import Any, Dict, Optional
+
+from image_analysis.spatial_index import ROOT, Box, ElementIndex
+
+ELEMENT_ENCODINGS = ("json", "compact")
+
+COORDINATE_QUANTUM = 2
+
+COLUMNS = (
+    "id",
+    "type",
+    "x",
+    "y",
+    "w",
+    "h",
+    "z",
+    "bg",
+    "color",
+    "size",
+    "font",
+    "radius",
+    "opacity",
+    "text",
+)
+INDENT = "  "
+
+
+def encode_elements(elements_data: Dict[str, Any], encoding: str) -> str:
+    if encoding == "json":
+        return encode_elements_json(elements_data)
+    if encoding == "compact":
+        return encode_elements_compact(elements_data)
+    raise ValueError(
+        f"Unknown element encoding {encoding!r}; expected one of {ELEMENT_ENCODINGS}"
+    )
+
+
+def encode_elements_json(elements_data: Dict[str, Any]) -> str:
+    return json.dumps(
+        {
+            "elements": elements_data.get("elements", []),
+            "image_dimensions": elements_data.get("image_dimensions", {}),
+        },
+        indent=2,
+    )
+
+
+def encode_elements_compact(elements_data: Dict[str, Any]) -> str:
+    elements = [e for e in elements_data.get("elements", []) if isinstance(e, dict)]
+    dimensions = elements_data.get("image_dimensions") or {}
+    lines = [
+        f"Image: {_number(dimensions.get('width'))}x{_number(dimensions.get('height'))} px."
+        f" x/y rounded to {COORDINATE_QUANTUM} px."
+        " Indented rows lie inside the row above them. Blank = not set.",
+        "Columns: " + "|".join(COLUMNS),
+    ]
+
+    index = ElementIndex(elements)
+
+    def visit(i: int, depth: int) -> None:
+        lines.append(INDENT * depth + _row(elements[i], index.boxes[i]))
+        for child in index.children[i]:
+            visit(child, depth + 1)
+
+    for root in index.children[ROOT]:
+        visit(root, 0)
+    return "\n".join(lines)
+
+
+def _row(element: Dict[str, Any], box: Optional[Box]) -> str:
+    properties = element.get("properties") or {}
+    x, y, w, h = box if box is not None else (None, None, None, None)
+    opacity = properties.get("opacity")
+    values = [
+        element.get("id"),
+        element.get("type"),
+        _quantize(x),
+        _quantize(y),
+        _number(w),
+        _number(h),
+        _number(element.get("z_index")) if element.get("z_index") else "",
+        _color(properties.get("background_color")),
+        _color(properties.get("text_color")),
+        _number(properties.get("font_size")),
+        properties.get("font_family"),
+        _number(properties.get("border_radius")) if properties.get("border_radius") else "",
+        _number(opacity) if opacity not in (None, 1, 1.0) else "",
+        element.get("text_content"),
+    ]
+    cells = [_cell(value) for value in values]
+    while cells and not cells[-1]:
+        cells.pop()
+    return "|".join(cells)
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    text = str(value).strip()
+    return text.replace("\\", "\\\\").replace("|", "\\|").replace("\n", "\\n")
+
+
+def _number(value: Any) -> str:
+    if value is None or isinstance(value, bool):
+        return ""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if number.is_integer():
+        return str(int(number))
+    return f"{number:.2f}".rstrip("0").rstrip(".")
+
+
+def _quantize(value: Optional[float]) -> str:
+    if value is None:
+        return ""
+    # Half up rather than round()'s half-to-even, so 161 -> 162 like 163 -> 164.
+    return str(math.floor(value / COORDINATE_QUANTUM + 0.5) * COORDINATE_QUANTUM)
+
+
+def _color(value: Any) -> str:
+    """Lowercase hex, shortened to #rgb where that is lossless."""
+    if not isinstance(value, str):
+        return ""
+    color = value.strip().lower()
+    if (
+        len(color) == 7
+        and color.startswith("#")
+        and color[1] == color[2]
+        and color[3] == color[4]
+        and color[5] == color[6]
+    ):
+        return "#" + color[1] + color[3] + color[5]
+    return color
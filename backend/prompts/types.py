@@ -18,6 +18,11 @@ class PromptContent(TypedDict):
     images: List[str]
 
 
+# How to handle an image that already appeared earlier in the same prompt:
+# keep it, replace it with a short text back-reference, or drop it.
+DuplicateImagePolicy = Literal["keep", "reference", "omit"]
+
+
 Stack = Literal[
     "html_css",
     "html_tailwind",
@@ -0,0 +1,21 @@
+from fastapi import Header, HTTPException
+
+from config import IS_PROD
+from config.settings import settings
+
+
+def require_dev_tooling_access(x_evals_key: str | None = Header(default=None)) -> None:
+    """
+    Prod hygiene: eval and metrics routes are dev tooling.
+
+    - In dev: allow.
+    - In prod: require `EVALS_API_KEY` via `X-Evals-Key` header, or disable entirely
+      if `EVALS_API_KEY` is unset.
+    """
+    if not IS_PROD:
+        return
+    evals_key = getattr(settings, "EVALS_API_KEY", None)
+    if not evals_key:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_evals_key != evals_key:
+        raise HTTPException(status_code=403, detail="Forbidden")
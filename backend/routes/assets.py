@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+
+from assets import get_blob_store
+
+router = APIRouter()
+
+# Blob names are content hashes, so a given URL never changes.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/assets/{name}")
+async def get_asset(name: str) -> FileResponse:
+    store = get_blob_store()
+    found = store.path(name) if store is not None else None
+    if found is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    path, mime_type = found
+    return FileResponse(
+        path, media_type=mime_type, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    )
+
+
+class InlineAssetsRequest(BaseModel):
+    code: str
+
+
+class InlineAssetsResponse(BaseModel):
+    code: str
+
+
+@router.post("/api/assets/inline")
+async def inline_assets(request: InlineAssetsRequest) -> InlineAssetsResponse:
+    """Return `code` with asset URLs replaced by data URLs, for export."""
+    store = get_blob_store()
+    if store is None:
+        return InlineAssetsResponse(code=request.code)
+    return InlineAssetsResponse(code=store.inline(request.code))
@@ -1,5 +1,5 @@
 import os
-from fastapi import APIRouter, Depends, Header, Query, Request, HTTPException
+from fastapi import APIRouter, Depends, Query, Request, HTTPException
 from pydantic import BaseModel
 from evals.utils import image_to_data_url
 from evals.config import EVALS_DIR
@@ -9,28 +9,10 @@ from typing import List, Dict
 from llm import Llm
 from prompts.types import Stack
 from pathlib import Path
-from config import IS_PROD
-from config.settings import settings
+from routes.access import require_dev_tooling_access
 
 
-def _require_evals_access(x_evals_key: str | None = Header(default=None)) -> None:
-    """
-    Prod hygiene: eval routes are dev tooling.
-
-    - In dev: allow.
-    - In prod: require `EVALS_API_KEY` via `X-Evals-Key` header, or disable entirely
-      if `EVALS_API_KEY` is unset.
-    """
-    if not IS_PROD:
-        return
-    evals_key = getattr(settings, "EVALS_API_KEY", None)
-    if not evals_key:
-        raise HTTPException(status_code=404, detail="Not Found")
-    if x_evals_key != evals_key:
-        raise HTTPException(status_code=403, detail="Forbidden")
-
-
-router = APIRouter(dependencies=[Depends(_require_evals_access)])
+router = APIRouter(dependencies=[Depends(require_dev_tooling_access)])
 
 # Update this if the number of outputs generated per input changes
 N = 1
@@ -0,0 +1,14 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from metrics import metrics_snapshot
+from routes.access import require_dev_tooling_access
+
+# Metrics are dev tooling and follow the same access rules as the eval routes.
+router = APIRouter(dependencies=[Depends(require_dev_tooling_access)])
+
+
+@router.get("/api/metrics")
+async def get_metrics() -> Dict[str, Dict[str, Any]]:
+    return metrics_snapshot()
@@ -5,6 +5,7 @@ from typing import Dict, List, Literal, Optional, Set
 from fastapi import APIRouter
 from pydantic import BaseModel
 
+from image_analysis.local_detector import LOCAL_ANALYSIS_MODEL
 from llm import Llm
 from models.registry import ModelRegistry, Provider
 from prompts.types import Stack
@@ -28,8 +29,15 @@ class PublicStackInfo(BaseModel):
     in_beta: bool = False
 
 
+class PublicAnalyzerInfo(BaseModel):
+    id: str
+    name: str
+
+
 class ModelsResponse(BaseModel):
     models: List[PublicModelInfo]
+    # Element analyzers that are not LLMs (usable only as analysisModel).
+    analyzers: List[PublicAnalyzerInfo]
     stacks: List[PublicStackInfo]
     defaults: Dict[str, Optional[str]]
     recommended: Dict[str, List[str]]
@@ -146,8 +154,18 @@ async def get_models():
             Llm.CLAUDE_4_5_OPUS_2025_11_01.value,
             Llm.GPT_5.value,
             Llm.GEMINI_3_PRO.value,
+            LOCAL_ANALYSIS_MODEL,
         ],
     }
-
-    return ModelsResponse(models=models, stacks=stacks, defaults=defaults, recommended=recommended)
+    analyzers = [
+        PublicAnalyzerInfo(id=LOCAL_ANALYSIS_MODEL, name="Local detector (fast, no LLM)")
+    ]
+
+    return ModelsResponse(
+        models=models,
+        analyzers=analyzers,
+        stacks=stacks,
+        defaults=defaults,
+        recommended=recommended,
+    )
 
@@ -0,0 +1,159 @@
+"""
+Benchmark element asset extraction on a synthetic screenshot with many
+elements: the previous extractor (full-resolution GrabCut for every element,
+one after another) against the adaptive one (uniform-background fast path,
+downscaled GrabCut, thread pool, duplicate elements cut once) at several
+worker counts. Also reports which path each element took and, for the
+elements that still need GrabCut, how closely the downscaled masks agree
+with full resolution (mean IoU of the opaque regions).
+
+Usage: poetry run python run_asset_extraction_benchmark.py [--elements 60]
+"""
+
+import argparse
+import asyncio
+import base64
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import cv2  # type: ignore
+import numpy as np  # type: ignore
+
+import image_analysis.asset_extraction as asset_extraction
+from image_analysis.asset_extraction import (
+    _asset_boxes,
+    _encode_png_data_url,
+    _fast_path_alpha,
+    _grabcut_alpha,
+    extract_elements_as_assets,
+)
+
+WORKER_COUNTS = [1, 4, 8]
+PADDING = 6  # analysis models rarely return tight boxes
+
+
+def build_screenshot(count: int) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """A long page mixing icons, buttons, photos, cards and gradient tiles."""
+    rng = np.random.default_rng(0)
+    columns, cell_w, cell_h = 4, 340, 300
+    rows = (count + columns - 1) // columns
+    bgr = np.full((rows * cell_h + 40, columns * cell_w + 80, 3), 255, dtype=np.uint8)
+    elements: List[Dict[str, Any]] = []
+
+    for i in range(count):
+        x0, y0 = 40 + (i % columns) * cell_w, 20 + (i // columns) * cell_h
+        kind = i % 5
+        if kind == 0:  # icon on the page background
+            w = h = 48
+            cv2.circle(bgr, (x0 + 24, y0 + 24), 20, (40, 140, 220), -1)
+            element_type = "icon"
+        elif kind == 1:  # button
+            w, h = 180, 52
+            cv2.rectangle(bgr, (x0, y0), (x0 + w, y0 + h), (200, 90, 40), -1)
+            cv2.putText(
+                bgr, "Action", (x0 + 40, y0 + 34), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2
+            )
+            element_type = "button"
+        elif kind == 2:  # photo
+            w, h = 300, 240
+            noise = rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+            bgr[y0 : y0 + h, x0 : x0 + w] = cv2.GaussianBlur(noise, (15, 15), 0)
+            element_type = "image"
+        elif kind == 3:  # card with an illustration
+            w, h = 300, 260
+            cv2.rectangle(bgr, (x0, y0), (x0 + w, y0 + h), (245, 240, 240), -1)
+            cv2.ellipse(bgr, (x0 + 150, y0 + 120), (90, 60), 20, 0, 360, (80, 170, 90), -1)
+            element_type = "card"
+        else:  # shape on a gradient section (needs GrabCut)
+            tile_w, tile_h = 300, 280
+            ramp = np.linspace(120, 230, tile_w, dtype=np.float32)
+            tile = np.stack([np.tile(ramp, (tile_h, 1))] * 3, axis=2).astype(np.uint8)
+            tile[:, :, 0] = np.clip(tile[:, :, 0].astype(np.int16) + 20, 0, 255)
+            bgr[y0 : y0 + tile_h, x0 : x0 + tile_w] = tile
+            cv2.circle(bgr, (x0 + 150, y0 + 140), 90, (30, 30, 160), -1)
+            # The box sits inside the gradient, so its border is not uniform.
+            x0, y0 = x0 + 60 + PADDING, y0 + 50 + PADDING
+            w = h = 180 - 2 * PADDING
+            element_type = "image"
+
+        elements.append(
+            {
+                "id": f"element_{i}",
+                "type": element_type,
+                "coordinates": {
+                    "x": x0 - PADDING,
+                    "y": y0 - PADDING,
+                    "width": w + 2 * PADDING,
+                    "height": h + 2 * PADDING,
+                },
+            }
+        )
+
+    height, width = bgr.shape[:2]
+    return bgr, {"image_dimensions": {"width": width, "height": height}, "elements": elements}
+
+
+def previous_extractor(bgr: np.ndarray, elements_data: Dict[str, Any]) -> Dict[str, str]:
+    """Full-resolution GrabCut for every element, serially."""
+    img_h, img_w = bgr.shape[:2]
+    assets: Dict[str, str] = {}
+    for element_id, (x, y, w, h) in _asset_boxes(elements_data, img_w, img_h):
+        roi = bgr[y : y + h, x : x + w]
+        roi_bgra = cv2.cvtColor(roi, cv2.COLOR_BGR2BGRA)
+        roi_bgra[:, :, 3] = _grabcut_alpha(roi, max_side=None)
+        assets[element_id] = _encode_png_data_url(roi_bgra)
+    return assets
+
+
+def grabcut_agreement(bgr: np.ndarray, elements_data: Dict[str, Any]) -> Tuple[int, float]:
+    """(elements on the GrabCut path, mean IoU of downscaled vs full-res masks)."""
+    img_h, img_w = bgr.shape[:2]
+    scores: List[float] = []
+    for _, (x, y, w, h) in _asset_boxes(elements_data, img_w, img_h):
+        if _fast_path_alpha(bgr, x, y, w, h) is not None:
+            continue
+        roi = bgr[y : y + h, x : x + w]
+        downscaled = _grabcut_alpha(roi) > 127
+        reference = _grabcut_alpha(roi, max_side=None) > 127
+        union = np.count_nonzero(reference | downscaled)
+        scores.append(np.count_nonzero(reference & downscaled) / union if union else 1.0)
+    return len(scores), float(np.mean(scores)) if scores else 1.0
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").split("\n\n")[0])
+    parser.add_argument("--elements", type=int, default=60)
+    args = parser.parse_args()
+
+    bgr, elements_data = build_screenshot(args.elements)
+    ok, buf = cv2.imencode(".png", bgr)
+    assert ok
+    data_url = f"data:image/png;base64,{base64.b64encode(buf.tobytes()).decode()}"
+    print(f"Screenshot {bgr.shape[1]}x{bgr.shape[0]}, {args.elements} elements")
+
+    start = time.perf_counter()
+    baseline = previous_extractor(bgr, elements_data)
+    baseline_seconds = time.perf_counter() - start
+    print(f"{'previous (serial, full-res GrabCut)':<40} {baseline_seconds * 1000:>8.0f} ms")
+
+    for workers in WORKER_COUNTS:
+        asset_extraction._executor = ThreadPoolExecutor(max_workers=workers)
+        start = time.perf_counter()
+        assets = await extract_elements_as_assets(data_url, elements_data)
+        seconds = time.perf_counter() - start
+        assert set(assets) == set(baseline)
+        print(
+            f"{f'adaptive, {workers} worker(s)':<40} {seconds * 1000:>8.0f} ms"
+            f"  ({baseline_seconds / seconds:.1f}x)"
+        )
+        asset_extraction._executor.shutdown()
+
+    print(f"Unique assets: {len(set(assets.values()))} of {len(assets)}")
+    grabcut_count, iou = grabcut_agreement(bgr, elements_data)
+    print(f"Fast path: {len(baseline) - grabcut_count} elements, GrabCut: {grabcut_count}")
+    print(f"Downscaled vs full-res GrabCut masks (mean IoU): {iou:.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+Compare the size of the element-based prompt's elements block in the
+indented JSON encoding and the compact tabular one, on a synthetic landing
+page shaped like analysis model output (float coordinates, full property
+sets, nested cards) at several element counts.
+
+Token counts come from `utils.token_counter` (tiktoken when installed,
+otherwise an estimate).
+
+Usage: poetry run python run_element_encoding_benchmark.py [--elements 50 200 500]
+"""
+
+import argparse
+import time
+from typing import Any, Dict, List
+
+from prompts.element_encoding import encode_elements
+from utils import token_counter
+
+
+def _element(
+    element_id: str,
+    element_type: str,
+    box: List[float],
+    z_index: int,
+    **properties: Any,
+) -> Dict[str, Any]:
+    text = properties.pop("text", "")
+    return {
+        "id": element_id,
+        "type": element_type,
+        "coordinates": dict(zip(("x", "y", "width", "height"), box)),
+        "properties": {
+            "background_color": properties.get("background_color", "#ffffff"),
+            "text_color": properties.get("text_color", "#111827"),
+            "font_size": properties.get("font_size", 16),
+            "font_family": "Inter",
+            "border_radius": properties.get("border_radius", 0),
+            "opacity": 1,
+        },
+        "text_content": text,
+        "z_index": z_index,
+    }
+
+
+def build_elements(count: int) -> Dict[str, Any]:
+    """A nav bar and hero followed by a grid of cards (image, title, copy, button)."""
+    elements = [
+        _element("nav", "header", [0, 0, 1440, 72.5], 1, background_color="#0f172a"),
+        _element("logo", "image", [32.2, 16, 120, 40], 2),
+        _element("hero", "card", [0, 72.5, 1440, 520], 0, background_color="#f8fafc"),
+        _element(
+            "hero_title", "text", [120.4, 180.7, 720, 64], 1,
+            font_size=48, text="Design to code in seconds",
+        ),
+    ]
+    card = 0
+    while len(elements) < count:
+        x, y = 40 + (card % 4) * 345.5, 640 + (card // 4) * 420.25
+        prefix = f"card_{card + 1}"
+        elements += [
+            _element(prefix, "card", [x, y, 320, 400], 1, border_radius=12),
+            _element(f"{prefix}_image", "image", [x + 12.3, y + 12, 296, 180], 2),
+            _element(
+                f"{prefix}_title", "text", [x + 16, y + 208.6, 288, 28], 2,
+                font_size=20, text=f"Feature number {card + 1}",
+            ),
+            _element(
+                f"{prefix}_copy", "text", [x + 16, y + 244, 288, 72], 2,
+                font_size=14, text_color="#4b5563",
+                text="Short description of what this feature does for the user.",
+            ),
+            _element(
+                f"{prefix}_button", "button", [x + 16, y + 340.4, 120, 40], 2,
+                background_color="#2563eb", text_color="#ffffff", border_radius=8,
+                text="Learn more",
+            ),
+        ]
+        card += 1
+    return {
+        "image_dimensions": {"width": 1440, "height": 640 + (card // 4 + 1) * 420},
+        "elements": elements[:count],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").strip().splitlines()[0])
+    parser.add_argument("--elements", type=int, nargs="+", default=[50, 200, 500])
+    args = parser.parse_args()
+
+    count_tokens = token_counter()
+    print(f"{'elements':>8} {'encoding':>8} {'chars':>9} {'tokens':>8} {'encode ms':>10}")
+    for count in args.elements:
+        elements_data = build_elements(count)
+        tokens: Dict[str, int] = {}
+        for encoding in ("json", "compact"):
+            start = time.perf_counter()
+            text = encode_elements(elements_data, encoding)
+            elapsed = (time.perf_counter() - start) * 1000
+            tokens[encoding] = count_tokens(text)
+            print(
+                f"{count:>8} {encoding:>8} {len(text):>9} {tokens[encoding]:>8}"
+                f" {elapsed:>10.1f}"
+            )
+        saved = 1 - tokens["compact"] / tokens["json"]
+        print(f"{'':>8} compact saves {saved:.0%} of the elements block tokens\n")
+
+
+if __name__ == "__main__":
+    main()
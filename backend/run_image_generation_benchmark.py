@@ -0,0 +1,235 @@
+"""
+Throughput benchmark for the image generation path, without network calls.
+
+The DALL-E, Replicate (Flux) and Gemini adapters are replaced by in-process
+fakes with log-normal latency and a configurable error rate, and pages of
+placeholder images are pushed through `generate_images` (tag scanning,
+coordinator, cache, rewriting) concurrently. For each provider, concurrency
+cap, page size and cache hit rate it reports throughput, per-image latency
+percentiles (every coordinator call is one sample, queueing and cache hits
+included), CPU time per image and peak Python memory. Memory is measured in
+a second, traced run so tracemalloc overhead does not distort the timings.
+
+Scenarios run on an event loop with a virtual clock: when the loop would
+idle until its next timer, the clock jumps there instead. Fake provider
+latency therefore costs no wall time yet is counted in full, while CPU work
+(ours and the event loop's) advances the clock in real time and is not
+inflated by any scaling.
+
+Usage: poetry run python run_image_generation_benchmark.py
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import io
+import itertools
+import random
+import selectors
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import image_generation.cache as cache_module
+import image_generation.coordinator as coordinator_module
+import image_generation.core as core
+from image_generation.cache import ImageGenerationCache
+from image_generation.coordinator import ImageGenerationCoordinator
+
+# A 1x1 PNG, so cache writes never touch the network.
+FAKE_IMAGE = "data:image/png;base64," + base64.b64encode(
+    bytes.fromhex(
+        "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+        "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+    )
+).decode()
+
+
+@dataclass(frozen=True)
+class FakeBackend:
+    """Log-normal latency (median seconds, spread) and failure probability."""
+
+    median_seconds: float
+    sigma: float
+    error_rate: float
+
+
+BACKENDS: Dict[str, FakeBackend] = {
+    "dalle3": FakeBackend(median_seconds=9.0, sigma=0.35, error_rate=0.02),
+    "flux": FakeBackend(median_seconds=1.5, sigma=0.5, error_rate=0.01),
+    "gemini-3-pro-nano": FakeBackend(median_seconds=5.0, sigma=0.4, error_rate=0.03),
+}
+
+CONCURRENCY_LEVELS = [4, 16, 64]
+PAGE_SIZES = [5, 20, 50]  # images per page
+CACHE_HIT_RATES = [0.0, 0.5, 0.9]
+CONCURRENT_PAGES = 8
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock skips idle waits for timers (see module docstring)."""
+
+    def __init__(self) -> None:
+        super().__init__(selector=_FastForwardSelector(self))
+        self.skipped = 0.0
+        self.executor_jobs = 0
+
+    def time(self) -> float:
+        return super().time() + self.skipped
+
+    def run_in_executor(self, executor: Any, func: Any, *args: Any) -> "asyncio.Future[Any]":
+        # Thread work takes real time; never skip ahead while some is running.
+        self.executor_jobs += 1
+        future = super().run_in_executor(executor, func, *args)
+        future.add_done_callback(self._executor_job_done)
+        return future
+
+    def _executor_job_done(self, _future: "asyncio.Future[Any]") -> None:
+        self.executor_jobs -= 1
+
+
+class _FastForwardSelector(selectors.DefaultSelector):
+    def __init__(self, loop: VirtualClockLoop):
+        super().__init__()
+        self.loop = loop
+
+    def select(self, timeout: Optional[float] = None):
+        if timeout is None or timeout <= 0 or self.loop.executor_jobs:
+            return super().select(timeout)
+        events = super().select(0)
+        if not events:
+            self.loop.skipped += timeout
+        return events
+
+
+def install_fakes(backend: FakeBackend, rng: random.Random) -> None:
+    async def fake_call(*_args, **_kwargs) -> str:
+        await asyncio.sleep(backend.median_seconds * rng.lognormvariate(0, backend.sigma))
+        if rng.random() < backend.error_rate:
+            raise RuntimeError("fake provider error")
+        return FAKE_IMAGE
+
+    core.generate_image_dalle = fake_call  # type: ignore
+    core.generate_image_replicate = fake_call  # type: ignore
+    core.generate_image_gemini = fake_call  # type: ignore
+
+
+class TimedCoordinator(ImageGenerationCoordinator):
+    """Records the latency of every generate call on the loop's clock."""
+
+    def __init__(self, concurrency: Dict[str, int]):
+        super().__init__(concurrency)
+        self.latencies: List[float] = []
+
+    async def generate(self, *args: Any, **kwargs: Any):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            return await super().generate(*args, **kwargs)
+        finally:
+            self.latencies.append(loop.time() - start)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def build_page(page: int, images: int) -> str:
+    tags = [
+        f'<img src="https://placehold.co/300x200" alt="page {page} image {i}">'
+        for i in range(images)
+    ]
+    return "<html><body>\n" + "\n".join(tags) + "\n</body></html>"
+
+
+async def run_scenario(
+    model: str,
+    concurrency: int,
+    page_size: int,
+    hit_rate: float,
+    seed: int,
+    trace_memory: bool = False,
+) -> Dict[str, float]:
+    rng = random.Random(seed)
+    install_fakes(BACKENDS[model], rng)
+    coordinator = TimedCoordinator({model: concurrency})
+    coordinator_module._coordinator = coordinator
+    cache = ImageGenerationCache(None, ttl=None, url_ttl=3600, memory_capacity=100_000)
+    cache_module._image_cache = cache
+
+    pages = [build_page(p, page_size) for p in range(CONCURRENT_PAGES)]
+    size = core.provider_size(model, 300, 200)
+    for p, i in itertools.product(range(CONCURRENT_PAGES), range(page_size)):
+        if rng.random() < hit_rate:
+            await cache.put(model, f"page {p} image {i}", size, FAKE_IMAGE, 0.0)
+
+    async def run_page(code: str) -> str:
+        return await core.generate_images(
+            code, api_key="fake", base_url=None, image_cache={}, model=model,  # type: ignore
+            gemini_api_key="fake",
+        )
+
+    if trace_memory:
+        tracemalloc.start()
+    loop = asyncio.get_running_loop()
+    start, start_cpu = loop.time(), time.process_time()
+    outputs = await asyncio.gather(*(run_page(code) for code in pages))
+    elapsed = loop.time() - start
+    cpu = time.process_time() - start_cpu
+    peak_bytes = 0
+    if trace_memory:
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    images = CONCURRENT_PAGES * page_size
+    failed = sum(code.count("https://placehold.co") for code in outputs)
+    latencies = coordinator.latencies
+    return {
+        "images_per_second": images / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "cpu_ms": cpu / images * 1000,
+        "failed": failed,
+        "peak_mb": peak_bytes / 1e6,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").split("\n\n")[0])
+    parser.add_argument("--models", nargs="*", default=list(BACKENDS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'model':<18} {'conc':>4} {'imgs':>4} {'hit':>4} {'img/s':>7} "
+        f"{'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'cpu ms':>7} {'failed':>6} {'peak MB':>8}"
+    )
+    for model in args.models:
+        for concurrency, page_size, hit_rate in itertools.product(
+            CONCURRENCY_LEVELS, PAGE_SIZES, CACHE_HIT_RATES
+        ):
+            scenario = (model, concurrency, page_size, hit_rate, args.seed)
+            # Keep the per-call timing prints of process_tasks out of the report.
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = await run_scenario(*scenario)
+                traced = await run_scenario(*scenario, trace_memory=True)
+            result["peak_mb"] = traced["peak_mb"]
+            print(
+                f"{model:<18} {concurrency:>4} {page_size:>4} {hit_rate:>4.1f} "
+                f"{result['images_per_second']:>7.2f} {result['p50']:>7.2f} "
+                f"{result['p95']:>7.2f} {result['p99']:>7.2f} {result['cpu_ms']:>7.2f} "
+                f"{result['failed']:>6.0f} {result['peak_mb']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    loop = VirtualClockLoop()
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
@@ -0,0 +1,82 @@
+"""
+Benchmark placeholder image replacement: the offset-preserving `<img>`
+rewriter in image_generation.core against the BeautifulSoup + prettify
+approach it replaced, on synthetic pages of increasing size.
+
+Usage: poetry run python run_image_rewrite_benchmark.py
+"""
+
+import time
+from typing import Callable, Dict, List
+
+from bs4 import BeautifulSoup
+
+from image_generation.core import apply_image_cache, extract_dimensions
+
+PAGE_SIZES = [10, 100, 500]  # sections per page
+REPEATS = 20
+
+
+def beautifulsoup_apply_image_cache(code: str, image_cache: Dict[str, str]) -> str:
+    """The previous implementation, kept here as the baseline."""
+    soup = BeautifulSoup(code, "html.parser")
+    did_replace = False
+    for img in soup.find_all("img"):
+        src = img.get("src")
+        alt = img.get("alt")
+        if not isinstance(src, str) or not isinstance(alt, str):
+            continue
+        if not src or not alt or not src.startswith("https://placehold.co"):
+            continue
+        new_url = image_cache.get(alt)
+        if not new_url:
+            continue
+        width, height = extract_dimensions(src)
+        img["width"] = str(width)
+        img["height"] = str(height)
+        img["src"] = new_url
+        did_replace = True
+    return soup.prettify() if did_replace else code
+
+
+def build_page(sections: int) -> str:
+    parts: List[str] = ["<!DOCTYPE html>\n<html>\n<head><title>Bench</title></head>\n<body>"]
+    for i in range(sections):
+        parts.append(
+            f"""
+  <section class="py-12 px-6 grid grid-cols-3 gap-4">
+    <h2 class="text-2xl font-bold">Section {i}</h2>
+    <p class="text-gray-600">Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>
+    <img src="https://placehold.co/600x400" alt="Image {i}" data-prompt="Photo {i}">
+    <img src="https://placehold.co/48x48" alt="Icon {i % 5}" class="w-12 h-12">
+    <a href="#" class="btn">Learn more</a>
+  </section>"""
+        )
+    parts.append("\n</body>\n</html>\n")
+    return "".join(parts)
+
+
+def time_ms(fn: Callable[[], str]) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return 1000 * (time.perf_counter() - start) / REPEATS
+
+
+def main() -> None:
+    print(f"{'sections':>8} {'bytes':>9} {'bs4 ms':>9} {'rewriter ms':>12} {'speedup':>8}")
+    for sections in PAGE_SIZES:
+        page = build_page(sections)
+        cache = {f"Image {i}": f"https://cdn.example.com/{i}.png" for i in range(sections)}
+        cache.update({f"Icon {i}": f"https://cdn.example.com/icon-{i}.png" for i in range(5)})
+
+        baseline = time_ms(lambda: beautifulsoup_apply_image_cache(page, cache))
+        rewriter = time_ms(lambda: apply_image_cache(page, cache))
+        print(
+            f"{sections:>8} {len(page):>9} {baseline:>9.2f} {rewriter:>12.2f} "
+            f"{baseline / rewriter:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Compare element-based generation with and without the layout skeleton.
+
+For each screenshot, elements are detected locally (local-cv, no analysis
+model call) and assets are cut, then both prompts are built: the current
+element prompt and the skeleton prompt. Their input tokens and the size of
+the skeleton are always reported. With --model (and that provider's API key
+in the environment), each variant is generated --runs times and the output
+tokens and end-to-end latency are compared.
+
+Token counts come from `utils.token_counter` (tiktoken when installed,
+otherwise an estimate).
+
+Usage:
+    poetry run python run_layout_skeleton_benchmark.py [--images a.png b.png]
+        [--stack html_tailwind] [--model claude-sonnet-4-5-20251101] [--runs 3]
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import os
+import statistics
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from codegen.layout_skeleton import SKELETON_STACKS, build_layout_skeleton
+from evals.config import EVALS_DIR
+from evals.core import generate_code_core
+from evals.utils import image_to_data_url
+from image_analysis import detect_elements, extract_elements_as_assets
+from image_analysis.spatial_index import prune_redundant_elements
+from llm import Llm
+from pipeline.codegen.stages.prompt_creation import PromptCreationStage
+from utils import token_counter
+
+
+async def _throw_error(message: str) -> None:
+    raise RuntimeError(message)
+
+
+async def build_prompts(data_url: str, stack: str) -> Dict[str, Any]:
+    elements_data = await asyncio.to_thread(detect_elements, data_url)
+    prune_redundant_elements(elements_data)
+    element_assets = await extract_elements_as_assets(data_url, elements_data)
+    skeleton = build_layout_skeleton(elements_data, stack, element_assets.keys())
+
+    stage = PromptCreationStage(_throw_error)
+    params: Any = SimpleNamespace(stack=stack, prompt={"images": [data_url]})
+    prompts = {}
+    for variant, layout_skeleton in (("elements", None), ("skeleton", skeleton)):
+        # create_prompt_with_elements prints the whole prompt.
+        with contextlib.redirect_stdout(io.StringIO()):
+            prompts[variant], _ = await stage.create_prompt_with_elements(
+                params, elements_data, element_assets, layout_skeleton
+            )
+    return {
+        "elements": len(elements_data["elements"]),
+        "skeleton": skeleton or "",
+        "prompts": prompts,
+    }
+
+
+def prompt_text(prompt_messages: Any) -> str:
+    parts: List[str] = []
+    for message in prompt_messages:
+        content = message["content"]
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts += [item["text"] for item in content if item.get("type") == "text"]
+    return "\n".join(parts)
+
+
+async def time_generation(prompt_messages: Any, model: Llm) -> tuple[float, str]:
+    start = time.perf_counter()
+    code = await generate_code_core(prompt_messages, model)
+    return time.perf_counter() - start, code
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").strip().splitlines()[0])
+    parser.add_argument("--images", nargs="*")
+    parser.add_argument("--stack", default="html_tailwind", choices=sorted(SKELETON_STACKS))
+    parser.add_argument("--model", help="generate with this model (needs its API key)")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    images: List[str] = args.images or sorted(
+        glob.glob(os.path.join(EVALS_DIR, "inputs", "*.png"))
+    )
+    if not images:
+        parser.error(f"no screenshots given and none found in {EVALS_DIR}/inputs")
+    model: Optional[Llm] = Llm(args.model) if args.model else None
+    count_tokens = token_counter()
+
+    for path in images:
+        data_url = await image_to_data_url(path)
+        built = await build_prompts(data_url, args.stack)
+        print(f"\n{os.path.basename(path)}: {built['elements']} elements")
+        print(f"  skeleton: {len(built['skeleton'])} chars, {count_tokens(built['skeleton'])} tokens")
+        for variant, prompt_messages in built["prompts"].items():
+            tokens = count_tokens(prompt_text(prompt_messages))
+            print(f"  {variant:>8} prompt: {tokens} input tokens besides the screenshot")
+
+        if model is None:
+            continue
+        for variant, prompt_messages in built["prompts"].items():
+            durations: List[float] = []
+            output_tokens: List[int] = []
+            for _ in range(args.runs):
+                duration, code = await time_generation(prompt_messages, model)
+                durations.append(duration)
+                output_tokens.append(count_tokens(code))
+            print(
+                f"  {variant:>8} output: {statistics.mean(output_tokens):.0f} tokens,"
+                f" {statistics.mean(durations):.1f}s mean"
+                f" ({min(durations):.1f}-{max(durations):.1f}s over {args.runs} runs)"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+import asyncio
+from typing import Any, Dict, List
+
+import image_analysis.result_cache as result_cache
+import pipeline.codegen.stages.image_analysis as stage_module
+from image_analysis.local_detector import LOCAL_ANALYSIS_MODEL
+from image_analysis.result_cache import ElementAnalysisCache, analysis_cache_key
+from pipeline.codegen.stages.image_analysis import ImageAnalysisStage
+
+IMAGE = "data:image/png;base64,AAAA"
+ELEMENTS_DATA = {
+    "image_dimensions": {"width": 100, "height": 100},
+    "elements": [{"id": "a", "type": "icon"}, {"id": "b", "type": "icon"}],
+}
+ASSETS = {"a": "data:image/png;base64,icon", "b": "data:image/png;base64,icon"}
+
+
+async def test_round_trip_through_disk_keeps_shared_assets(tmp_path):
+    await ElementAnalysisCache(str(tmp_path), ttl=None).put(IMAGE, "model", (ELEMENTS_DATA, ASSETS))
+
+    cache = ElementAnalysisCache(str(tmp_path), ttl=None)
+    result = await cache.get(IMAGE, "model")
+    assert result is not None
+    elements_data, assets = result
+    assert elements_data == ELEMENTS_DATA
+    assert assets == ASSETS
+    assert assets["a"] is assets["b"]
+    assert await cache.get(IMAGE, "other-model") is None
+    assert await cache.get(IMAGE + "B", "model") is None
+
+
+def test_key_includes_extraction_settings_version(monkeypatch):
+    key = analysis_cache_key(IMAGE, "model")
+    monkeypatch.setattr(
+        result_cache, "EXTRACTION_SETTINGS_VERSION", result_cache.EXTRACTION_SETTINGS_VERSION + 1
+    )
+    assert analysis_cache_key(IMAGE, "model") != key
+
+
+async def test_concurrent_requests_compute_once():
+    cache = ElementAnalysisCache(None, ttl=None)
+    calls = 0
+
+    async def compute(progress):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return ELEMENTS_DATA, ASSETS
+
+    results = await asyncio.gather(
+        *(cache.get_or_compute(IMAGE, "model", compute) for _ in range(3))
+    )
+    assert calls == 1
+    assert all(result == (ELEMENTS_DATA, ASSETS) for result, _ in results)
+    assert not any(cached for _, cached in results)
+    # Callers get independent copies.
+    results[0][0][0]["elements"].clear()
+    assert results[1][0][0]["elements"]
+
+    (elements_data, _), cached = await cache.get_or_compute(IMAGE, "model", compute)
+    assert cached and calls == 1
+    assert elements_data == ELEMENTS_DATA
+
+
+async def test_results_are_not_shared_across_api_keys():
+    cache = ElementAnalysisCache(None, ttl=None)
+    calls = 0
+
+    async def compute(progress):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return ELEMENTS_DATA, ASSETS
+
+    await asyncio.gather(
+        cache.get_or_compute(IMAGE, "model", compute, ("key-a", None, None)),
+        cache.get_or_compute(IMAGE, "model", compute, ("key-b", None, None)),
+        cache.get_or_compute(IMAGE, "model", compute, (None, None, None)),
+    )
+    assert calls == 3
+
+    _, cached = await cache.get_or_compute(IMAGE, "model", compute, ("key-a", None, None))
+    assert cached and calls == 3
+    assert await cache.get(IMAGE, "model", ("key-c", None, None)) is None
+
+
+async def test_failing_progress_listener_does_not_break_the_shared_flight():
+    cache = ElementAnalysisCache(None, ttl=None)
+    follower_messages: List[str] = []
+
+    async def compute(progress):
+        await asyncio.sleep(0.01)
+        await progress("halfway")
+        await progress("done")
+        return ELEMENTS_DATA, ASSETS
+
+    async def disconnected(message: str) -> None:
+        raise ConnectionError("websocket closed")
+
+    async def follower(message: str) -> None:
+        follower_messages.append(message)
+
+    results = await asyncio.gather(
+        cache.get_or_compute(IMAGE, "model", compute, on_progress=disconnected),
+        cache.get_or_compute(IMAGE, "model", compute, on_progress=follower),
+    )
+    assert all(result == (ELEMENTS_DATA, ASSETS) for result, _ in results)
+    assert follower_messages == ["halfway", "done"]
+    assert cache._listeners == {}
+
+
+async def test_disk_entries_are_capped(tmp_path):
+    cache = ElementAnalysisCache(str(tmp_path), ttl=None, memory_capacity=1, max_disk_bytes=1)
+    await cache.put(IMAGE, "model", (ELEMENTS_DATA, ASSETS))
+    await cache.put(IMAGE + "B", "model", (ELEMENTS_DATA, ASSETS))
+
+    reopened = ElementAnalysisCache(str(tmp_path), ttl=None)
+    assert await reopened.get(IMAGE, "model") is None
+
+
+async def test_stage_reuses_cached_analysis(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        result_cache, "_analysis_cache", ElementAnalysisCache(str(tmp_path), ttl=None)
+    )
+    monkeypatch.setattr(result_cache.settings, "ANALYSIS_CACHE_ENABLED", True)
+    detections = 0
+
+    def fake_detect(image_data_url: str) -> Dict[str, Any]:
+        nonlocal detections
+        detections += 1
+        return ELEMENTS_DATA
+
+    async def fake_extract_assets(image_data_url, elements_data, progress, extractor=None):
+        return dict(ASSETS)
+
+    monkeypatch.setattr(stage_module, "detect_elements", fake_detect)
+    monkeypatch.setattr(ImageAnalysisStage, "_extract_assets", staticmethod(fake_extract_assets))
+
+    messages: List[str] = []
+
+    async def send_message(_type, value, _index):
+        messages.append(value)
+
+    async def throw_error(message):
+        raise AssertionError(message)
+
+    stage = ImageAnalysisStage(send_message, throw_error)
+    first = await stage.analyze_image(IMAGE, LOCAL_ANALYSIS_MODEL, None, None, None)
+    second = await stage.analyze_image(IMAGE, LOCAL_ANALYSIS_MODEL, None, None, None)
+
+    assert detections == 1
+    assert first == second == (ELEMENTS_DATA, ASSETS)
+    assert "Reusing the cached analysis of this screenshot..." in messages
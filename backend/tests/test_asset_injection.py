@@ -1,10 +1,16 @@
 import base64
 
+import cv2  # type: ignore
+import numpy as np  # type: ignore
 import pytest
 from bs4 import BeautifulSoup
 
 from image_generation.core import apply_image_cache, generate_images
-from image_analysis.asset_extraction import extract_elements_as_assets
+from image_analysis.asset_extraction import (
+    _adaptive_alpha,
+    _fast_path_alpha,
+    extract_elements_as_assets,
+)
 
 
 def _data_url_from_png_bytes(png_bytes: bytes) -> str:
@@ -27,8 +33,11 @@ def test_apply_image_cache_replaces_placeholders_by_alt() -> None:
 async def test_generate_images_prefers_data_prompt(monkeypatch: pytest.MonkeyPatch) -> None:
     captured: dict[str, object] = {}
 
-    async def fake_process_tasks(prompts, api_key, base_url, model, gemini_api_key=None):
+    async def fake_process_tasks(
+        prompts, api_key, base_url, model, gemini_api_key=None, dimensions=None
+    ):
         captured["prompts"] = prompts
+        captured["dimensions"] = dimensions
         return [f"https://example.com/{i}.png" for i in range(len(prompts))]
 
     import image_generation.core as core
@@ -44,6 +53,7 @@ async def test_generate_images_prefers_data_prompt(monkeypatch: pytest.MonkeyPat
     )
 
     assert captured["prompts"] == ["a blue icon", "el2"]
+    assert captured["dimensions"] == [(10, 10), (20, 30)]
 
     soup = BeautifulSoup(out, "html.parser")
     imgs = soup.find_all("img")
@@ -57,9 +67,6 @@ async def test_generate_images_prefers_data_prompt(monkeypatch: pytest.MonkeyPat
 
 @pytest.mark.asyncio
 async def test_extract_elements_as_assets_produces_transparency() -> None:
-    import cv2  # type: ignore
-    import numpy as np  # type: ignore
-
     bgr = np.full((100, 100, 3), 255, dtype=np.uint8)
     cv2.rectangle(bgr, (40, 40), (60, 60), (0, 0, 255), thickness=-1)
     ok, buf = cv2.imencode(".png", bgr)
@@ -93,3 +100,53 @@ async def test_extract_elements_as_assets_produces_transparency() -> None:
     assert bool((alpha < 10).any())
     assert bool((alpha > 200).any())
 
+
+def test_adaptive_alpha_fast_paths_and_downscaled_grabcut() -> None:
+    bgr = np.full((400, 600, 3), 255, dtype=np.uint8)
+    # Button filled to the edge of its (tight) box: opaque rectangle.
+    cv2.rectangle(bgr, (20, 20), (179, 69), (200, 90, 40), thickness=-1)
+    button = _fast_path_alpha(bgr, 20, 20, 160, 50)
+    assert button is not None and bool((button == 255).all())
+
+    # Icon on the page background: the background is keyed out.
+    cv2.circle(bgr, (250, 45), 20, (40, 140, 220), thickness=-1)
+    icon = _fast_path_alpha(bgr, 220, 15, 60, 60)
+    assert icon is not None
+    assert icon[0, 0] == 0 and icon[30, 30] == 255
+
+    # Shape on a gradient needs GrabCut, run downscaled at this size.
+    ramp = np.linspace(80, 240, 300, dtype=np.uint8)
+    bgr[100:400, 300:600] = np.stack([np.tile(ramp, (300, 1))] * 3, axis=2)
+    cv2.circle(bgr, (450, 250), 90, (30, 30, 160), thickness=-1)
+    assert _fast_path_alpha(bgr, 320, 120, 260, 260) is None
+    alpha = _adaptive_alpha(bgr, 320, 120, 260, 260)
+    assert alpha.shape == (260, 260)
+    assert alpha[130, 130] > 200 and alpha[5, 5] < 10
+
+
+@pytest.mark.asyncio
+async def test_repeated_elements_share_one_asset() -> None:
+    bgr = np.full((120, 600, 3), 255, dtype=np.uint8)
+    elements = []
+    for i in range(6):
+        cv2.circle(bgr, (40 + i * 90, 40), 20, (40, 140, 220), thickness=-1)
+        elements.append(
+            {
+                "id": f"icon{i}",
+                "type": "icon",
+                "coordinates": {"x": 10 + i * 90, "y": 10, "width": 60, "height": 60},
+            }
+        )
+    # One copy differs by a single pixel and must keep its own asset.
+    bgr[40, 490] = (0, 0, 0)
+    ok, buf = cv2.imencode(".png", bgr)
+    assert ok
+
+    assets = await extract_elements_as_assets(
+        _data_url_from_png_bytes(buf.tobytes()), {"elements": elements}
+    )
+
+    assert set(assets) == {f"icon{i}" for i in range(6)}
+    assert len(set(assets.values())) == 2
+    assert all(assets[f"icon{i}"] is assets["icon0"] for i in range(5))
+    assert assets["icon5"] != assets["icon0"]
@@ -0,0 +1,108 @@
+import base64
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import assets.store as store_module
+from assets import BlobStore, shorten_image_url
+from pipeline.codegen.stages.image_analysis import ImageAnalysisStage
+from routes import assets as assets_routes
+
+BASE_URL = "http://testserver"
+PNG_BYTES = b"\x89PNG\r\n\x1a\nfake"
+PNG_DATA_URL = "data:image/png;base64," + base64.b64encode(PNG_BYTES).decode()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch) -> BlobStore:
+    blob_store = BlobStore(str(tmp_path), BASE_URL)
+    monkeypatch.setattr(store_module, "_store", blob_store)
+    monkeypatch.setattr(store_module.settings, "ASSET_BASE_URL", BASE_URL)
+    return blob_store
+
+
+def test_shorten_is_content_addressed(store):
+    url = store.shorten(PNG_DATA_URL)
+    assert url.startswith(f"{BASE_URL}/assets/") and url.endswith(".png")
+    assert store.shorten(PNG_DATA_URL) == url
+    assert store.shorten("https://example.com/a.png") == "https://example.com/a.png"
+    svg = "data:image/svg+xml;base64," + base64.b64encode(b"<svg/>").decode()
+    assert store.shorten(svg) == svg
+
+
+def test_inline_restores_data_urls(store):
+    url = store.shorten(PNG_DATA_URL)
+    code = f'<img src="{url}"><img src="{BASE_URL}/assets/{"0" * 32}.png">'
+    assert store.inline(code) == (
+        f'<img src="{PNG_DATA_URL}"><img src="{BASE_URL}/assets/{"0" * 32}.png">'
+    )
+
+
+def test_disabled_store_keeps_data_urls(monkeypatch):
+    monkeypatch.setattr(store_module.settings, "ASSET_BASE_URL", None)
+    assert shorten_image_url(PNG_DATA_URL) == PNG_DATA_URL
+
+
+async def _publish_messages(element_assets):
+    messages: list[str] = []
+
+    async def send_message(_type, value, _index):
+        messages.append(value)
+
+    async def throw_error(message):
+        raise AssertionError(message)
+
+    stage = ImageAnalysisStage(send_message, throw_error)
+    return await stage._publish_assets(element_assets), messages
+
+
+async def test_publish_reports_bytes_saved_only_when_urls_are_shortened(
+    store, monkeypatch
+):
+    data_url = "data:image/png;base64," + base64.b64encode(PNG_BYTES * 200).decode()
+    assets = {"a": data_url, "b": data_url}
+    published, messages = await _publish_messages(assets)
+    assert published["a"] == published["b"] != data_url
+    assert messages == ["Extracted 2 assets (1 unique), 6 KB of data URLs shortened"]
+
+    monkeypatch.setattr(store_module.settings, "ASSET_BASE_URL", None)
+    published, messages = await _publish_messages(assets)
+    assert published == assets
+    assert messages == ["Extracted 2 assets (1 unique)"]
+
+
+def test_routes_serve_immutable_assets_and_inline(store):
+    app = FastAPI()
+    app.include_router(assets_routes.router)
+    client = TestClient(app)
+
+    url = shorten_image_url(PNG_DATA_URL)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == PNG_BYTES
+    assert response.headers["content-type"] == "image/png"
+    assert "immutable" in response.headers["cache-control"]
+
+    assert client.get("/assets/../secret.png").status_code == 404
+    assert client.get(f"/assets/{'f' * 32}.png").status_code == 404
+
+    response = client.post("/api/assets/inline", json={"code": f'<img src="{url}">'})
+    assert response.json() == {"code": f'<img src="{PNG_DATA_URL}">'}
+
+
+def test_least_recently_used_blobs_are_evicted_past_max_bytes(tmp_path):
+    store = BlobStore(str(tmp_path), BASE_URL, max_bytes=2500)
+    first = store.put(b"a" * 1000, "image/png")
+    time.sleep(0.02)  # file times are only as fine as the kernel clock tick
+    second = store.put(b"b" * 1000, "image/png")
+    assert first is not None and second is not None
+    time.sleep(0.02)
+    # Serving the first blob marks it as recently used.
+    assert store.path(first.rsplit("/", 1)[1]) is not None
+
+    store.put(b"c" * 1000, "image/png")
+
+    assert store.path(second.rsplit("/", 1)[1]) is None
+    assert store.path(first.rsplit("/", 1)[1]) is not None
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from prompts.element_encoding import (
+    COLUMNS,
+    encode_elements,
+    encode_elements_compact,
+)
+
+ELEMENTS_DATA = {
+    "image_dimensions": {"width": 1440, "height": 900},
+    "elements": [
+        {
+            "id": "title",
+            "type": "text",
+            "coordinates": {"x": 121.4, "y": 161, "width": 640, "height": 56},
+            "properties": {
+                "text_color": "#0F172A",
+                "font_size": 48,
+                "font_family": "Inter",
+                "opacity": 1,
+            },
+            "text_content": "Build | ship\nfaster",
+            "z_index": 1,
+        },
+        {
+            "id": "hero",
+            "type": "card",
+            "coordinates": {"x": 0, "y": 64, "width": 1440, "height": 560},
+            "properties": {"background_color": "#f8fafc", "border_radius": 0},
+            "z_index": 0,
+        },
+        {
+            "id": "logo",
+            "type": "image",
+            "coordinates": {"x": 20, "y": 12, "width": 120, "height": 40},
+            "properties": {"opacity": 0.5},
+        },
+        {
+            "id": "cta",
+            "type": "button",
+            # Overhangs the hero by 2px: still nested.
+            "coordinates": {"x": 120, "y": 520, "width": 160, "height": 106},
+            "properties": {"background_color": "#2563eb", "border_radius": 8},
+        },
+    ],
+}
+
+
+def test_compact_rows_are_nested_quantized_and_omit_defaults() -> None:
+    lines = encode_elements_compact(ELEMENTS_DATA).splitlines()
+
+    assert lines[0].startswith("Image: 1440x900 px.")
+    assert lines[1] == "Columns: " + "|".join(COLUMNS)
+    assert lines[2:] == [
+        "logo|image|20|12|120|40|||||||0.5",
+        "hero|card|0|64|1440|560||#f8fafc",
+        "  title|text|122|162|640|56|1||#0f172a|48|Inter|||Build \\| ship\\nfaster",
+        "  cta|button|120|520|160|106||#2563eb||||8",
+    ]
+
+
+def test_identical_boxes_nest_without_losing_elements() -> None:
+    box = {"x": 10, "y": 10, "width": 50, "height": 50}
+    data = {
+        "elements": [
+            {"id": "a", "type": "card", "coordinates": box},
+            {"id": "b", "type": "image", "coordinates": box},
+            {"id": "c", "type": "icon", "coordinates": {"x": 12, "y": 12}},
+        ]
+    }
+
+    rows = encode_elements_compact(data).splitlines()[2:]
+
+    assert rows == ["a|card|10|10|50|50", "  b|image|10|10|50|50", "c|icon"]
+
+
+def test_compact_encoding_is_much_smaller_than_json() -> None:
+    elements = [
+        {
+            "id": f"card_{i}",
+            "type": "card",
+            "coordinates": {"x": 40 + (i % 4) * 340, "y": 100 + (i // 4) * 300, "width": 320, "height": 280},
+            "properties": {"background_color": "#ffffff", "border_radius": 12, "opacity": 1},
+            "text_content": "",
+            "z_index": 0,
+        }
+        for i in range(40)
+    ]
+    data = {"image_dimensions": {"width": 1440, "height": 3100}, "elements": elements}
+
+    compact = encode_elements(data, "compact")
+    assert len(compact) < len(encode_elements(data, "json")) / 4
+    assert json.loads(encode_elements(data, "json"))["elements"] == elements
+
+    with pytest.raises(ValueError):
+        encode_elements(data, "yaml")
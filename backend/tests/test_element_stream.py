@@ -0,0 +1,81 @@
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+import image_analysis.element_extraction as element_extraction
+from image_analysis.element_stream import ElementStreamParser
+from llm import Llm
+
+ELEMENTS = [
+    {
+        "id": "logo",
+        "type": "image",
+        "coordinates": {"x": 10, "y": 10, "width": 120, "height": 40},
+        "properties": {"background_color": "#ffffff"},
+    },
+    {
+        "id": "title",
+        "type": "text",
+        "coordinates": {"x": 10, "y": 80, "width": 400, "height": 32},
+        "text_content": 'Say "hi" {to} [everyone] \\ ok',
+        "children": [{"elements": [1, 2]}],
+    },
+    {"id": "cta", "type": "button", "coordinates": {"x": 10, "y": 140, "width": 90, "height": 30}},
+]
+
+RESPONSE = "```json\n" + json.dumps(
+    {
+        "image_dimensions": {"width": 800, "height": 600},
+        "palette": [{"name": "primary"}],
+        "elements": ELEMENTS,
+        "notes": {"elements": [{"id": "not-an-element"}]},
+    },
+    indent=2,
+) + "\n```"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, len(RESPONSE)])
+def test_yields_each_element_once_regardless_of_chunking(chunk_size: int) -> None:
+    parser = ElementStreamParser()
+    found: List[Dict[str, Any]] = []
+    for start in range(0, len(RESPONSE), chunk_size):
+        found.extend(parser.feed(RESPONSE[start : start + chunk_size]))
+
+    assert found == ELEMENTS
+    assert parser.parsed == 3
+
+
+def test_element_is_yielded_as_soon_as_it_closes() -> None:
+    parser = ElementStreamParser()
+    first = json.dumps(ELEMENTS[0])
+    assert parser.feed('{"elements": [' + first[:-1]) == []
+    assert parser.feed("}") == [ELEMENTS[0]]
+    assert parser.feed(", {") == []
+
+
+async def test_extract_elements_reports_elements_while_streaming(monkeypatch) -> None:
+    events: List[str] = []
+
+    async def fake_stream(prompt_messages, api_key, callback, model_name):
+        for start in range(0, len(RESPONSE), 50):
+            events.append("chunk")
+            await callback(RESPONSE[start : start + 50])
+        events.append("done")
+
+    async def on_element(element: Dict[str, Any]) -> None:
+        events.append(element["id"])
+
+    monkeypatch.setattr(element_extraction, "stream_claude_response", fake_stream)
+    data = await element_extraction.extract_elements(
+        image_data_url="data:image/png;base64,",
+        analysis_model=Llm.CLAUDE_4_5_OPUS_2025_11_01,
+        anthropic_api_key="key",
+        on_element=on_element,
+    )
+
+    assert data["elements"] == ELEMENTS
+    ids = [e for e in events if e not in ("chunk", "done")]
+    assert ids == ["logo", "title", "cta"]
+    # The first element arrives well before the stream ends.
+    assert events.index("logo") < len(events) // 2
@@ -0,0 +1,79 @@
+from bs4 import BeautifulSoup
+
+from image_generation.core import apply_image_cache, create_alt_url_mapping
+from image_generation.html_rewriter import iter_img_tags, rewrite_img_tags
+
+PAGE = """<!DOCTYPE html>
+<html>
+  <body>
+    <!-- hero -->
+    <div class="hero">
+      <img class="w-full" src="https://placehold.co/800x400" alt="Hero &amp; banner">
+      <IMG SRC='https://placehold.co/40x40' ALT=Logo />
+      <img src="https://example.com/kept.png" alt="Kept" data-prompt="a > b">
+      <img alt="No source">
+    </div>
+  </body>
+</html>
+"""
+
+
+def test_attributes_match_html_parser():
+    soup_images = BeautifulSoup(
+        PAGE, "html.parser", multi_valued_attributes=None
+    ).find_all("img")
+    tags = list(iter_img_tags(PAGE))
+    assert len(tags) == len(soup_images)
+    for tag, soup_img in zip(tags, soup_images):
+        assert tag.attributes == dict(soup_img.attrs)
+        assert PAGE[tag.start : tag.end] == tag.raw
+
+
+def test_apply_image_cache_only_touches_replaced_tags():
+    out = apply_image_cache(
+        PAGE, {"Hero & banner": "https://cdn.example.com/a?b=1&c=2", "Logo": "data:x"}
+    )
+
+    before, after = PAGE.splitlines(), out.splitlines()
+    changed = [i for i, (a, b) in enumerate(zip(before, after)) if a != b]
+    assert len(before) == len(after)
+    assert changed == [5, 6]
+    assert after[5] == (
+        '      <img class="w-full" src="https://cdn.example.com/a?b=1&amp;c=2" '
+        'alt="Hero &amp; banner" width="800" height="400">'
+    )
+    assert after[6] == (
+        '      <IMG SRC="data:x" ALT=Logo width="40" height="40" />'
+    )
+
+    soup_img = BeautifulSoup(out, "html.parser").find("img")
+    assert soup_img is not None
+    assert soup_img.get("src") == "https://cdn.example.com/a?b=1&c=2"
+
+
+def test_unchanged_code_is_returned_as_is():
+    assert apply_image_cache(PAGE, {"Missing": "x"}) is PAGE
+    assert rewrite_img_tags(PAGE, lambda tag: None) is PAGE
+
+
+def test_create_alt_url_mapping_skips_placeholders():
+    assert create_alt_url_mapping(PAGE) == {"Kept": "https://example.com/kept.png"}
+
+
+def test_scripts_styles_and_comments_are_left_alone():
+    page = (
+        "<!-- <img src=\"https://placehold.co/10x10\" alt=\"Old\"> -->\n"
+        "<script>\n"
+        "  const tpl = '<img src=\"https://placehold.co/20x20\" alt=\"Card\">';\n"
+        "  if (a && b) { document.body.innerHTML += tpl; }\n"
+        "</SCRIPT>\n"
+        '<style>.x::after { content: "<img alt=Card>"; }</style>\n'
+        '<img src="https://placehold.co/30x30" alt="Card">\n'
+    )
+
+    assert [tag.get("src") for tag in iter_img_tags(page)] == [
+        "https://placehold.co/30x30"
+    ]
+    out = apply_image_cache(page, {"Old": "https://cdn.example.com/a?b=1&c=2", "Card": "data:x"})
+    assert out.splitlines()[:6] == page.splitlines()[:6]
+    assert out.splitlines()[6].startswith('<img src="data:x" alt="Card"')
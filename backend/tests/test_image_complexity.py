@@ -0,0 +1,50 @@
+import base64
+
+import cv2  # type: ignore
+import numpy as np  # type: ignore
+
+from image_analysis.complexity import analyze_complexity, compute_complexity
+
+
+def _busy_page() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    bgr = np.full((2400, 800, 3), 255, dtype=np.uint8)
+    for row in range(20, 2380, 30):
+        for col in range(20, 760, 90):
+            color = tuple(int(c) for c in rng.integers(0, 255, size=3))
+            cv2.putText(bgr, "Lorem ip", (col, row), cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
+    for _ in range(60):
+        x, y = int(rng.integers(0, 700)), int(rng.integers(0, 2300))
+        color = tuple(int(c) for c in rng.integers(0, 255, size=3))
+        cv2.rectangle(bgr, (x, y), (x + 80, y + 60), color, -1)
+    return bgr
+
+
+def test_blank_page_is_simple():
+    bgr = np.full((600, 800, 3), 250, dtype=np.uint8)
+    cv2.rectangle(bgr, (300, 250), (500, 300), (200, 80, 30), -1)
+
+    complexity = compute_complexity(bgr)
+
+    assert complexity.tier == "simple"
+    assert complexity.element_count >= 1
+    assert complexity.aspect_ratio == 0.75
+
+
+def test_dense_tall_page_scores_higher():
+    busy = compute_complexity(_busy_page())
+    blank = compute_complexity(np.full((600, 800, 3), 250, dtype=np.uint8))
+
+    assert busy.score > blank.score
+    assert busy.tier != "simple"
+    assert busy.text_region_ratio > 0.05
+    assert busy.color_cardinality > blank.color_cardinality
+
+
+def test_analyze_complexity_caches_by_content():
+    ok, buf = cv2.imencode(".png", _busy_page())
+    assert ok
+    data_url = f"data:image/png;base64,{base64.b64encode(buf.tobytes()).decode()}"
+
+    first = analyze_complexity(data_url)
+    assert analyze_complexity(data_url) is first
@@ -0,0 +1,124 @@
+import asyncio
+from typing import List
+
+import pytest
+
+import image_generation.cache as cache_module
+from concurrency import PriorityLimiter, SingleFlight
+from image_generation.coordinator import ImageGenerationCoordinator
+
+
+@pytest.fixture(autouse=True)
+def _disable_cache(monkeypatch):
+    monkeypatch.setattr(cache_module.settings, "IMAGE_CACHE_ENABLED", False)
+
+
+async def test_priority_limiter_admits_lowest_priority_first():
+    limiter = PriorityLimiter(1)
+    order: List[int] = []
+    gate = asyncio.Event()
+
+    async def worker(priority: int) -> None:
+        async with limiter.slot(priority):
+            order.append(priority)
+            await gate.wait()
+
+    first = asyncio.create_task(worker(5))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(worker(p)) for p in (3, 1, 2)]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(first, *waiters)
+
+    assert order == [5, 1, 2, 3]
+    assert limiter.stats()["peak_active"] == 1
+    assert limiter.stats()["active"] == 0
+
+
+async def test_priority_limiter_skips_cancelled_waiters():
+    limiter = PriorityLimiter(1)
+    await limiter.acquire()
+    cancelled = asyncio.create_task(limiter.acquire(0))
+    waiting = asyncio.create_task(limiter.acquire(1))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+
+    limiter.release()
+    await asyncio.wait_for(waiting, 1)
+    limiter.release()
+    assert limiter.stats()["active"] == 0
+    assert limiter.stats()["waiting"] == 0
+
+
+async def test_single_flight_shares_in_flight_result():
+    flights: SingleFlight[int] = SingleFlight()
+    calls = 0
+
+    async def work() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+    assert results == [42] * 5
+    assert calls == 1
+    assert flights.stats() == {"calls": 5, "shared": 4, "in_flight": 0}
+
+    assert await flights.do("key", work) == 42
+    assert calls == 2
+
+
+async def test_coordinator_dedupes_prompts_and_caps_concurrency():
+    coordinator = ImageGenerationCoordinator({"flux": 2})
+    running = 0
+    peak = 0
+    generated: List[str] = []
+
+    def generator(prompt: str):
+        async def run() -> str:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            generated.append(prompt)
+            return f"https://cdn.example.com/{prompt}.png"
+
+        return run
+
+    prompts = ["hero", "Hero ", "logo", "avatar", "team", "hero"]
+    results = await asyncio.gather(
+        *(
+            coordinator.generate("flux", p, "1:1", generator(p), priority=i)
+            for i, p in enumerate(prompts)
+        )
+    )
+
+    assert results[0] == results[1] == results[5] == "https://cdn.example.com/hero.png"
+    assert sorted(generated) == ["avatar", "hero", "logo", "team"]
+    assert peak == 2
+    assert coordinator.stats()["single_flight"]["shared"] == 2
+
+
+async def test_coordinator_does_not_share_flights_across_api_keys():
+    coordinator = ImageGenerationCoordinator({"flux": 4})
+
+    async def rejected() -> str:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("invalid API key")
+
+    async def accepted() -> str:
+        await asyncio.sleep(0.01)
+        return "https://cdn.example.com/hero.png"
+
+    bad, good = await asyncio.gather(
+        coordinator.generate("flux", "hero", "1:1", rejected, api_key="bad-key"),
+        coordinator.generate("flux", "hero", "1:1", accepted, api_key="good-key"),
+        return_exceptions=True,
+    )
+
+    assert isinstance(bad, RuntimeError)
+    assert good == "https://cdn.example.com/hero.png"
+    assert coordinator.stats()["single_flight"]["shared"] == 0
@@ -0,0 +1,110 @@
+import base64
+import time
+
+import pytest
+
+import image_generation.cache as cache_module
+import image_generation.coordinator as coordinator_module
+import image_generation.core as core
+from caching import DiskCache
+from image_generation.cache import ImageGenerationCache, cache_key
+
+PNG_DATA_URL = "data:image/png;base64," + base64.b64encode(b"fake-png").decode()
+
+
+def test_cache_key_normalizes_prompt():
+    assert cache_key("flux", "  Company   LOGO ", "1:1") == cache_key(
+        "flux", "company logo", "1:1"
+    )
+    assert cache_key("flux", "logo", "1:1") != cache_key("dalle3", "logo", "1:1")
+
+
+async def test_entries_persist_on_disk_and_track_time_saved(tmp_path):
+    cache = ImageGenerationCache(str(tmp_path), ttl=None, url_ttl=3600)
+    await cache.put("dalle3", "Hero image", "1024x1024", PNG_DATA_URL, 4.0)
+
+    reopened = ImageGenerationCache(str(tmp_path), ttl=None, url_ttl=3600)
+    assert await reopened.get("dalle3", "hero image", "1024x1024") == PNG_DATA_URL
+    assert await reopened.get("dalle3", "hero image", "512x512") is None
+
+    stats = reopened.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["time_saved_seconds"] == 4.0
+
+
+async def test_expired_provider_url_falls_back_to_stored_bytes(tmp_path):
+    cache = ImageGenerationCache(str(tmp_path), ttl=None, url_ttl=0)
+    await cache._cache.set(
+        cache_key("flux", "logo", "1:1"),
+        b"fake-png",
+        {
+            "url": "https://example.com/logo.png",
+            "mime_type": "image/png",
+            "created": time.time(),
+            "seconds": 1.0,
+        },
+    )
+    assert await cache.get("flux", "logo", "1:1") == PNG_DATA_URL
+
+
+def test_disk_cache_evicts_least_recently_read_past_max_bytes(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl=None, max_bytes=4000)
+    for key in ("a", "b", "c"):
+        cache.set(key, b"x" * 1000, {})
+        time.sleep(0.02)  # file times are only as fine as the kernel clock tick
+    assert cache.get("a") is not None
+
+    cache.set("d", b"x" * 1000, {})
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ("a", "c", "d"))
+    # A restarted process counts the directory on its first write and keeps
+    # the cap.
+    reopened = DiskCache(str(tmp_path), max_bytes=4000)
+    reopened.set("e", b"x" * 1000, {})
+    assert reopened._bytes is not None and 3000 < reopened._bytes <= 4000
+    assert reopened.get("e") is not None
+
+
+async def test_placeholders_are_not_cached(tmp_path):
+    cache = ImageGenerationCache(str(tmp_path), ttl=None, url_ttl=3600)
+    await cache.put("flux", "logo", "1:1", "https://placehold.co/100x100", 1.0)
+    assert await cache.get("flux", "logo", "1:1") is None
+
+
+async def test_process_tasks_only_generates_misses(monkeypatch, tmp_path):
+    cache = ImageGenerationCache(str(tmp_path), ttl=None, url_ttl=3600)
+    await cache.put("dalle3", "cached", "1024x1024", PNG_DATA_URL, 2.0)
+    monkeypatch.setattr(cache_module, "_image_cache", cache)
+
+    generated = []
+
+    async def fake_dalle(prompt, api_key, base_url, size):
+        generated.append(prompt)
+        return PNG_DATA_URL
+
+    monkeypatch.setattr(core, "generate_image_dalle", fake_dalle)
+
+    results = await core.process_tasks(["cached", "fresh"], "key", None, "dalle3")
+    assert results == [PNG_DATA_URL, PNG_DATA_URL]
+    assert generated == ["fresh"]
+
+    # The new result is written back in the background.
+    await coordinator_module.get_image_coordinator().wait_for_cache_writes()
+    assert await cache.get("dalle3", "fresh", "1024x1024") == PNG_DATA_URL
+
+
+async def test_process_tasks_keeps_failures_as_none(monkeypatch):
+    monkeypatch.setattr(cache_module.settings, "IMAGE_CACHE_ENABLED", False)
+
+    async def failing(prompt, api_key, aspect_ratio, megapixels):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(core, "generate_image_replicate", failing)
+    assert await core.process_tasks(["a"], "key", None, "flux") == [None]
+
+
+@pytest.fixture(autouse=True)
+def _reset_cache(monkeypatch):
+    monkeypatch.setattr(cache_module, "_image_cache", None)
@@ -0,0 +1,92 @@
+import base64
+import io
+from typing import Any
+
+from PIL import Image
+
+from image_processing.policy import (
+    apply_image_policy,
+    estimate_image_tokens,
+    fit_to_policy,
+)
+from llm import Llm
+from models.registry import ImagePolicy, ModelRegistry
+
+
+def _png_data_url(width: int, height: int) -> str:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(output, format="PNG")
+    return f"data:image/png;base64,{base64.b64encode(output.getvalue()).decode()}"
+
+
+def _image_size(data_url: str) -> tuple[int, int]:
+    img = Image.open(io.BytesIO(base64.b64decode(data_url.split(",", 1)[1])))
+    return img.size
+
+
+def _first_image_url(messages: Any) -> str:
+    return messages[1]["content"][0]["image_url"]["url"]
+
+
+def _messages(*image_urls: str):
+    return [
+        {"role": "system", "content": "system"},
+        {
+            "role": "user",
+            "content": [
+                *[
+                    {"type": "image_url", "image_url": {"url": u, "detail": "high"}}
+                    for u in image_urls
+                ],
+                {"type": "text", "text": "Generate code"},
+            ],
+        },
+    ]
+
+
+def test_registry_exposes_provider_policies():
+    claude = ModelRegistry.image_policy(Llm.CLAUDE_4_5_SONNET_2025_11_01)
+    assert claude.max_long_edge == 1568
+    gpt = ModelRegistry.image_policy(Llm.GPT_5)
+    assert gpt.max_long_edge == 2048
+    for llm in Llm:
+        ModelRegistry.image_policy(llm)
+
+
+def test_fit_to_policy_respects_long_edge_and_pixels():
+    policy = ImagePolicy(max_long_edge=1000, max_pixels=200_000)
+    assert fit_to_policy(800, 200, policy) == (800, 200)
+    w, h = fit_to_policy(1280, 6000, policy)
+    assert max(w, h) <= 1000
+    assert w * h <= 200_000
+
+
+def test_apply_image_policy_resizes_tall_screenshot():
+    url = _png_data_url(1280, 4000)
+    policy = ModelRegistry.image_policy(Llm.CLAUDE_4_5_SONNET_2025_11_01)
+    messages = _messages(url, url)
+
+    resized, report = apply_image_policy(messages, policy, "anthropic")
+
+    new_url = _first_image_url(resized)
+    assert max(_image_size(new_url)) <= 1568
+    assert report.images == 2
+    assert report.resized == 2
+    assert report.bytes_saved > 0
+    assert report.estimated_tokens == 2 * estimate_image_tokens(
+        "anthropic", *_image_size(new_url)
+    )
+    # Original messages are left untouched.
+    assert _first_image_url(messages) == url
+
+
+def test_apply_image_policy_keeps_small_images():
+    url = _png_data_url(400, 300)
+    policy = ModelRegistry.image_policy(Llm.GPT_5)
+
+    resized, report = apply_image_policy(_messages(url), policy, "openai")
+
+    assert _first_image_url(resized) == url
+    assert report.resized == 0
+    assert report.bytes_saved == 0
+    assert report.estimated_tokens == 85 + 170
@@ -0,0 +1,149 @@
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+import image_generation.streaming as streaming
+from image_generation.streaming import ImagePrefetcher, iter_placeholder_prompts
+from pipeline.codegen.stages.parallel_generation import ParallelGenerationStage
+
+
+@pytest.fixture
+def started(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    prompts: List[str] = []
+
+    async def fake_process_tasks(
+        prompts_in,
+        api_key,
+        base_url,
+        model,
+        gemini_api_key=None,
+        priorities=None,
+        dimensions=None,
+    ) -> List[Optional[str]]:
+        prompts.extend(prompts_in)
+        await asyncio.sleep(0)
+        if prompts_in[0] == "broken":
+            return [None]
+        return [f"https://cdn.example.com/{prompts_in[0].replace(' ', '-')}.png"]
+
+    monkeypatch.setattr(streaming, "process_tasks", fake_process_tasks)
+    return prompts
+
+
+def test_iter_placeholder_prompts_handles_quotes_and_entities():
+    code = (
+        '<img alt="Logo &amp; mark" src="https://placehold.co/40x40" '
+        'data-prompt="a > b logo">'
+        "<img src='https://example.com/real.png' alt='Real'>"
+        "<IMG SRC=https://placehold.co/10x10 ALT=Icon>"
+    )
+    assert list(iter_placeholder_prompts(code)) == [
+        ("Logo & mark", "a > b logo", "https://placehold.co/40x40"),
+        ("Icon", "Icon", "https://placehold.co/10x10"),
+    ]
+
+
+async def test_generation_starts_as_soon_as_a_tag_is_complete(started):
+    prefetcher = ImagePrefetcher("key", None, "dalle3")
+    chunks = [
+        "<div><im",
+        'g src="https://placehold.co/300x200" alt="Hero"',
+        ' data-prompt="sunny beach"',
+        "></div><p>text</p>",
+    ]
+    for chunk in chunks[:3]:
+        prefetcher.feed(chunk)
+    await asyncio.sleep(0)
+    assert started == []
+
+    prefetcher.feed(chunks[3])
+    await asyncio.sleep(0)
+    assert started == ["sunny beach"]
+
+    code = "".join(chunks)
+    assert await prefetcher.finish(code) == {
+        "Hero": "https://cdn.example.com/sunny-beach.png"
+    }
+    assert started == ["sunny beach"]
+
+
+async def test_tags_inside_streaming_scripts_are_not_generated(started):
+    prefetcher = ImagePrefetcher("key", None, "dalle3")
+    for chunk in [
+        "<script>const tpl = '<img src=\"https://placehold.co/1x1\" ",
+        "alt=\"Template\">';</scr",
+        'ipt><img src="https://placehold.co/2x2" alt="Real">',
+    ]:
+        prefetcher.feed(chunk)
+    await asyncio.sleep(0)
+
+    assert started == ["Real"]
+
+
+async def test_finish_covers_missed_tags_and_skips_known_alts(started):
+    prefetcher = ImagePrefetcher(
+        "key", None, "flux", image_cache={"Avatar": "data:image/png;base64,AAAA"}
+    )
+    prefetcher.feed('<img src="https://placehold.co/1x1" alt="Avatar">')
+    final_code = (
+        '<img src="https://placehold.co/1x1" alt="Avatar">'
+        '<img src="https://placehold.co/2x2" alt="Team photo">'
+        '<img src="https://placehold.co/3x3" alt="broken">'
+        '<img src="https://placehold.co/2x2" alt="Team photo">'
+    )
+
+    results = await prefetcher.finish(final_code)
+    assert results == {"Team photo": "https://cdn.example.com/Team-photo.png"}
+    assert started == ["Team photo", "broken"]
+
+
+async def test_finish_reports_images_not_yet_delivered(started):
+    prefetcher = ImagePrefetcher("key", None, "dalle3")
+    code = (
+        '<img src="https://placehold.co/10x10" alt="Early">'
+        '<img src="https://placehold.co/20x30" alt="Late">'
+    )
+    prefetcher.feed(code[: code.index("<img", 1)])
+    await asyncio.sleep(0.01)
+    prefetcher.start(code)
+    delivered = prefetcher.completed()
+    assert list(delivered) == ["Early"]
+    assert prefetcher.pending == 1
+
+    patches = []
+
+    async def on_image(alt, url, placeholder_src):
+        patches.append((alt, url, placeholder_src))
+
+    results = await prefetcher.finish(code, on_image, delivered)
+    assert set(results) == {"Early", "Late"}
+    assert patches == [
+        ("Late", "https://cdn.example.com/Late.png", "https://placehold.co/20x30")
+    ]
+
+
+async def test_pending_generations_are_cancelled_when_sending_fails(monkeypatch):
+    cancelled: List[str] = []
+
+    async def fake_process_tasks(prompts_in, *args, **kwargs) -> List[Optional[str]]:
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.extend(prompts_in)
+            raise
+        return [None]
+
+    async def send_message(_type, _value, _index):
+        await asyncio.sleep(0.01)  # the generation is running by now
+        raise ConnectionError("websocket closed")
+
+    monkeypatch.setattr(streaming, "process_tasks", fake_process_tasks)
+    stage = ParallelGenerationStage(send_message, None, None, "key", None, True)
+    stage._prefetchers = {0: ImagePrefetcher("key", None, "dalle3")}
+    code = '<img src="https://placehold.co/10x10" alt="Hero">'
+
+    with pytest.raises(ConnectionError):
+        await stage._perform_image_generation(code, {}, 0)
+    await asyncio.sleep(0)
+    assert cancelled == ["Hero"]
@@ -0,0 +1,42 @@
+import base64
+import io
+
+from PIL import Image
+
+from image_generation.html_rewriter import iter_img_tags
+from image_generation.preview import apply_previews, preview_image_url
+
+
+def _decode(url: str) -> Image.Image:
+    return Image.open(io.BytesIO(base64.b64decode(url.split(",", 1)[1])))
+
+
+def test_preview_matches_aspect_ratio_and_is_tiny():
+    url = preview_image_url("Hero banner", 1200, 400)
+    img = _decode(url)
+    assert img.size == (32, 11)
+    assert len(url) < 1000
+    assert preview_image_url("Hero banner", 1200, 400) == url
+
+
+def test_keywords_pick_palette_and_other_prompts_are_stable():
+    ocean = _decode(preview_image_url("Calm ocean waves", 100, 100)).convert("RGB")
+    top, bottom = ocean.getpixel((0, 0)), ocean.getpixel((0, 31))
+    assert isinstance(top, tuple) and isinstance(bottom, tuple)
+    assert top[2] > top[0] and bottom[2] > bottom[0]  # blue-ish
+
+    assert preview_image_url("Team photo", 50, 50) != preview_image_url(
+        "Quarterly chart", 50, 50
+    )
+
+
+def test_apply_previews_marks_only_pending_tags():
+    code = (
+        '<img src="https://placehold.co/300x100" alt="Hero" data-prompt="sunset">'
+        '<img src="https://placehold.co/40x40" alt="Logo">'
+    )
+    tags = list(iter_img_tags(apply_previews(code, ["Hero"])))
+    assert (tags[0].get("src") or "").startswith("data:image/png;base64,")
+    assert tags[0].get("data-preview") == "true"
+    assert (tags[0].get("width"), tags[0].get("height")) == ("300", "100")
+    assert tags[1].get("src") == "https://placehold.co/40x40"
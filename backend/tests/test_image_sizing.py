@@ -0,0 +1,65 @@
+import base64
+import io
+
+from PIL import Image
+
+import image_generation.cache as cache_module
+import image_generation.core as core
+from image_generation.sizing import downscale_to_placeholder, provider_size
+
+
+def _png_data_url(width: int, height: int) -> str:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 40)).save(output, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(output.getvalue()).decode()
+
+
+def test_provider_size_picks_nearest_aspect_ratio():
+    assert provider_size("dalle3", 1200, 400) == "1792x1024"
+    assert provider_size("dalle3", 300, 600) == "1024x1792"
+    assert provider_size("dalle3", 64, 64) == "1024x1024"
+
+    assert provider_size("flux", 1920, 1080) == "16:9"
+    assert provider_size("flux", 400, 500) == "4:5"
+    assert provider_size("flux", 2400, 1000) == "21:9"
+    # Small placeholders are rendered at 0.25 MP.
+    assert provider_size("flux", 48, 48) == "1:1@0.25"
+    assert provider_size("flux", 256, 256) == "1:1@0.25"
+    assert provider_size("flux", 300, 300) == "1:1"
+    assert provider_size("flux", 320, 180) == "16:9@0.25"
+
+    assert provider_size("gemini-3-pro-nano", 1200, 400) == "1024x1024"
+
+
+async def test_downscale_to_placeholder():
+    large = _png_data_url(1024, 1024)
+    out = await downscale_to_placeholder(large, 48, 48)
+    assert out.startswith("data:image/jpeg;base64,")
+    img = Image.open(io.BytesIO(base64.b64decode(out.split(",", 1)[1])))
+    assert img.size == (96, 96)
+
+    small = _png_data_url(64, 64)
+    assert await downscale_to_placeholder(small, 48, 48) == small
+
+
+async def test_process_tasks_requests_size_for_each_placeholder(monkeypatch):
+    monkeypatch.setattr(cache_module.settings, "IMAGE_CACHE_ENABLED", False)
+    requested = []
+
+    async def fake_replicate(prompt, api_key, aspect_ratio, megapixels):
+        requested.append((prompt, aspect_ratio, megapixels))
+        return _png_data_url(16, 9)
+
+    monkeypatch.setattr(core, "generate_image_replicate", fake_replicate)
+    await core.process_tasks(
+        ["banner", "portrait", "icon"],
+        "key",
+        None,
+        "flux",
+        dimensions=[(1600, 900), (300, 450), (40, 40)],
+    )
+    assert sorted(requested) == [
+        ("banner", "16:9", "1"),
+        ("icon", "1:1", "0.25"),
+        ("portrait", "2:3", "1"),
+    ]
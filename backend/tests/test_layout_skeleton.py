@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+from typing import Any, Dict
+
+from bs4 import BeautifulSoup, Tag
+
+from codegen.layout_skeleton import build_layout_skeleton
+from pipeline.codegen.stages.prompt_creation import PromptCreationStage
+
+
+def _element(element_id: str, element_type: str, x: float, y: float, w: float, h: float, **extra: Any) -> Dict[str, Any]:
+    return {
+        "id": element_id,
+        "type": element_type,
+        "coordinates": {"x": x, "y": y, "width": w, "height": h},
+        **extra,
+    }
+
+
+ELEMENTS_DATA = {
+    "image_dimensions": {"width": 800, "height": 600},
+    "elements": [
+        _element("nav", "header", 0, 0, 800, 60, properties={"background_color": "#111111"}),
+        _element("logo", "image", 20, 10, 100, 40),
+        _element("menu", "text", 600, 20, 80, 20, text_content="Pricing & <Docs>"),
+        _element("card", "card", 100, 100, 300, 400, properties={"border_radius": 8}),
+        _element("photo", "image", 110, 110, 280, 150),
+        _element("title", "text", 110, 280, 200, 30, properties={"font_size": 24}),
+        _element("cta", "button", 110, 330, 120, 40),
+    ],
+}
+ASSET_IDS = {"logo", "photo", "cta", "card"}
+
+
+def _tag(found: Any) -> Tag:
+    assert isinstance(found, Tag)
+    return found
+
+
+def test_css_skeleton_reproduces_element_positions() -> None:
+    skeleton = build_layout_skeleton(ELEMENTS_DATA, "html_css", ASSET_IDS)
+    assert skeleton is not None
+    soup = BeautifulSoup(skeleton, "html.parser")
+
+    assert [img["alt"] for img in soup.find_all("img")] == ["logo", "photo", "cta"]
+    photo = _tag(soup.find("img", alt="photo"))
+    assert photo["src"] == "https://placehold.co/280x150"
+    # The nav's children are one row: flex with the measured offsets.
+    nav_style = str(_tag(_tag(soup.find("img", alt="logo")).parent)["style"])
+    assert "display:flex" in nav_style
+    assert "padding-left:20px" in nav_style and "padding-top:10px" in nav_style
+    assert "gap:480px" in nav_style
+    assert "margin-top:10px" in str(_tag(soup.find("p", string="Pricing & <Docs>"))["style"])
+    # A container with children is a div, not its asset.
+    card = _tag(photo.parent)
+    assert card.name == "div" and "border-radius:8px" in str(card["style"])
+    assert "left:100px;top:100px" in str(card["style"])
+    assert "font-size:24px" in str(_tag(soup.find_all("p")[1])["style"])
+
+
+def test_tailwind_skeleton_uses_classes_and_other_stacks_are_skipped() -> None:
+    skeleton = build_layout_skeleton(ELEMENTS_DATA, "html_tailwind", ASSET_IDS)
+    assert skeleton is not None
+    assert "cdn.tailwindcss.com" in skeleton
+    soup = BeautifulSoup(skeleton, "html.parser")
+    assert "style" not in str(soup.body)
+    assert "w-[280px]" in _tag(soup.find("img", alt="photo"))["class"]
+
+    assert build_layout_skeleton(ELEMENTS_DATA, "react_tailwind", ASSET_IDS) is None
+
+
+def test_elements_without_a_box_are_listed_for_the_model() -> None:
+    elements_data = {
+        **ELEMENTS_DATA,
+        "elements": ELEMENTS_DATA["elements"]
+        + [
+            {"id": "footer_note", "type": "text", "text_content": "Made -- with care"},
+            _element("broken", "icon", 10, 10, 0, 0),
+        ],
+    }
+    skeleton = build_layout_skeleton(elements_data, "html_css", ASSET_IDS)
+    assert skeleton is not None
+
+    assert "<!-- Unpositioned element footer_note (text): Made - - with care -->" in skeleton
+    assert "<!-- Unpositioned element broken (icon) -->" in skeleton
+    soup = BeautifulSoup(skeleton, "html.parser")
+    assert len(soup.find_all("img")) == 3
+
+
+async def test_prompt_asks_to_refine_the_skeleton() -> None:
+    async def throw_error(message: str) -> None:
+        raise AssertionError(message)
+
+    params: Any = SimpleNamespace(stack="html_css", prompt={"images": ["data:image/png;base64,"]})
+    messages, image_cache = await PromptCreationStage(throw_error).create_prompt_with_elements(
+        params, ELEMENTS_DATA, {"logo": "data:image/png;base64,x"}, "<html>SKELETON</html>"
+    )
+
+    text = messages[1]["content"][1]["text"]  # type: ignore[index]
+    assert "<html>SKELETON</html>" in text
+    assert "Extracted elements data" not in text
+    assert image_cache == {"logo": "data:image/png;base64,x"}
@@ -0,0 +1,125 @@
+import base64
+from typing import Any, Dict, List
+
+import cv2  # type: ignore
+import numpy as np  # type: ignore
+
+from image_analysis.local_detector import (
+    LOCAL_ANALYSIS_MODEL,
+    detect_elements,
+    detect_elements_bgr,
+)
+import pipeline.codegen.stages.image_analysis as stage_module
+from pipeline.codegen.stages.image_analysis import ImageAnalysisStage
+
+
+def _page() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    bgr = np.full((1600, 1440, 3), 255, dtype=np.uint8)
+    # Header bar with a logo word.
+    cv2.rectangle(bgr, (0, 0), (1439, 79), (60, 30, 20), -1)
+    cv2.putText(bgr, "Brand", (40, 52), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+    # Headline and a call-to-action button.
+    cv2.putText(
+        bgr, "Welcome to the product", (100, 250), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (30, 30, 30), 3
+    )
+    cv2.rectangle(bgr, (100, 320), (300, 376), (220, 120, 30), -1)
+    cv2.putText(bgr, "Sign up", (135, 357), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+    # Photo-like hero image.
+    noise = rng.integers(0, 255, (400, 500, 3), dtype=np.uint8)
+    bgr[220:620, 800:1300] = cv2.GaussianBlur(noise, (9, 9), 0)
+    # Subtle card with a title and an icon.
+    cv2.rectangle(bgr, (100, 800), (600, 1200), (240, 240, 245), -1)
+    cv2.putText(bgr, "Card title", (130, 860), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (20, 20, 20), 2)
+    cv2.circle(bgr, (140, 1150), 16, (20, 160, 40), -1)
+    return bgr
+
+
+def _by_type(elements: List[Dict[str, Any]], element_type: str) -> List[Dict[str, Any]]:
+    return [e for e in elements if e["type"] == element_type]
+
+
+def _contains(element: Dict[str, Any], x: int, y: int) -> bool:
+    c = element["coordinates"]
+    return c["x"] <= x < c["x"] + c["width"] and c["y"] <= y < c["y"] + c["height"]
+
+
+def test_detects_and_classifies_blocks():
+    data = detect_elements_bgr(_page())
+    elements = data["elements"]
+
+    assert data["image_dimensions"] == {"width": 1440, "height": 1600}
+    assert elements[0]["type"] == "background"
+    assert elements[0]["properties"]["background_color"] == "#ffffff"
+
+    (header,) = _by_type(elements, "header")
+    assert header["coordinates"]["y"] == 0 and header["coordinates"]["width"] >= 1400
+    assert header["properties"]["background_color"] == "#141e3c"
+
+    (button,) = _by_type(elements, "button")
+    assert _contains(button, 200, 348)
+    assert abs(button["coordinates"]["width"] - 201) <= 4
+    assert button["properties"]["background_color"] == "#1e78dc"
+
+    (image,) = _by_type(elements, "image")
+    assert _contains(image, 1000, 400)
+
+    (card,) = _by_type(elements, "card")
+    assert _contains(card, 350, 1000)
+
+    texts = _by_type(elements, "text")
+    assert any(_contains(t, 60, 40) and t["z_index"] == 2 for t in texts)  # in header
+    assert any(_contains(t, 300, 240) for t in texts)
+    assert any(_contains(t, 200, 850) and t["z_index"] == 2 for t in texts)  # in card
+
+    (icon,) = _by_type(elements, "icon")
+    assert _contains(icon, 140, 1150)
+
+
+def test_output_is_deterministic_with_unique_ids():
+    ok, buf = cv2.imencode(".png", _page())
+    assert ok
+    data_url = f"data:image/png;base64,{base64.b64encode(buf.tobytes()).decode()}"
+
+    first = detect_elements(data_url)
+    assert detect_elements(data_url) == first
+    ids = [e["id"] for e in first["elements"]]
+    assert len(ids) == len(set(ids))
+
+
+async def test_analysis_stage_uses_local_detector_without_llm(monkeypatch):
+    extracted: List[Dict[str, Any]] = []
+
+    # GrabCut on the large blocks is slow and not what this test is about.
+    class FakeExtractor:
+        def __init__(self, original_image_data_url):
+            pass
+
+        async def add(self, element):
+            extracted.append(element)
+
+        async def result(self):
+            return {"image_1": "data:image/png;base64,abc"}
+
+    monkeypatch.setattr(stage_module, "AssetExtractor", FakeExtractor)
+    monkeypatch.setattr(stage_module.settings, "ANALYSIS_CACHE_ENABLED", False)
+
+    ok, buf = cv2.imencode(".png", _page())
+    data_url = f"data:image/png;base64,{base64.b64encode(buf.tobytes()).decode()}"
+    messages: List[str] = []
+
+    async def send_message(_type, value, _index):
+        messages.append(value)
+
+    async def throw_error(message):
+        raise AssertionError(message)
+
+    stage = ImageAnalysisStage(send_message, throw_error)
+    elements_data, assets = await stage.analyze_image(
+        data_url, LOCAL_ANALYSIS_MODEL, None, None, None
+    )
+
+    assert elements_data == detect_elements(data_url)
+    assert extracted == elements_data["elements"]
+    assert assets == {"image_1": "data:image/png;base64,abc"}
+    assert "Detecting design elements locally..." in messages
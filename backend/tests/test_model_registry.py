@@ -23,3 +23,19 @@ def test_gemini_capabilities():
     assert not ModelRegistry.is_compatible(Llm.GEMINI_3_PRO, "update", "image")
     assert not ModelRegistry.is_compatible(Llm.GEMINI_3_PRO, "create", "text")
 
+
+def test_simple_tier_reduces_budgets():
+    gpt5 = ModelRegistry.openai_params(Llm.GPT_5, "simple")
+    assert gpt5.max_completion_tokens == 16384
+    assert ModelRegistry.openai_params(Llm.GPT_5, "complex").max_completion_tokens == 32768
+
+    o3 = ModelRegistry.openai_params(Llm.O3_2025_04_16, "simple")
+    assert o3.reasoning_effort == "medium"
+
+    claude = ModelRegistry.anthropic_params(Llm.CLAUDE_4_SONNET_2025_05_14, "simple")
+    assert claude.max_tokens == 15000
+    assert claude.thinking_budget_tokens == 5000
+
+    # Small limits are never reduced below the floor.
+    gpt4o = ModelRegistry.openai_params(Llm.GPT_4O_2024_05_13, "simple")
+    assert gpt4o.max_tokens == 4096
@@ -84,3 +84,29 @@ class TestModelSelectionPreference:
             preferred_model="not-a-real-model",
         )
         assert models == [Llm.GPT_5] * NUM_VARIANTS
+
+    @pytest.mark.asyncio
+    async def test_simple_tier_uses_fast_fallback_model(self):
+        models = await self.model_selector.select_models(
+            generation_type="create",
+            input_mode="image",
+            openai_api_key=None,
+            anthropic_api_key="key",
+            gemini_api_key=None,
+            preferred_model=None,
+            complexity_tier="simple",
+        )
+        assert models == [Llm.CLAUDE_4_5_SONNET_2025_11_01] * NUM_VARIANTS
+
+    @pytest.mark.asyncio
+    async def test_complexity_tier_does_not_override_preference(self):
+        models = await self.model_selector.select_models(
+            generation_type="create",
+            input_mode="image",
+            openai_api_key="key",
+            anthropic_api_key="key",
+            gemini_api_key="key",
+            preferred_model=Llm.GPT_5.value,
+            complexity_tier="simple",
+        )
+        assert models == [Llm.GPT_5] * NUM_VARIANTS
@@ -0,0 +1,70 @@
+import random
+from typing import cast
+
+import numpy as np
+from PIL import Image
+
+from image_processing.near_duplicates import BKTree, NearDuplicateIndex
+from image_processing.perceptual_hash import compute_hashes, hamming_distance
+
+
+def _page(seed: int) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    arr = np.full((400, 600, 3), 245, dtype=np.uint8)
+    for _ in range(12):
+        x, y = rng.integers(0, 500), rng.integers(0, 350)
+        w, h = rng.integers(30, 100), rng.integers(10, 50)
+        arr[y : y + h, x : x + w] = rng.integers(0, 255, size=3)
+    return Image.fromarray(arr)
+
+
+def test_hashes_are_stable_under_small_changes():
+    page = _page(1)
+    recaptured = Image.fromarray(
+        np.clip(np.asarray(page).astype(int) + 3, 0, 255).astype(np.uint8)
+    )
+    cropped = page.crop((2, 2, 598, 398))
+    other = _page(2)
+
+    base = compute_hashes(page)
+    for variant in (recaptured, cropped):
+        hashes = compute_hashes(variant)
+        assert hamming_distance(base.phash, hashes.phash) <= 4
+        assert hamming_distance(base.dhash, hashes.dhash) <= 6
+    assert hamming_distance(base.phash, compute_hashes(other).phash) > 10
+
+
+def test_bk_tree_matches_linear_scan():
+    rnd = random.Random(0)
+    hashes = [rnd.getrandbits(64) for _ in range(300)]
+    tree = BKTree()
+    for i, h in enumerate(hashes):
+        tree.add(h, i)
+
+    query = hashes[17] ^ 0b1011  # 3 bits away from entry 17
+    expected = sorted(
+        i for i, h in enumerate(hashes) if hamming_distance(h, query) <= 12
+    )
+    found = sorted(cast(int, key) for _, key in tree.search(query, 12))
+    assert found == expected
+    assert 17 in found
+
+
+def test_index_lookup_eviction_and_stats():
+    index: NearDuplicateIndex[str] = NearDuplicateIndex(capacity=2, max_distance=4)
+    first, second, third = (compute_hashes(_page(s)) for s in (1, 2, 3))
+
+    index.add(first, "first")
+    index.add(second, "second")
+    assert index.lookup(compute_hashes(_page(1).crop((1, 1, 599, 399)))) is not None
+    match = index.lookup(first, same_size=True)
+    assert match == (0, "first")
+
+    index.add(third, "third")  # evicts "first"
+    assert len(index) == 2
+    assert index.lookup(first) is None
+
+    stats = index.stats()
+    assert stats["size"] == 2
+    assert stats["lookups"] == 3
+    assert stats["hits"] == 2
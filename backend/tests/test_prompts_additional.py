@@ -288,3 +288,43 @@ class TestCreatePromptImageSupport:
             # Assert the structure matches
             actual: ExpectedResult = {"messages": messages, "image_cache": image_cache}
             assert_structure_match(actual, expected)
+
+    @pytest.mark.asyncio
+    async def test_repeated_images_in_history_are_sent_once(self) -> None:
+        """Test that a reference image repeated across history is uploaded once."""
+        history = [
+            {"text": "<html>Initial code</html>", "images": []},
+            {"text": "Match this again", "images": [self.TEST_IMAGE_URL]},
+            {"text": "<html>Second code</html>", "images": []},
+        ]
+        mock_system_prompts: Dict[str, str] = {self.TEST_STACK: self.MOCK_SYSTEM_PROMPT}
+
+        with patch("prompts.SYSTEM_PROMPTS", mock_system_prompts), \
+             patch("prompts.create_alt_url_mapping", return_value={}):
+            messages, _ = await create_prompt(
+                stack=self.TEST_STACK,
+                input_mode="image",
+                generation_type="update",
+                prompt={"text": "", "images": [self.TEST_IMAGE_URL]},
+                history=history,
+                is_imported_from_code=False,
+            )
+            omitted, _ = await create_prompt(
+                stack=self.TEST_STACK,
+                input_mode="image",
+                generation_type="update",
+                prompt={"text": "", "images": [self.TEST_IMAGE_URL]},
+                history=history,
+                is_imported_from_code=False,
+                duplicate_image_policy="omit",
+            )
+
+        sent: List[Any] = list(messages)
+        assert sent[3]["content"] == [
+            {"type": "text", "text": "[Same image as image #1 above]"},
+            {"type": "text", "text": "Match this again"},
+        ]
+        kept: List[Any] = list(omitted)
+        assert kept[3]["content"] == [{"type": "text", "text": "Match this again"}]
+        # The first occurrence is kept in both cases.
+        assert sent[1]["content"][0]["image_url"]["url"] == self.TEST_IMAGE_URL
@@ -0,0 +1,105 @@
+import asyncio
+from typing import Any, Dict
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import image_generation.replicate as replicate
+
+
+class FakeReplicate:
+    """Local stand-in for the predictions API, keyed by prompt."""
+
+    def __init__(self) -> None:
+        self.predictions: Dict[str, Dict[str, Any]] = {}
+        self.prefer_headers: list[str | None] = []
+        self.cancelled: list[str] = []
+        app = web.Application()
+        app.router.add_post(
+            "/v1/models/black-forest-labs/flux-schnell/predictions", self.create
+        )
+        app.router.add_get("/v1/predictions/{id}", self.get)
+        app.router.add_post("/v1/predictions/{id}/cancel", self.cancel)
+        self.server = TestServer(app)
+
+    async def create(self, request: web.Request) -> web.Response:
+        self.prefer_headers.append(request.headers.get("Prefer"))
+        prompt = (await request.json())["input"]["prompt"]
+        prediction = {"id": f"p{len(self.predictions)}", "prompt": prompt, "gets": 0}
+        self.predictions[prediction["id"]] = prediction
+        if prompt == "fast":
+            return web.json_response(
+                {"id": prediction["id"], "status": "succeeded", "output": ["https://out/fast.png"]}
+            )
+        cancel_url = str(self.server.make_url(f"/v1/predictions/{prediction['id']}/cancel"))
+        return web.json_response(
+            {"id": prediction["id"], "status": "starting", "urls": {"cancel": cancel_url}}
+        )
+
+    async def get(self, request: web.Request) -> web.Response:
+        prediction = self.predictions[request.match_info["id"]]
+        prediction["gets"] += 1
+        body: Dict[str, Any] = {"id": prediction["id"], "status": "processing"}
+        if prediction["prompt"] == "slow-success" and prediction["gets"] >= 3:
+            body = {**body, "status": "succeeded", "output": ["https://out/slow.png"]}
+        elif prediction["prompt"] == "broken":
+            body = {**body, "status": "failed", "error": "NSFW content detected"}
+        return web.json_response(body)
+
+    async def cancel(self, request: web.Request) -> web.Response:
+        self.cancelled.append(request.match_info["id"])
+        return web.json_response({"id": request.match_info["id"], "status": "canceled"})
+
+
+@pytest.fixture
+async def fake_replicate(monkeypatch):
+    fake = FakeReplicate()
+    await fake.server.start_server()
+    monkeypatch.setattr(
+        replicate.settings,
+        "REPLICATE_API_BASE_URL",
+        str(fake.server.make_url("/v1")),
+    )
+    monkeypatch.setattr(replicate, "_client", None)
+    monkeypatch.setattr(replicate, "stats", replicate.ReplicateStats())
+    yield fake
+    if replicate._client is not None:
+        await replicate._client.aclose()
+    await fake.server.close()
+
+
+async def test_prefer_wait_completes_without_polling(fake_replicate):
+    url = await replicate.call_replicate({"prompt": "fast"}, "token", deadline=5)
+    assert url == "https://out/fast.png"
+    assert fake_replicate.prefer_headers == ["wait=5"]
+    assert replicate.stats.snapshot()["completed_without_polling"] == 1
+    assert replicate.stats.polls == 0
+
+
+async def test_falls_back_to_polling_with_backoff(fake_replicate):
+    url = await replicate.call_replicate({"prompt": "slow-success"}, "token", deadline=5)
+    assert url == "https://out/slow.png"
+    assert replicate.stats.polls == 3
+
+
+async def test_failed_prediction_raises(fake_replicate):
+    with pytest.raises(ValueError, match="NSFW"):
+        await replicate.call_replicate({"prompt": "broken"}, "token", deadline=5)
+    assert replicate.stats.failures == 1
+
+
+async def test_deadline_raises_timeout(fake_replicate):
+    with pytest.raises(TimeoutError):
+        await replicate.call_replicate({"prompt": "never"}, "token", deadline=0.5)
+    assert replicate.stats.timeouts == 1
+    assert fake_replicate.cancelled == ["p0"]
+
+
+async def test_client_is_shared_between_calls(fake_replicate):
+    await asyncio.gather(
+        *(replicate.call_replicate({"prompt": "fast"}, "token", deadline=5) for _ in range(3))
+    )
+    client = replicate.get_client()
+    await replicate.call_replicate({"prompt": "fast"}, "token", deadline=5)
+    assert replicate.get_client() is client
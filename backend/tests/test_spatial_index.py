@@ -0,0 +1,147 @@
+import base64
+import random
+from typing import Any, Dict, List
+
+import cv2
+import numpy as np
+import pytest
+
+import image_analysis.spatial_index as spatial_index
+from image_analysis.asset_extraction import AssetExtractor
+from image_analysis.spatial_index import (
+    ROOT,
+    ElementIndex,
+    find_redundant,
+    prune_redundant_elements,
+)
+
+
+def _element(element_id: str, element_type: str, x: float, y: float, w: float, h: float) -> Dict[str, Any]:
+    return {
+        "id": element_id,
+        "type": element_type,
+        "coordinates": {"x": x, "y": y, "width": w, "height": h},
+    }
+
+
+PAGE = [
+    _element("card_2", "card", 380, 100, 300, 200),
+    _element("card_1", "card", 40, 102, 300, 200),
+    _element("photo", "image", 50, 110, 280, 120),
+    _element("badge", "icon", 60, 120, 24, 24),
+    _element("title_1", "text", 52, 240, 200, 24),
+    _element("title_2", "text", 392, 240, 200, 24),
+    _element("title_2_again", "text", 393, 241, 200, 24),
+    _element("cta", "button", 52, 270, 100, 28),
+]
+
+
+def test_containment_tree_and_reading_order() -> None:
+    index = ElementIndex(PAGE)
+    ids = lambda indices: [PAGE[i]["id"] for i in indices]  # noqa: E731
+
+    # Cards 2px apart vertically still read left to right.
+    assert ids(index.children[ROOT]) == ["card_1", "card_2"]
+    assert ids(index.children[1]) == ["photo", "title_1", "cta"]
+    assert ids(index.children[2]) == ["badge"]
+    assert ids(index.ancestors(3)) == ["photo", "card_1"]
+
+    groups = {(g.axis, tuple(ids(g.members))) for g in index.groups(1)}
+    assert ("column", ("photo", "title_1", "cta")) in groups
+    assert ("row", ("card_1", "card_2")) in {
+        (g.axis, tuple(ids(g.members))) for g in index.groups(ROOT)
+    }
+
+
+# 0 indexes x from the first box on; the default only for busy bands.
+SCAN_LIMITS = [0, spatial_index.LINEAR_SCAN_LIMIT]
+
+
+@pytest.mark.parametrize("scan_limit", SCAN_LIMITS)
+def test_sweep_finds_the_same_overlaps_as_brute_force(monkeypatch, scan_limit: int) -> None:
+    monkeypatch.setattr(spatial_index, "LINEAR_SCAN_LIMIT", scan_limit)
+    rng = random.Random(0)
+    elements = [
+        _element(str(i), "card", rng.uniform(0, 900), rng.uniform(0, 3000), rng.uniform(5, 300), rng.uniform(5, 300))
+        for i in range(300)
+    ]
+    elements.append({"id": "no_box", "type": "text"})
+    index = ElementIndex(elements)
+
+    expected = [
+        (i, j)
+        for i in range(len(elements) - 1)
+        for j in range(i + 1, len(elements) - 1)
+        if index.iou(i, j) > 0
+    ]
+    assert index.overlaps == expected
+    assert index.parents[-1] == ROOT
+
+
+@pytest.mark.parametrize("scan_limit", SCAN_LIMITS)
+def test_sweep_handles_shared_and_touching_edges(monkeypatch, scan_limit: int) -> None:
+    monkeypatch.setattr(spatial_index, "LINEAR_SCAN_LIMIT", scan_limit)
+    # Grid cells share edges with their neighbours (touching, not overlapping)
+    # and sit under full-width sections, with some cells spanning two columns.
+    # Each row keeps more boxes active than the linear scan limit.
+    elements = [_element(f"section_{r}", "section", 0, r * 100, 20000, 100) for r in range(3)]
+    elements += [
+        _element(f"cell_{r}_{c}", "card", c * 100, r * 100, 200 if c % 5 == 0 else 100, 100)
+        for r in range(3)
+        for c in range(200)
+    ]
+    index = ElementIndex(elements)
+
+    expected = [
+        (i, j)
+        for i in range(len(elements))
+        for j in range(i + 1, len(elements))
+        if index.iou(i, j) > 0
+    ]
+    assert index.overlaps == expected
+
+
+def test_prune_drops_pictures_inside_images_and_duplicates() -> None:
+    # Text and buttons on top of a picture still have to be rendered.
+    page = PAGE + [
+        _element("caption", "text", 60, 200, 120, 20),
+        _element("play", "button", 170, 150, 40, 40),
+    ]
+    data = {"elements": [dict(e) for e in page]}
+    reasons = {page[i]["id"]: reason for i, reason in find_redundant(ElementIndex(page)).items()}
+    assert reasons == {"badge": "inside image photo", "title_2_again": "duplicate of title_2"}
+
+    dropped = prune_redundant_elements(data)
+
+    assert dropped == ["badge", "title_2_again"]
+    assert [e["id"] for e in data["elements"]] == [
+        "card_2", "card_1", "photo", "title_1", "title_2", "cta", "caption", "play"
+    ]
+
+
+def _png_data_url(image: np.ndarray) -> str:
+    ok, buf = cv2.imencode(".png", image)
+    assert ok
+    return f"data:image/png;base64,{base64.b64encode(buf.tobytes()).decode('utf-8')}"
+
+
+async def test_discarded_elements_leave_extractor_result() -> None:
+    bgr = np.full((200, 400, 3), 255, dtype=np.uint8)
+    for x in (20, 120, 220):
+        cv2.circle(bgr, (x + 30, 60), 20, (40, 140, 220), -1)
+    elements: List[Dict[str, Any]] = [
+        _element("icon_a", "icon", 20, 30, 60, 60),
+        _element("icon_b", "icon", 120, 30, 60, 60),
+        _element("icon_c", "icon", 220, 30, 60, 60),
+    ]
+    extractor = AssetExtractor(_png_data_url(bgr))
+    for element in elements[:2]:
+        await extractor.add(element)
+
+    # icon_b reuses icon_a's cut; dropping icon_a must not lose it.
+    extractor.discard(["icon_a"])
+    await extractor.add(elements[2])
+    assets = await extractor.result()
+
+    assert set(assets) == {"icon_b", "icon_c"}
+    assert assets["icon_b"] == assets["icon_c"]
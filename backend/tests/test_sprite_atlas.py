@@ -0,0 +1,94 @@
+import base64
+from typing import Dict
+
+import cv2
+import numpy as np
+from bs4 import BeautifulSoup
+
+from image_analysis.sprite_atlas import (
+    SPRITE_MAX_SIDE,
+    TRANSPARENT_PIXEL,
+    apply_sprites,
+    pack_sprites,
+)
+
+
+def _png_data_url(image: np.ndarray) -> str:
+    ok, buf = cv2.imencode(".png", image)
+    assert ok
+    return f"data:image/png;base64,{base64.b64encode(buf.tobytes()).decode('utf-8')}"
+
+
+def _decode(url: str) -> np.ndarray:
+    data = np.frombuffer(base64.b64decode(url.split(",", 1)[1]), dtype=np.uint8)
+    image = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+    assert image is not None
+    return image
+
+
+def _assets() -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    sizes = {"icon_1": (24, 24), "icon_2": (48, 32), "logo": (120, 40), "badge": (16, 64)}
+    return {
+        element_id: rng.integers(0, 256, (h, w, 4), dtype=np.uint8)
+        for element_id, (w, h) in sizes.items()
+    }
+
+
+def test_packed_frames_hold_the_exact_asset_pixels() -> None:
+    images = _assets()
+    element_assets = {element_id: _png_data_url(image) for element_id, image in images.items()}
+    element_assets["icon_1_copy"] = element_assets["icon_1"]
+    large = np.zeros((SPRITE_MAX_SIDE + 1, 10, 4), dtype=np.uint8)
+    element_assets["hero"] = _png_data_url(large)
+
+    atlas = pack_sprites(element_assets)
+
+    assert atlas is not None
+    assert set(atlas.frames) == {"icon_1", "icon_1_copy", "icon_2", "logo", "badge"}
+    assert atlas.frames["icon_1"] == atlas.frames["icon_1_copy"]
+    sheets = [_decode(sheet) for sheet in atlas.sheets]
+    occupied = [np.zeros(sheet.shape[:2], dtype=bool) for sheet in sheets]
+    for element_id, image in images.items():
+        frame = atlas.frames[element_id]
+        region = np.s_[frame.y : frame.y + frame.height, frame.x : frame.x + frame.width]
+        assert np.array_equal(sheets[frame.sheet][region], image)
+        assert not occupied[frame.sheet][region].any()
+        occupied[frame.sheet][region] = True
+
+
+def test_nothing_to_pack_below_two_small_assets() -> None:
+    image = _assets()["icon_1"]
+    assert pack_sprites({"a": _png_data_url(image), "b": _png_data_url(image)}) is None
+    assert pack_sprites({"a": "https://example.com/a.png"}) is None
+
+
+def test_apply_sprites_rewrites_only_exact_size_placeholders() -> None:
+    images = _assets()
+    atlas = pack_sprites({element_id: _png_data_url(image) for element_id, image in images.items()})
+    assert atlas is not None
+    html = (
+        "<html><head><title>t</title></head><body>"
+        '<img src="https://placehold.co/24x24" alt="icon_1" class="w-6">'
+        '<img src="https://placehold.co/120x40" alt="logo" style="opacity:.5">'
+        '<img src="https://placehold.co/240x80" alt="icon_2">'
+        '<img src="https://placehold.co/16x64" alt="unknown">'
+        "</body></html>"
+    )
+
+    out = apply_sprites(html, atlas)
+
+    soup = BeautifulSoup(out, "html.parser")
+    icon, logo, scaled, unknown = soup.find_all("img")
+    frame = atlas.frames["icon_1"]
+    assert icon["src"] == TRANSPARENT_PIXEL
+    assert icon["class"] == ["w-6", f"asset-sprite-{frame.sheet}"]
+    assert f"background-position:-{frame.x}px -{frame.y}px;" in icon["style"]
+    assert str(logo["style"]).endswith("opacity:.5")
+    assert (logo["width"], logo["height"]) == ("120", "40")
+    assert scaled["src"] == "https://placehold.co/240x80"
+    assert unknown["src"] == "https://placehold.co/16x64"
+    head = soup.head
+    assert head is not None and len(head.find_all("style")) == 1
+    assert head.style is not None and head.style.string is not None
+    assert atlas.sheets[frame.sheet] in head.style.string
@@ -0,0 +1,159 @@
+import asyncio
+import base64
+import io
+import time
+from typing import Any, Dict, List
+
+from PIL import Image
+
+import image_analysis.tiled_analysis as tiled_analysis
+import pytest
+from config.settings import settings
+from image_analysis.tiled_analysis import (
+    AnalysisTile,
+    extract_elements_tiled,
+    merge_tile_elements,
+    plan_tiles,
+)
+from llm import Llm
+
+
+def _element(element_id: str, element_type: str, x: float, y: float, w: float, h: float) -> Dict[str, Any]:
+    return {
+        "id": element_id,
+        "type": element_type,
+        "coordinates": {"x": x, "y": y, "width": w, "height": h},
+    }
+
+
+def _screenshot(width: int, height: int) -> str:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), "white").save(output, format="PNG")
+    return f"data:image/png;base64,{base64.b64encode(output.getvalue()).decode('utf-8')}"
+
+
+def test_tiles_cover_the_page_with_overlap() -> None:
+    assert plan_tiles(1200, 900, 1600, 1400, 200) == [AnalysisTile(0, 0, 1200, 900)]
+
+    tiles = plan_tiles(1440, 5000, 1600, 1400, 200)
+    assert [tile.y for tile in tiles] == [0, 1200, 2400, 3600]
+    assert all(tile.width == 1440 and tile.height == 1400 for tile in tiles)
+    for upper, lower in zip(tiles, tiles[1:]):
+        assert upper.y + upper.height - lower.y >= 200
+    assert tiles[-1].y + tiles[-1].height == 5000
+
+
+def test_merge_drops_duplicates_from_overlap_bands() -> None:
+    # Tiles 0 and 1 overlap in y 1200-1400.
+    elements = [
+        _element("t1_card", "card", 100, 1250, 300, 100),  # seen whole by both
+        _element("t1_hero", "image", 0, 1300, 1440, 100),  # cut off at tile 0's bottom
+        _element("t1_cta", "button", 600, 1220, 120, 40),
+        _element("t2_card", "card", 102, 1252, 298, 99),
+        _element("t2_hero", "image", 0, 1300, 1440, 400),
+        _element("t2_cta", "text", 600, 1220, 120, 40),  # other type: kept
+    ]
+    merged = merge_tile_elements(
+        elements, [0, 0, 0, 1, 1, 1], [False, True, False, False, False, False]
+    )
+
+    assert [e["id"] for e in merged] == ["t1_card", "t1_cta", "t2_hero", "t2_cta"]
+
+
+async def test_tiles_run_concurrently_and_map_to_page(monkeypatch) -> None:
+    monkeypatch.setattr(tiled_analysis, "_limiters", {})
+    monkeypatch.setattr(settings, "ANALYSIS_CONCURRENCY", 4)
+    delays = [0.1, 0.3, 0.2]
+    active = peak = 0
+
+    async def fake_extract(image_data_url: str, on_element: Any = None, **kwargs: Any) -> Dict[str, Any]:
+        nonlocal active, peak
+        with Image.open(io.BytesIO(base64.b64decode(image_data_url.split(",", 1)[1]))) as image:
+            height = image.height
+        call = len(calls)
+        calls.append(height)
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(delays[call])
+        active -= 1
+        elements = [
+            _element("body", "text", 10, 220, 100, 20),
+            _element("band", "card", 10, 420, 200, 40),
+        ]
+        for element in elements:
+            await on_element(element)
+        return {"image_dimensions": {"width": 400, "height": height}, "elements": elements}
+
+    calls: List[int] = []
+    streamed: List[str] = []
+
+    async def on_element(element: Dict[str, Any]) -> None:
+        streamed.append(element["id"])
+
+    monkeypatch.setattr(tiled_analysis, "extract_elements", fake_extract)
+    tiles = plan_tiles(400, 1100, 400, 500, 100)
+    start = time.perf_counter()
+    result = await extract_elements_tiled(
+        _screenshot(400, 1100), tiles, Llm.GPT_4_1_2025_04_14, on_element=on_element
+    )
+    elapsed = time.perf_counter() - start
+
+    assert calls == [500, 500, 500] and peak == 3
+    assert elapsed < sum(delays)
+    assert result["image_dimensions"] == {"width": 400, "height": 1100}
+    # Interior elements stream in page coordinates; band elements wait for the merge.
+    assert sorted(streamed) == ["t1_body", "t2_body", "t3_band", "t3_body"]
+    by_id = {e["id"]: e["coordinates"]["y"] for e in result["elements"]}
+    assert by_id["t2_body"] == 300 + 220 and by_id["t3_body"] == 600 + 220
+    assert len(result["elements"]) == 6
+
+
+async def test_provider_limiter_bounds_tile_calls(monkeypatch) -> None:
+    monkeypatch.setattr(tiled_analysis, "_limiters", {})
+    monkeypatch.setattr(settings, "ANALYSIS_CONCURRENCY", 2)
+    active = peak = 0
+
+    async def fake_extract(image_data_url: str, on_element: Any = None, **kwargs: Any) -> Dict[str, Any]:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        return {"elements": []}
+
+    monkeypatch.setattr(tiled_analysis, "extract_elements", fake_extract)
+    tiles = plan_tiles(400, 2000, 400, 300, 50)
+    assert len(tiles) == 8
+    await extract_elements_tiled(_screenshot(400, 2000), tiles, Llm.GPT_4_1_2025_04_14)
+
+    assert peak == 2
+
+
+
+async def test_failed_tile_cancels_the_others(monkeypatch) -> None:
+    monkeypatch.setattr(tiled_analysis, "_limiters", {})
+    monkeypatch.setattr(settings, "ANALYSIS_CONCURRENCY", 4)
+    started = cancelled = 0
+
+    async def fake_extract(image_data_url: str, on_element: Any = None, **kwargs: Any) -> Dict[str, Any]:
+        nonlocal started, cancelled
+        started += 1
+        if started == 1:
+            await asyncio.sleep(0.01)
+            raise RuntimeError("tile failed")
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled += 1
+            raise
+        return {"elements": []}
+
+    monkeypatch.setattr(tiled_analysis, "extract_elements", fake_extract)
+    tiles = plan_tiles(400, 1100, 400, 500, 100)
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError):
+        await extract_elements_tiled(_screenshot(400, 1100), tiles, Llm.GPT_4_1_2025_04_14)
+
+    assert started == len(tiles) and cancelled == len(tiles) - 1
+    assert time.perf_counter() - start < 1
+
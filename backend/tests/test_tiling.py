@@ -0,0 +1,106 @@
+import asyncio
+import base64
+import io
+from typing import Any, List
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from codegen.stitching import stitch_sections
+from image_processing.tiling import find_section_breaks, split_screenshot
+from llm import Llm
+from pipeline.codegen.stages.parallel_generation import ParallelGenerationStage
+
+
+def _striped_page(height: int, block_rows: list[tuple[int, int]]) -> np.ndarray:
+    """White page with noisy content blocks at the given (top, bottom) rows."""
+    rng = np.random.default_rng(0)
+    gray = np.full((height, 300), 255, dtype=np.uint8)
+    for top, bottom in block_rows:
+        gray[top:bottom] = rng.integers(0, 255, size=(bottom - top, 300))
+    return gray
+
+
+def test_short_page_is_not_split():
+    gray = _striped_page(900, [(100, 800)])
+    assert find_section_breaks(gray) == []
+
+
+def test_breaks_land_in_whitespace_bands():
+    blocks = [(0, 900), (950, 1800), (1850, 2700), (2760, 3400)]
+    gray = _striped_page(3400, blocks)
+
+    breaks = find_section_breaks(gray, max_section_height=1600, min_section_height=400)
+
+    assert breaks
+    for cut in breaks:
+        assert not any(top <= cut < bottom for top, bottom in blocks)
+    bounds = [0, *breaks, 3400]
+    assert max(b - a for a, b in zip(bounds, bounds[1:])) <= 1600
+
+
+def test_split_screenshot_returns_sections_covering_page():
+    gray = _striped_page(3400, [(0, 900), (950, 1800), (1850, 3400)])
+    output = io.BytesIO()
+    Image.fromarray(gray).save(output, format="PNG")
+    data_url = f"data:image/png;base64,{base64.b64encode(output.getvalue()).decode()}"
+
+    sections = split_screenshot(data_url)
+
+    heights = [
+        Image.open(io.BytesIO(base64.b64decode(s.split(",", 1)[1]))).height
+        for s in sections
+    ]
+    assert len(sections) > 1
+    assert sum(heights) == 3400
+
+
+def test_stitch_sections_shares_head_and_concatenates_bodies():
+    first = (
+        "<html><head><title>A</title>"
+        '<script src="https://cdn.tailwindcss.com"></script></head>'
+        '<body class="bg-white"><h1>Hero</h1></body></html>'
+    )
+    second = (
+        "```html\n<html><head><title>B</title>"
+        '<script src="https://cdn.tailwindcss.com"></script>'
+        '<link href="https://fonts.googleapis.com/css2?family=Inter" rel="stylesheet">'
+        "</head><body><p>Footer</p></body></html>\n```"
+    )
+
+    html = stitch_sections([first, second])
+
+    assert html.count("cdn.tailwindcss.com") == 1
+    assert "<title>A</title>" in html and "<title>B</title>" not in html
+    assert "fonts.googleapis.com" in html
+    assert '<body class="bg-white">' in html
+    assert html.index("Hero") < html.index("Footer")
+    assert '<div data-section="2">' in html
+
+
+async def test_failed_section_cancels_the_others():
+    async def send_message(*args: Any) -> None:
+        return
+
+    cancelled: List[int] = []
+
+    async def section(number: int) -> Any:
+        if number == 1:
+            raise RuntimeError("provider error")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(number)
+            raise
+
+    def stream_model(model: Llm, messages: Any, index: int, callback: Any) -> Any:
+        return section(int(messages[0]["content"]))
+
+    stage = ParallelGenerationStage(send_message, None, None, "key", None, False)
+    stage._stream_model = stream_model  # type: ignore[method-assign]
+    prompts: Any = [[{"role": "user", "content": str(n)}] for n in range(3)]
+
+    with pytest.raises(RuntimeError):
+        await stage._generate_tiled(Llm.CLAUDE_4_5_SONNET_2025_11_01, prompts, 0)
+    assert sorted(cancelled) == [0, 2]
@@ -28,6 +28,9 @@ Fields:
     - analysisModel: model id used for element extraction (optional)
     - openAiApiKey / anthropicApiKey / geminiApiKey / openAiBaseURL: provider config
     - isImageGenerationEnabled: whether to replace placeholders with generated images
+    - isTiledGenerationEnabled: split tall screenshots into sections that are
+      generated concurrently and stitched together (image create mode, plain
+      HTML stacks only)
     - screenshotOneApiKey / editorTheme / isTermOfServiceAccepted:
       Frontend settings, currently ignored by this route but allowed for
       forwards compatibility.
@@ -67,6 +70,7 @@ class GenerateCodeWsPayload(BaseModel):
     geminiApiKey: Optional[str] = None
     screenshotOneApiKey: Optional[str] = None
     isImageGenerationEnabled: bool = True
+    isTiledGenerationEnabled: bool = False
     editorTheme: Optional[str] = None
     generatedCodeConfig: Stack = "html_tailwind"
     codeGenerationModel: Optional[str] = None
@@ -40,6 +40,7 @@ function App() {
     setHead,
     appendCommitCode,
     setCommitCode,
+    patchCommitImage,
     updateSelectedVariantIndex,
     resetCommits,
     resetHead,
@@ -69,6 +70,7 @@ function App() {
       geminiApiKey: null,
       screenshotOneApiKey: null,
       isImageGenerationEnabled: true,
+      isTiledGenerationEnabled: false,
       editorTheme: EditorTheme.COBALT,
       generatedCodeConfig: "html_tailwind",
       codeGenerationModel: "gpt-5",
@@ -110,7 +112,11 @@ function App() {
         next.codeGenerationModel =
           (registry.defaults.codeGenerationModel as string) || "gpt-5";
       }
-      if (next.analysisModel && !modelIds.has(next.analysisModel)) {
+      const analysisModelIds = new Set([
+        ...modelIds,
+        ...(registry.analyzers ?? []).map((a) => a.id),
+      ]);
+      if (next.analysisModel && !analysisModelIds.has(next.analysisModel)) {
         next.analysisModel = registry.defaults.analysisModel as string;
       }
 
@@ -204,6 +210,9 @@ function App() {
       onSetCode: (code, variantIndex) => {
         setCommitCode(commit.hash, variantIndex, code);
       },
+      onImagePatch: (patch, variantIndex) => {
+        patchCommitImage(commit.hash, variantIndex, patch);
+      },
       onStatusUpdate: (line, variantIndex) =>
         appendExecutionConsole(variantIndex, line),
       onVariantComplete: (variantIndex) => {
@@ -259,6 +268,9 @@ function App() {
       onSetCode: (code) => {
         setCommitCode(head, targetIndex, code);
       },
+      onImagePatch: (patch) => {
+        patchCommitImage(head, targetIndex, patch);
+      },
       onStatusUpdate: (line) => appendExecutionConsole(targetIndex, line),
       onVariantComplete: () => {
         updateVariantStatus(head, targetIndex, "complete");
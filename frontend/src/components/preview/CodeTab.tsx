@@ -1,10 +1,11 @@
-import { FaCopy } from "react-icons/fa";
+import { FaCopy, FaDownload } from "react-icons/fa";
 import CodeMirror from "./CodeMirror";
 import { Button } from "../ui/button";
 import { Settings } from "../../types";
 import copy from "copy-to-clipboard";
 import { useCallback } from "react";
 import toast from "react-hot-toast";
+import { HTTP_BACKEND_URL } from "../../config";
 
 interface Props {
   code: string;
@@ -18,6 +19,31 @@ function CodeTab({ code, setCode, settings }: Props) {
     toast.success("Copied to clipboard");
   }, [code]);
 
+  // Images may be referenced by backend asset URLs; the export inlines them
+  // so the downloaded file is self-contained.
+  const downloadCode = useCallback(async () => {
+    let exported = code;
+    try {
+      const response = await fetch(`${HTTP_BACKEND_URL}/api/assets/inline`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ code }),
+      });
+      if (response.ok) {
+        exported = (await response.json()).code;
+      }
+    } catch (e) {
+      console.error("Failed to inline assets", e);
+    }
+
+    const url = URL.createObjectURL(new Blob([exported], { type: "text/html" }));
+    const a = document.createElement("a");
+    a.href = url;
+    a.download = "index.html";
+    a.click();
+    URL.revokeObjectURL(url);
+  }, [code]);
+
   const doOpenInCodepenio = useCallback(async () => {
     // TODO: Update CSS and JS external links depending on the framework being used
     const data = {
@@ -63,6 +89,13 @@ function CodeTab({ code, setCode, settings }: Props) {
         >
           Copy Code <FaCopy className="ml-2" />
         </span>
+        <span
+          title="Download Code"
+          className="bg-black text-white flex items-center justify-center hover:text-black hover:bg-gray-100 cursor-pointer rounded-lg text-sm p-2.5 ml-2"
+          onClick={downloadCode}
+        >
+          Download <FaDownload className="ml-2" />
+        </span>
         <Button
           onClick={doOpenInCodepenio}
           className="bg-gray-100 text-black ml-2 py-2 px-4 border border-black rounded-md hover:bg-gray-400 focus:outline-none"
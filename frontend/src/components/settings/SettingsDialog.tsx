@@ -67,6 +67,25 @@ function SettingsDialog({ settings, setSettings }: Props) {
             }
           />
         </div>
+        <div className="flex items-center space-x-2">
+          <Label htmlFor="tiled-generation">
+            <div>Tiled Generation for Tall Screenshots</div>
+            <div className="font-light mt-2 text-xs">
+              Generates sections of long HTML pages in parallel, then stitches
+              them together. Faster, but section seams may need touch-ups.
+            </div>
+          </Label>
+          <Switch
+            id="tiled-generation"
+            checked={settings.isTiledGenerationEnabled}
+            onCheckedChange={() =>
+              setSettings((s) => ({
+                ...s,
+                isTiledGenerationEnabled: !s.isTiledGenerationEnabled,
+              }))
+            }
+          />
+        </div>
         <div className="flex flex-col space-y-6">
           <div>
             <Label htmlFor="openai-api-key">
@@ -180,7 +199,10 @@ function SettingsDialog({ settings, setSettings }: Props) {
               </SelectTrigger>
               <SelectContent>
                 <SelectItem value="none">None (use standard generation)</SelectItem>
-                {(registry?.models?.map((m) => m.id) ?? []).map((model) => (
+                {[
+                  ...(registry?.models?.map((m) => m.id) ?? []),
+                  ...(registry?.analyzers?.map((a) => a.id) ?? []),
+                ].map((model) => (
                   <SelectItem key={model} value={model}>
                     {getModelNameFromRegistry(registry, model)}
                   </SelectItem>
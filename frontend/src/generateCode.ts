@@ -5,6 +5,7 @@ import {
   USER_CLOSE_WEB_SOCKET_CODE,
 } from "./constants";
 import { FullGenerationSettings } from "./types";
+import { ImagePatch } from "./lib/imagePatch";
 
 const ERROR_MESSAGE =
   "Error generating code. Check the Developer Console AND the backend logs for details. Feel free to open a Github issue.";
@@ -19,7 +20,8 @@ type WebSocketResponse = {
     | "error"
     | "variantComplete"
     | "variantError"
-    | "variantCount";
+    | "variantCount"
+    | "imagePatch";
   value: string;
   variantIndex?: number;
 };
@@ -27,6 +29,7 @@ type WebSocketResponse = {
 interface CodeGenerationCallbacks {
   onChange: (chunk: string, variantIndex: number) => void;
   onSetCode: (code: string, variantIndex: number) => void;
+  onImagePatch: (patch: ImagePatch, variantIndex: number) => void;
   onStatusUpdate: (status: string, variantIndex: number) => void;
   onVariantComplete: (variantIndex: number) => void;
   onVariantError: (variantIndex: number, error: string) => void;
@@ -75,6 +78,10 @@ export function generateCode(
         if (typeof r.variantIndex !== "number") return;
         callbacks.onSetCode(r.value, r.variantIndex);
       },
+      imagePatch: (r) => {
+        if (typeof r.variantIndex !== "number") return;
+        callbacks.onImagePatch(JSON.parse(r.value) as ImagePatch, r.variantIndex);
+      },
       variantComplete: (r) => {
         if (typeof r.variantIndex !== "number") return;
         callbacks.onVariantComplete(r.variantIndex);
@@ -20,8 +20,15 @@ export interface PublicStackInfo {
   in_beta: boolean;
 }
 
+// Non-LLM element analyzers, selectable only as the analysis model.
+export interface PublicAnalyzerInfo {
+  id: ModelId;
+  name: string;
+}
+
 export interface BackendRegistry {
   models: PublicModelInfo[];
+  analyzers?: PublicAnalyzerInfo[];
   stacks: PublicStackInfo[];
   defaults: {
     generatedCodeConfig?: StackId | null;
@@ -64,7 +71,9 @@ export function getModelNameFromRegistry(
   registry: BackendRegistry | null,
   modelId: ModelId
 ): string {
-  const m = registry?.models?.find((x) => x.id === modelId);
+  const m =
+    registry?.models?.find((x) => x.id === modelId) ??
+    registry?.analyzers?.find((x) => x.id === modelId);
   return m?.name ?? modelId;
 }
 
@@ -0,0 +1,62 @@
+export interface ImagePatch {
+  alt: string;
+  src: string;
+  width: number;
+  height: number;
+}
+
+const PLACEHOLDER_PREFIX = "https://placehold.co";
+
+// Quoted attribute values may contain ">", so they are matched as a unit.
+const IMG_TAG = /<img\b(?:[^>"']|"[^"]*"|'[^']*')*>/gi;
+
+function attributePattern(name: string) {
+  return new RegExp(
+    `(\\s)${name}\\s*=\\s*(?:"([^"]*)"|'([^']*)'|([^\\s"'=<>\`]+))`,
+    "i"
+  );
+}
+
+function decodeEntities(value: string) {
+  return value
+    .replace(/&quot;/g, '"')
+    .replace(/&#39;/g, "'")
+    .replace(/&lt;/g, "<")
+    .replace(/&gt;/g, ">")
+    .replace(/&amp;/g, "&");
+}
+
+function getAttribute(tag: string, name: string): string | null {
+  const match = tag.match(attributePattern(name));
+  if (!match) return null;
+  return decodeEntities(match[2] ?? match[3] ?? match[4] ?? "");
+}
+
+function setAttribute(tag: string, name: string, value: string): string {
+  const attribute = `${name}="${value.replace(/"/g, "&quot;")}"`;
+  const pattern = attributePattern(name);
+  if (pattern.test(tag)) {
+    return tag.replace(pattern, (_match, space) => `${space}${attribute}`);
+  }
+  return tag.replace(/\s*(\/?)>$/, (_match, slash) => ` ${attribute}${slash}>`);
+}
+
+// Swap the placeholder <img> tags for `patch.alt` in place, leaving the rest
+// of the code (and its formatting) untouched.
+export function applyImagePatch(code: string, patch: ImagePatch): string {
+  return code.replace(IMG_TAG, (tag) => {
+    const src = getAttribute(tag, "src");
+    // Tags showing a local preview (data-preview) are still waiting for
+    // their real image.
+    const isPending =
+      src?.startsWith(PLACEHOLDER_PREFIX) ||
+      getAttribute(tag, "data-preview") !== null;
+    if (!isPending) return tag;
+    if (getAttribute(tag, "alt") !== patch.alt) return tag;
+
+    let patched = setAttribute(tag, "src", patch.src);
+    patched = setAttribute(patched, "width", String(patch.width));
+    patched = setAttribute(patched, "height", String(patch.height));
+    return patched;
+  });
+}
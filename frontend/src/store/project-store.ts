@@ -1,5 +1,6 @@
 import { create } from "zustand";
 import { Commit, CommitHash, VariantStatus } from "../components/commits/types";
+import { applyImagePatch, ImagePatch } from "../lib/imagePatch";
 
 // Store for app-wide state
 interface ProjectStore {
@@ -27,6 +28,11 @@ interface ProjectStore {
     code: string
   ) => void;
   setCommitCode: (hash: CommitHash, numVariant: number, code: string) => void;
+  patchCommitImage: (
+    hash: CommitHash,
+    numVariant: number,
+    patch: ImagePatch
+  ) => void;
   updateSelectedVariantIndex: (hash: CommitHash, index: number) => void;
   updateVariantStatus: (
     hash: CommitHash,
@@ -127,6 +133,25 @@ export const useProjectStore = create<ProjectStore>((set) => ({
         },
       };
     }),
+  patchCommitImage: (hash: CommitHash, numVariant: number, patch: ImagePatch) =>
+    set((state) => {
+      const commit = state.commits[hash];
+      // Ignore late WS updates (race-safe).
+      if (!commit || commit.isCommitted) return state;
+      return {
+        commits: {
+          ...state.commits,
+          [hash]: {
+            ...commit,
+            variants: commit.variants.map((variant, index) =>
+              index === numVariant
+                ? { ...variant, code: applyImagePatch(variant.code, patch) }
+                : variant
+            ),
+          },
+        },
+      };
+    }),
   updateSelectedVariantIndex: (hash: CommitHash, index: number) =>
     set((state) => {
       const commit = state.commits[hash];
@@ -10,6 +10,7 @@ export interface Settings {
   openAiBaseURL: string | null;
   screenshotOneApiKey: string | null;
   isImageGenerationEnabled: boolean;
+  isTiledGenerationEnabled: boolean; // Generate tall screenshots in parallel sections
   editorTheme: EditorTheme;
   generatedCodeConfig: StackId;
   codeGenerationModel: ModelId;